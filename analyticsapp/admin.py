@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AnalyticsSnapshot
+
+
+@admin.register(AnalyticsSnapshot)
+class AnalyticsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("refreshed_at", "is_dirty", "donors_active", "donors_inactive", "total_sos_requests", "response_rate")
+    readonly_fields = ("refreshed_at",)
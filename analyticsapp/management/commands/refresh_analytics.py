@@ -0,0 +1,18 @@
+"""
+Recompute the materialized analytics snapshot.
+Usage: python manage.py refresh_analytics
+
+Safe to run from cron (e.g. every few minutes) in addition to the on-read refresh.
+"""
+
+from django.core.management.base import BaseCommand
+
+from analyticsapp.services import refresh_analytics_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recompute the analytics snapshot used by the analytics pages and API'
+
+    def handle(self, *args, **options):
+        snapshot = refresh_analytics_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'✓ Analytics snapshot refreshed at {snapshot.refreshed_at:%Y-%m-%d %H:%M:%S}'))
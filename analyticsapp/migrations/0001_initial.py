@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('donors_by_group', models.JSONField(default=list)),
+                ('donors_active', models.PositiveIntegerField(default=0)),
+                ('donors_inactive', models.PositiveIntegerField(default=0)),
+                ('sos_by_status', models.JSONField(default=list)),
+                ('total_sos_requests', models.PositiveIntegerField(default=0)),
+                ('responses_by_choice', models.JSONField(default=list)),
+                ('response_rate', models.FloatField(default=0.0, help_text='Share of SOS responses that are YES (0-100)')),
+                ('inventory_by_group', models.JSONField(default=list)),
+                ('is_dirty', models.BooleanField(default=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,26 @@
 from django.db import models
 
-# Create your models here.
+
+class AnalyticsSnapshot(models.Model):
+    """
+    Materialized platform analytics (single row, pk=1).
+
+    Writes to the source tables only flip `is_dirty`; the aggregates are recomputed
+    at most once per `VEINLINE_ANALYTICS_MIN_REFRESH_SECONDS` on read, by the
+    `refresh_analytics` command, or both.
+    """
+
+    donors_by_group = models.JSONField(default=list)
+    donors_active = models.PositiveIntegerField(default=0)
+    donors_inactive = models.PositiveIntegerField(default=0)
+    sos_by_status = models.JSONField(default=list)
+    total_sos_requests = models.PositiveIntegerField(default=0)
+    responses_by_choice = models.JSONField(default=list)
+    response_rate = models.FloatField(default=0.0, help_text="Share of SOS responses that are YES (0-100)")
+    inventory_by_group = models.JSONField(default=list)
+
+    is_dirty = models.BooleanField(default=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Analytics snapshot @ {self.refreshed_at}"
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from donations.models import BloodBankInventory, DonorDetails
+from sos.models import SOSRequest, SOSResponse
+
+from .models import AnalyticsSnapshot
+
+SNAPSHOT_PK = 1
+
+
+def refresh_analytics_snapshot() -> AnalyticsSnapshot:
+    """Recompute every aggregate and store it in the snapshot row."""
+
+    # Clear the flag first so writes that land while we aggregate mark it dirty again.
+    AnalyticsSnapshot.objects.get_or_create(pk=SNAPSHOT_PK)
+    AnalyticsSnapshot.objects.filter(pk=SNAPSHOT_PK).update(is_dirty=False)
+
+    donor_activity = DonorDetails.objects.aggregate(
+        active=Count("id", filter=Q(is_available=True)),
+        inactive=Count("id", filter=Q(is_available=False)),
+    )
+    responses_by_choice = list(
+        SOSResponse.objects.values("response").annotate(count=Count("id")).order_by("response")
+    )
+    sos_by_status = list(SOSRequest.objects.values("status").annotate(count=Count("id")).order_by("status"))
+    total_responses = sum(row["count"] for row in responses_by_choice)
+    accepted = sum(row["count"] for row in responses_by_choice if row["response"] == "yes")
+
+    snapshot = AnalyticsSnapshot(
+        pk=SNAPSHOT_PK,
+        donors_by_group=list(
+            DonorDetails.objects.values("blood_group").annotate(count=Count("id")).order_by("blood_group")
+        ),
+        donors_active=donor_activity["active"],
+        donors_inactive=donor_activity["inactive"],
+        sos_by_status=sos_by_status,
+        total_sos_requests=sum(row["count"] for row in sos_by_status),
+        responses_by_choice=responses_by_choice,
+        response_rate=round(accepted / total_responses * 100, 1) if total_responses else 0.0,
+        inventory_by_group=list(
+            BloodBankInventory.objects.values("blood_group")
+            .annotate(units=Sum("units_available"))
+            .order_by("blood_group")
+        ),
+        is_dirty=False,
+        refreshed_at=timezone.now(),
+    )
+    snapshot.save(update_fields=[
+        "donors_by_group",
+        "donors_active",
+        "donors_inactive",
+        "sos_by_status",
+        "total_sos_requests",
+        "responses_by_choice",
+        "response_rate",
+        "inventory_by_group",
+        "refreshed_at",
+    ])
+    return snapshot
+
+
+def get_analytics_snapshot() -> AnalyticsSnapshot:
+    """
+    Serve analytics from the snapshot. When it has never been built, or is dirty and
+    older than the minimum refresh interval, exactly one caller claims the refresh;
+    everyone else keeps reading the current row.
+    """
+
+    # get_or_create() copes with concurrent first requests creating the row.
+    snapshot, _ = AnalyticsSnapshot.objects.get_or_create(pk=SNAPSHOT_PK)
+    now = timezone.now()
+    if snapshot.refreshed_at is None:
+        claim = Q(refreshed_at__isnull=True)
+    else:
+        min_age = timedelta(seconds=getattr(settings, "VEINLINE_ANALYTICS_MIN_REFRESH_SECONDS", 60))
+        if not snapshot.is_dirty or snapshot.refreshed_at > now - min_age:
+            return snapshot
+        claim = Q(is_dirty=True, refreshed_at=snapshot.refreshed_at)
+    if AnalyticsSnapshot.objects.filter(claim, pk=SNAPSHOT_PK).update(refreshed_at=now):
+        return refresh_analytics_snapshot()
+    return snapshot
+
+
+def mark_analytics_dirty() -> None:
+    # Conditional so a burst of writes costs one real UPDATE until the next refresh.
+    AnalyticsSnapshot.objects.filter(pk=SNAPSHOT_PK, is_dirty=False).update(is_dirty=True)
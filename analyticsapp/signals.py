@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from donations.models import BloodBankInventory, DonorDetails
+from sos.models import SOSRequest, SOSResponse
+
+from .services import mark_analytics_dirty
+
+
+@receiver([post_save, post_delete], sender=DonorDetails)
+@receiver([post_save, post_delete], sender=SOSRequest)
+@receiver([post_save, post_delete], sender=SOSResponse)
+@receiver([post_save, post_delete], sender=BloodBankInventory)
+def analytics_source_changed(sender, **kwargs):
+    mark_analytics_dirty()
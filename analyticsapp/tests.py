@@ -1,3 +1,98 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from donations.models import DonorDetails
+
+from . import services
+from .models import AnalyticsSnapshot
+from .services import SNAPSHOT_PK, get_analytics_snapshot
+
+
+def _counting_refreshes():
+    return mock.patch.object(services, "refresh_analytics_snapshot", wraps=services.refresh_analytics_snapshot)
+
+
+def _donor(name, available=True):
+    user = User.objects.create_user(username=name, password="x")
+    return DonorDetails.objects.create(
+        user=user, full_name=name, age=30, blood_group="O+", city="Pune", is_available=available
+    )
+
+
+class AnalyticsSnapshotTests(TestCase):
+    def test_writes_mark_dirty_and_refresh_waits_for_min_interval(self):
+        _donor("one")
+        snapshot = get_analytics_snapshot()
+        self.assertEqual((snapshot.donors_active, snapshot.is_dirty), (1, False))
+
+        _donor("two", available=False)
+        self.assertTrue(AnalyticsSnapshot.objects.get(pk=SNAPSHOT_PK).is_dirty)
+        # Refreshed just now: served as is.
+        self.assertEqual(get_analytics_snapshot().donors_inactive, 0)
+
+        with override_settings(VEINLINE_ANALYTICS_MIN_REFRESH_SECONDS=0):
+            snapshot = get_analytics_snapshot()
+        self.assertEqual((snapshot.donors_active, snapshot.donors_inactive), (1, 1))
+        self.assertFalse(AnalyticsSnapshot.objects.get(pk=SNAPSHOT_PK).is_dirty)
+
+    def test_claimed_refresh_is_not_repeated(self):
+        get_analytics_snapshot()
+        _donor("one")
+        stale = timezone.now() - timedelta(hours=1)
+        AnalyticsSnapshot.objects.filter(pk=SNAPSHOT_PK).update(refreshed_at=stale)
+
+        with _counting_refreshes() as refresh:
+            self.assertEqual(get_analytics_snapshot().donors_active, 1)
+            # Another caller holding the old row loses the claim.
+            self.assertFalse(
+                AnalyticsSnapshot.objects.filter(pk=SNAPSHOT_PK, is_dirty=True, refreshed_at=stale).exists()
+            )
+            get_analytics_snapshot()
+        self.assertEqual(refresh.call_count, 1)
+
+    def test_row_created_without_aggregates_is_built(self):
+        AnalyticsSnapshot.objects.create(pk=SNAPSHOT_PK)
+        _donor("one")
+        snapshot = get_analytics_snapshot()
+        self.assertIsNotNone(snapshot.refreshed_at)
+        self.assertEqual(snapshot.donors_active, 1)
+
+
+class ConcurrentFirstSnapshotTests(TransactionTestCase):
+    workers = 6
+
+    def test_parallel_first_requests_build_the_snapshot_once(self):
+        _donor("one")
+        barrier = threading.Barrier(self.workers)
+        errors = []
+
+        def read():
+            try:
+                barrier.wait()
+                for _ in range(5):
+                    try:
+                        get_analytics_snapshot()
+                        return
+                    except OperationalError:  # SQLite: "database is locked"
+                        continue
+            except Exception as exc:  # noqa: BLE001 - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        with _counting_refreshes() as refresh:
+            threads = [threading.Thread(target=read) for _ in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(AnalyticsSnapshot.objects.get(pk=SNAPSHOT_PK).donors_active, 1)
@@ -1,40 +1,30 @@
-from django.db.models import Count, Sum
 from rest_framework import permissions, views
 from rest_framework.response import Response
 
-from donations.models import BloodBankInventory, DonorDetails
-from sos.models import SOSRequest, SOSResponse
+from donations.models import InventoryForecast
+from .services import get_analytics_snapshot
 
 
 class AdminAnalyticsView(views.APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        donors_by_group = (
-            DonorDetails.objects.values("blood_group").annotate(count=Count("id")).order_by("blood_group")
-        )
-        donors_active = DonorDetails.objects.filter(is_available=True).count()
-        donors_inactive = DonorDetails.objects.filter(is_available=False).count()
+        snapshot = get_analytics_snapshot()
 
-        shortages = (
-            BloodBankInventory.objects.values("blood_group")
-            .annotate(units=Sum("units_available"))
-            .order_by("blood_group")
+        shortage_forecast = (
+            InventoryForecast.objects.filter(shortage_expected=True)
+            .order_by("days_of_cover")
+            .values("city", "blood_group", "units_available", "daily_demand", "days_of_cover", "computed_at")
         )
 
-        sos_stats = SOSRequest.objects.values("status").annotate(count=Count("id")).order_by("status")
-        response_stats = SOSResponse.objects.values("response").annotate(count=Count("id")).order_by("response")
-
         return Response(
             {
-                "donors_by_group": list(donors_by_group),
-                "donors_activity": {"active": donors_active, "inactive": donors_inactive},
-                "sos_by_status": list(sos_stats),
-                "responses_by_choice": list(response_stats),
-                "inventory_records_by_group": list(shortages),
+                "donors_by_group": snapshot.donors_by_group,
+                "donors_activity": {"active": snapshot.donors_active, "inactive": snapshot.donors_inactive},
+                "sos_by_status": snapshot.sos_by_status,
+                "responses_by_choice": snapshot.responses_by_choice,
+                "inventory_records_by_group": snapshot.inventory_by_group,
+                "shortage_forecast": list(shortage_forecast),
+                "refreshed_at": snapshot.refreshed_at,
             }
         )
-
-from django.shortcuts import render
-
-# Create your views here.
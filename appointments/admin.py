@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ScheduleTemplate
+from .services import generate_slots
+
+
+@admin.register(ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ("name", "city", "blood_bank", "day_start", "day_end", "slot_minutes", "max_donors", "valid_from", "valid_until", "is_active")
+    list_filter = ("is_active", "blood_bank", "city")
+    search_fields = ("name", "city")
+    actions = ["generate_next_year"]
+
+    @admin.action(description="Generate slots for the next 365 days")
+    def generate_next_year(self, request, queryset):
+        result = generate_slots(queryset)
+        self.message_user(request, f"Created {result['created']} slots ({result['skipped']} already existed).")
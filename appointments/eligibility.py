@@ -0,0 +1,204 @@
+"""
+Donor eligibility rules.
+
+`RULES` is the single rules table: the questionnaire model, the batch screening API
+and the public eligibility checker page all evaluate it. It is compiled once into a
+list of small checks (field lookup + comparison), so screening a few thousand
+questionnaires is one pass over plain dicts with no per-row query.
+
+Every failed rule yields a reason with its deferral end date: `None` with
+`permanent=True` means indefinite deferral, `None` with `permanent=False` means
+"once resolved" (no date can be computed from the answers).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Iterable, Mapping
+
+from django.utils import timezone
+
+DONATION_INTERVAL_DAYS = 56
+MIN_WEIGHT_KG = 50.0
+
+
+@dataclass(frozen=True)
+class Rule:
+    code: str
+    field: str
+    test: str  # "yes": answer is true; "below": number < value; "days_since_below": date within `value` days
+    reason: str
+    question: str = ""
+    category: str = ""
+    value: float = 0
+    deferral_days: int | None = None
+    permanent: bool = False
+
+
+RULES: tuple[Rule, ...] = (
+    Rule("fever", "has_fever", "yes", "Fever or signs of infection", deferral_days=14,
+         question="Do you currently have fever, chills, or body temperature above 37.5°C?", category="General Health"),
+    Rule("cold_or_cough", "has_cold_or_cough", "yes", "Respiratory infection symptoms", deferral_days=7,
+         question="Are you experiencing symptoms of respiratory infection (cough, sore throat, nasal congestion)?",
+         category="General Health"),
+    Rule("heart_condition", "has_heart_condition", "yes", "Heart condition", permanent=True,
+         question="Have you been diagnosed with cardiovascular disease, heart murmur, or arrhythmia?",
+         category="Medical Conditions"),
+    Rule("high_blood_pressure", "has_high_blood_pressure", "yes", "Uncontrolled high blood pressure",
+         question="Do you have chronic uncontrolled hypertension (systolic >180 mmHg or diastolic >110 mmHg)?",
+         category="Medical Conditions"),
+    Rule("diabetes", "has_diabetes", "yes", "Insulin-treated diabetes", permanent=True,
+         question="Do you have Type 1 or Type 2 diabetes requiring insulin treatment?", category="Medical Conditions"),
+    Rule("hiv_or_aids", "has_hiv_or_aids", "yes", "HIV/AIDS", permanent=True,
+         question="Have you been diagnosed with HIV infection, AIDS, or exposed to HIV?", category="Infectious Disease"),
+    Rule("hepatitis", "has_hepatitis", "yes", "Hepatitis", permanent=True,
+         question="Have you been diagnosed with Hepatitis B, Hepatitis C, or other forms of hepatitis?",
+         category="Infectious Disease"),
+    Rule("cancer", "has_cancer", "yes", "Cancer", permanent=True,
+         question="Have you been diagnosed with or treated for malignancy, lymphoma, or leukemia?",
+         category="Infectious Disease"),
+    Rule("bleeding_disorder", "has_bleeding_disorder", "yes", "Bleeding disorder", permanent=True,
+         question="Have you been diagnosed with a bleeding disorder, hemophilia, or thrombocytopenia?",
+         category="Infectious Disease"),
+    Rule("recent_surgery", "recent_surgery", "yes", "Surgery in the last 6 months", deferral_days=180,
+         question="Have you undergone surgery, dental extraction, or invasive procedure within the last 6 months?",
+         category="Recent Medical Events"),
+    Rule("recent_tattoo_or_piercing", "recent_tattoo_or_piercing", "yes", "Tattoo or piercing in the last 12 months",
+         deferral_days=365,
+         question="Have you received a tattoo, body piercing, or acupuncture within the last 12 months?",
+         category="Recent Medical Events"),
+    Rule("recent_blood_transfusion", "recent_blood_transfusion", "yes", "Blood transfusion in the last year",
+         deferral_days=365,
+         question="Have you received a blood transfusion or blood product within the last 12 months?",
+         category="Recent Medical Events"),
+    Rule("recent_vaccination", "recent_vaccination", "yes", "Live vaccine in the last 4 weeks", deferral_days=28,
+         question="Have you received live attenuated vaccine (MMR, varicella, yellow fever) within the last 4 weeks?",
+         category="Recent Medical Events"),
+    Rule("pregnant", "is_pregnant", "yes", "Pregnancy or recent childbirth",
+         question="Are you currently pregnant or have you given birth within the last 6 months?",
+         category="Special Considerations"),
+    Rule("underweight", "weight_kg", "below", f"Weight below {MIN_WEIGHT_KG:g} kg", value=MIN_WEIGHT_KG),
+    Rule("recent_donation", "last_donation_date", "days_since_below",
+         f"Less than {DONATION_INTERVAL_DAYS} days since the last donation", value=DONATION_INTERVAL_DAYS),
+)
+
+# Asked on the checker page but never disqualifying on their own.
+ADVISORY_QUESTIONS = (
+    {
+        "id": "takes_blood_thinners",
+        "question": "Are you taking anticoagulant therapy (Warfarin, DOACs) or high-dose antiplatelet agents?",
+        "category": "Medications",
+    },
+)
+
+
+@dataclass
+class Eligibility:
+    eligible: bool
+    reasons: list[dict] = field(default_factory=list)
+
+    @property
+    def eligible_from(self) -> date | None:
+        """Date every deferral has ended, or None if eligible now / no date can be given."""
+        if self.eligible or any(r["until"] is None for r in self.reasons):
+            return None
+        return max(r["until"] for r in self.reasons)
+
+    def as_dict(self) -> dict:
+        return {"eligible": self.eligible, "eligible_from": self.eligible_from, "reasons": self.reasons}
+
+
+_YES = {True, 1, "1", "true", "True", "yes", "on"}
+
+
+Check = Callable[[Any, date], "tuple[bool, date | None]"]
+
+
+def _compile(rule: Rule) -> Check:
+    name = rule.field
+    if rule.test == "yes":
+        until = timedelta(days=rule.deferral_days) if rule.deferral_days else None
+
+        def check(value, today):
+            return value in _YES, (today + until if until else None)
+    elif rule.test == "below":
+        def check(value, today):
+            return value is not None and value != "" and float(value) < rule.value, None
+    elif rule.test == "days_since_below":
+        interval = timedelta(days=rule.value)
+
+        def check(value, today):
+            if not value:
+                return False, None
+            if isinstance(value, str):
+                value = date.fromisoformat(value)
+            return today - value < interval, value + interval
+    else:
+        raise ValueError(f"Unknown eligibility test {rule.test!r} in rule {rule.code!r}")
+    check.field = name
+    return check
+
+
+class RuleSet:
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = tuple(rules)
+        self._checks = [(_compile(rule), rule) for rule in self.rules]
+        self.fields = tuple(dict.fromkeys(rule.field for rule in self.rules))
+
+    def evaluate(self, answers: Mapping | Any, today: date | None = None) -> Eligibility:
+        """Evaluate one questionnaire (a model instance or a mapping of field -> answer)."""
+
+        today = today or timezone.localdate()
+        get = answers.get if isinstance(answers, Mapping) else lambda name: getattr(answers, name, None)
+        reasons = []
+        for check, rule in self._checks:
+            failed, until = check(get(check.field), today)
+            if failed:
+                reasons.append({
+                    "code": rule.code,
+                    "reason": rule.reason,
+                    "permanent": rule.permanent,
+                    "until": None if rule.permanent else until,
+                })
+        return Eligibility(eligible=not reasons, reasons=reasons)
+
+    def screen(self, rows: Iterable[Mapping | Any], today: date | None = None) -> list[Eligibility]:
+        today = today or timezone.localdate()
+        return [self.evaluate(row, today) for row in rows]
+
+    def questions(self) -> list[dict]:
+        """Question list for the checker page, in table order."""
+        asked = [
+            {"id": rule.field, "question": rule.question, "category": rule.category, "disqualifies": True}
+            for rule in self.rules
+            if rule.question
+        ]
+        return asked + [dict(q, disqualifies=False) for q in ADVISORY_QUESTIONS]
+
+
+RULESET = RuleSet(RULES)
+
+
+def screen_questionnaires(ids: Iterable[int], save: bool = False, today: date | None = None) -> list[dict]:
+    """
+    Evaluate stored questionnaires in one query. With `save`, `is_eligible` and the
+    appointments' `health_check_passed` are written with one UPDATE per outcome.
+    """
+
+    from .models import Appointment, HealthQuestionnaire
+
+    rows = list(HealthQuestionnaire.objects.filter(pk__in=ids).values("id", "appointment_id", *RULESET.fields))
+    results = RULESET.screen(rows, today)
+    if save:
+        passed = {row["id"] for row, result in zip(rows, results) if result.eligible}
+        failed = {row["id"] for row in rows} - passed
+        for pks, outcome in ((passed, True), (failed, False)):
+            if pks:
+                HealthQuestionnaire.objects.filter(pk__in=pks).update(is_eligible=outcome, updated_at=timezone.now())
+                Appointment.objects.filter(health_questionnaire__in=pks).update(
+                    has_answered_health_questions=True, health_check_passed=outcome, updated_at=timezone.now()
+                )
+    return [
+        dict(result.as_dict(), id=row["id"], appointment=row["appointment_id"])
+        for row, result in zip(rows, results)
+    ]
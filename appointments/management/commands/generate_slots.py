@@ -0,0 +1,35 @@
+"""
+Expand active schedule templates into appointment slots.
+Usage: python manage.py generate_slots [--days=365] [--from=YYYY-MM-DD] [--template=ID ...]
+
+Safe to re-run: slots that already exist for (city, blood bank, date, start) are skipped.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from appointments.models import ScheduleTemplate
+from appointments.services import generate_slots
+
+
+class Command(BaseCommand):
+    help = 'Generate AppointmentSlot rows from ScheduleTemplate records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='How many days ahead to generate (default: 365)')
+        parser.add_argument('--from', dest='start', default=None, help='First date (default: today)')
+        parser.add_argument('--template', type=int, action='append', help='Only these template ids')
+
+    def handle(self, *args, **options):
+        first = parse_date(options['start']) if options['start'] else timezone.localdate()
+        if first is None:
+            raise CommandError('--from must be YYYY-MM-DD')
+        templates = ScheduleTemplate.objects.filter(is_active=True)
+        if options['template']:
+            templates = templates.filter(pk__in=options['template'])
+
+        result = generate_slots(templates, first, first + timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"✓ Created {result['created']} slots ({result['skipped']} already existed)"))
@@ -0,0 +1,18 @@
+"""
+Recompute the per-(city, blood bank, date) slot availability summaries.
+Usage: python manage.py rebuild_slot_availability
+
+Summaries are maintained on booking/cancellation and slot edits; this is for backfills.
+"""
+
+from django.core.management.base import BaseCommand
+
+from appointments.services import rebuild_slot_availability
+
+
+class Command(BaseCommand):
+    help = 'Rebuild SlotAvailability from AppointmentSlot'
+
+    def handle(self, *args, **options):
+        count = rebuild_slot_availability()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt availability for {count} (city, blood bank, date) rows'))
@@ -0,0 +1,25 @@
+"""
+Send reminders for appointments starting within the next 24 hours.
+Usage: python manage.py send_appointment_reminders [--hours=24] [--batch-size=500]
+
+Idempotent: reminded appointments are stamped with reminder_sent_at and skipped on the
+next run, so it is safe to run every minute from cron.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from appointments.services import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Send due appointment reminders in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Reminder lead time in hours (default: 24)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        sent = send_due_reminders(lead=timedelta(hours=options['hours']), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Sent {sent} appointment reminder(s)'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_rename_appointments_appointment_donor_status_idx_appointment_donor_i_5e42e0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=64)),
+                ('blood_bank', models.CharField(choices=[('red_crescent', 'Red Crescent Blood Bank'), ('city_hospital', 'City Hospital Blood Bank'), ('private_clinic', 'Private Clinic Blood Bank'), ('mobile_unit', 'Mobile Donation Unit')], max_length=50)),
+                ('date', models.DateField()),
+                ('slot_count', models.PositiveIntegerField(default=0)),
+                ('total_seats', models.PositiveIntegerField(default=0)),
+                ('remaining_seats', models.PositiveIntegerField(default=0)),
+                ('earliest_free_time', models.TimeField(blank=True, help_text='Start of the earliest slot with a free seat', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slot Availability',
+                'ordering': ['date', 'city', 'blood_bank'],
+                'indexes': [models.Index(fields=['date', 'city'], name='appointment_date_4290a3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('city', 'blood_bank', 'date'), name='uniq_slot_availability')],
+            },
+        ),
+    ]
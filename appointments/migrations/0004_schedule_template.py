@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_slot_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('blood_bank', models.CharField(choices=[('red_crescent', 'Red Crescent Blood Bank'), ('city_hospital', 'City Hospital Blood Bank'), ('private_clinic', 'Private Clinic Blood Bank'), ('mobile_unit', 'Mobile Donation Unit')], max_length=50)),
+                ('city', models.CharField(max_length=64)),
+                ('address', models.CharField(blank=True, max_length=255)),
+                ('weekdays', models.JSONField(default=list, help_text='Days of week the schedule runs on (0=Monday … 6=Sunday)')),
+                ('day_start', models.TimeField(help_text='Start of the first slot, e.g. 09:00')),
+                ('day_end', models.TimeField(help_text='End of the last slot, e.g. 17:00')),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('max_donors', models.PositiveIntegerField(default=6, help_text='Donors per slot')),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField(blank=True, help_text='Leave blank for an open-ended schedule', null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['city', 'blood_bank', 'name'],
+            },
+        ),
+    ]
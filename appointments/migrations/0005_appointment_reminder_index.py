@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_schedule_template'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'reminder_sent_at'], name='appointment_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_reminder_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('left', 'Left Waitlist'), ('skipped', 'Skipped')], default='waiting', max_length=16)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True)),
+                ('appointment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='appointments.appointment')),
+                ('donor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_waitlist_entries', to=settings.AUTH_USER_MODEL)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='appointments.appointmentslot')),
+            ],
+            options={
+                'verbose_name_plural': 'Slot Waitlist Entries',
+                'ordering': ['joined_at', 'id'],
+                'indexes': [models.Index(fields=['slot', 'status', 'joined_at', 'id'], name='slot_waitlist_head_idx')],
+                'unique_together': {('slot', 'donor')},
+            },
+        ),
+    ]
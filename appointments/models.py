@@ -3,6 +3,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from datetime import datetime, timedelta
 
+from core.constants import WaitlistStatus
+
 
 class AppointmentSlot(models.Model):
     """Available donation appointment slots at blood banks"""
@@ -51,6 +53,79 @@ class AppointmentSlot(models.Model):
         return self.max_donors - self.booked_donors
 
 
+class ScheduleTemplate(models.Model):
+    """Recurring opening schedule for a blood bank, expanded into AppointmentSlot rows by appointments.services"""
+    
+    DAY_OF_WEEK = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    
+    name = models.CharField(max_length=120)
+    blood_bank = models.CharField(max_length=50, choices=AppointmentSlot.BLOOD_BANK_CHOICES)
+    city = models.CharField(max_length=64)
+    address = models.CharField(max_length=255, blank=True)
+    weekdays = models.JSONField(default=list, help_text="Days of week the schedule runs on (0=Monday … 6=Sunday)")
+    day_start = models.TimeField(help_text="Start of the first slot, e.g. 09:00")
+    day_end = models.TimeField(help_text="End of the last slot, e.g. 17:00")
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    max_donors = models.PositiveIntegerField(default=6, help_text="Donors per slot")
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True, help_text="Leave blank for an open-ended schedule")
+    notes = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['city', 'blood_bank', 'name']
+    
+    def __str__(self) -> str:
+        return f"{self.name} ({self.city} {self.blood_bank})"
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if not self.weekdays or any(day not in range(7) for day in self.weekdays):
+            raise ValidationError({'weekdays': 'Use a non-empty list of integers 0 (Monday) to 6 (Sunday).'})
+        if self.day_end <= self.day_start:
+            raise ValidationError({'day_end': 'Must be after day_start.'})
+        if self.valid_until and self.valid_until < self.valid_from:
+            raise ValidationError({'valid_until': 'Must be on or after valid_from.'})
+
+
+class SlotAvailability(models.Model):
+    """Precomputed seat availability per (city, blood bank, date); maintained by appointments.services"""
+    
+    city = models.CharField(max_length=64)
+    blood_bank = models.CharField(max_length=50, choices=AppointmentSlot.BLOOD_BANK_CHOICES)
+    date = models.DateField()
+    slot_count = models.PositiveIntegerField(default=0)
+    total_seats = models.PositiveIntegerField(default=0)
+    remaining_seats = models.PositiveIntegerField(default=0)
+    earliest_free_time = models.TimeField(null=True, blank=True, help_text="Start of the earliest slot with a free seat")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Slot Availability"
+        ordering = ['date', 'city', 'blood_bank']
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'blood_bank', 'date'], name='uniq_slot_availability'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'city']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.city} {self.blood_bank} {self.date}: {self.remaining_seats}/{self.total_seats}"
+
+
 class Appointment(models.Model):
     """Donor appointment bookings"""
     
@@ -91,6 +166,7 @@ class Appointment(models.Model):
         indexes = [
             models.Index(fields=['donor', 'status']),
             models.Index(fields=['slot', 'status']),
+            models.Index(fields=['status', 'reminder_sent_at'], name='appointment_reminder_due_idx'),
         ]
     
     def __str__(self) -> str:
@@ -106,6 +182,30 @@ class Appointment(models.Model):
         return False
 
 
+class SlotWaitlistEntry(models.Model):
+    """FIFO waitlist for a full appointment slot; the head is promoted when a seat is released"""
+    
+    slot = models.ForeignKey(AppointmentSlot, on_delete=models.CASCADE, related_name='waitlist')
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='slot_waitlist_entries')
+    status = models.CharField(max_length=16, choices=WaitlistStatus.choices, default=WaitlistStatus.WAITING)
+    appointment = models.ForeignKey(Appointment, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    joined_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = "Slot Waitlist Entries"
+        unique_together = ('slot', 'donor')
+        ordering = ['joined_at', 'id']
+        indexes = [
+            # Head of the queue is an index seek: (slot, waiting) ordered by joined_at, id.
+            models.Index(fields=['slot', 'status', 'joined_at', 'id'], name='slot_waitlist_head_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.donor.username} waiting for slot {self.slot_id} ({self.status})"
+
+
 class HealthQuestionnaire(models.Model):
     """Medical eligibility questionnaire responses"""
     
@@ -151,28 +251,11 @@ class HealthQuestionnaire(models.Model):
     def __str__(self) -> str:
         return f"Health Check - {self.appointment.donor.username}"
     
+    def eligibility(self, today=None):
+        """Full result from the shared rules table: reasons and deferral end dates"""
+        from .eligibility import RULESET
+        return RULESET.evaluate(self, today)
+    
     def check_eligibility(self) -> bool:
         """Check if donor is eligible based on health answers"""
-        # Major disqualifying conditions
-        if self.has_hiv_or_aids or self.has_hepatitis or self.has_cancer or self.has_bleeding_disorder:
-            return False
-        
-        # Temporary disqualifying conditions
-        if self.has_fever or self.has_cold_or_cough or self.is_pregnant:
-            return False
-        
-        # Recent procedures
-        if self.recent_tattoo_or_piercing or self.recent_surgery or self.recent_blood_transfusion:
-            return False
-        
-        # Weight requirement
-        if self.weight_kg and self.weight_kg < 50:
-            return False
-        
-        # Last donation was less than 56 days ago
-        if self.last_donation_date:
-            days_since_donation = (datetime.now().date() - self.last_donation_date).days
-            if days_since_donation < 56:
-                return False
-        
-        return True
+        return self.eligibility().eligible
@@ -35,6 +35,7 @@ class AppointmentSlotSerializer(serializers.ModelSerializer):
 
 class HealthQuestionnaireSerializer(serializers.ModelSerializer):
     is_eligible = serializers.SerializerMethodField()
+    eligibility = serializers.SerializerMethodField()
     
     class Meta:
         model = HealthQuestionnaire
@@ -62,12 +63,16 @@ class HealthQuestionnaireSerializer(serializers.ModelSerializer):
             'hemoglobin_level',
             'additional_notes',
             'is_eligible',
+            'eligibility',
         ]
-        read_only_fields = ['id', 'is_eligible']
+        read_only_fields = ['id', 'is_eligible', 'eligibility']
     
     def get_is_eligible(self, obj):
         return obj.check_eligibility()
     
+    def get_eligibility(self, obj):
+        return obj.eligibility().as_dict()
+    
     def create(self, validated_data):
         questionnaire = super().create(validated_data)
         questionnaire.is_eligible = questionnaire.check_eligibility()
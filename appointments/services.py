@@ -0,0 +1,389 @@
+"""
+Slot booking and cancellation.
+
+Seat accounting is done in the database, never read-modify-write in Python:
+booking is one conditional `UPDATE ... SET booked_donors = booked_donors + 1
+WHERE booked_donors < max_donors`, so concurrent requests cannot overbook, and the
+appointment row is written in the same transaction.
+
+Full slots keep a FIFO waitlist. A cancellation releases one seat and, in the same
+transaction, promotes the head of the queue: the entry is claimed with a conditional
+`UPDATE ... WHERE status = 'waiting'` (so two concurrent cancels never promote the
+same donor) and booked through the same seat update as a normal booking.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Min, Q, Sum, Value, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import Appointment, AppointmentSlot, ScheduleTemplate, SlotAvailability, SlotWaitlistEntry, WaitlistStatus
+
+ACTIVE_STATUSES = ("scheduled", "confirmed")
+
+
+class BookingError(Exception):
+    """Booking or cancellation was refused; the message is safe to show to the user."""
+
+
+class SlotFullError(BookingError):
+    """No seat left in the slot (the donor can join its waitlist instead)."""
+
+
+def book_slot(donor, slot: AppointmentSlot, **fields) -> Appointment:
+    """Take one seat in `slot` for `donor` and create (or re-open a cancelled) appointment."""
+
+    try:
+        return _book_slot(donor, slot, fields)
+    except IntegrityError:
+        # Same donor booked the same slot concurrently; the seat update was rolled back.
+        raise BookingError("You already have an appointment in this slot")
+
+
+def _book_slot(donor, slot: AppointmentSlot, fields: dict) -> Appointment:
+    with transaction.atomic():
+        existing = Appointment.objects.select_for_update().filter(donor=donor, slot=slot).first()
+        if existing is not None and existing.status != "cancelled":
+            raise BookingError("You already have an appointment in this slot")
+
+        # `status` is listed first: MySQL applies SET clauses left to right.
+        taken = AppointmentSlot.objects.filter(
+            pk=slot.pk, status="available", booked_donors__lt=F("max_donors")
+        ).update(
+            status=Case(
+                When(booked_donors__gte=F("max_donors") - 1, then=Value("booked")),
+                default=F("status"),
+            ),
+            booked_donors=F("booked_donors") + 1,
+            updated_at=Now(),
+        )
+        if not taken:
+            raise SlotFullError("This slot is fully booked")
+
+        refresh_slot_availability([(slot.city, slot.blood_bank, slot.date)])
+        if existing is None:
+            return Appointment.objects.create(donor=donor, slot=slot, **fields)
+
+        existing.status = "scheduled"
+        existing.is_confirmed_by_donor = False
+        existing.confirmed_at = None
+        existing.reminder_sent_at = None
+        for name, value in fields.items():
+            setattr(existing, name, value)
+        existing.save()
+        return existing
+
+
+def cancel_appointment(appointment: Appointment) -> Appointment:
+    """Cancel a scheduled/confirmed appointment and release its seat, exactly once."""
+
+    with transaction.atomic():
+        cancelled = Appointment.objects.filter(pk=appointment.pk, status__in=ACTIVE_STATUSES).update(
+            status="cancelled", updated_at=Now()
+        )
+        if not cancelled:
+            raise BookingError(f"Cannot cancel a {appointment.status} appointment")
+
+        AppointmentSlot.objects.filter(pk=appointment.slot_id, booked_donors__gt=0).update(
+            status=Case(When(status="booked", then=Value("available")), default=F("status")),
+            booked_donors=F("booked_donors") - 1,
+            updated_at=Now(),
+        )
+        slot = AppointmentSlot.objects.get(pk=appointment.slot_id)
+        refresh_slot_availability([(slot.city, slot.blood_bank, slot.date)])
+        promote_slot_waitlist(slot)
+    appointment.refresh_from_db()
+    return appointment
+
+
+def _waiting(slot_id: int):
+    return SlotWaitlistEntry.objects.filter(slot_id=slot_id, status=WaitlistStatus.WAITING)
+
+
+def waitlist_position(entry: SlotWaitlistEntry) -> int | None:
+    """1-based FIFO position of a waiting entry, None once it has left the queue."""
+
+    if entry.status != WaitlistStatus.WAITING:
+        return None
+    ahead = _waiting(entry.slot_id).filter(
+        Q(joined_at__lt=entry.joined_at) | Q(joined_at=entry.joined_at, id__lt=entry.id)
+    )
+    return ahead.count() + 1
+
+
+def join_slot_waitlist(donor, slot: AppointmentSlot) -> SlotWaitlistEntry:
+    """Queue `donor` for a full slot (re-joining puts them at the back of the queue)."""
+
+    if slot.status == "cancelled":
+        raise BookingError("This slot has been cancelled")
+    if slot.status == "available" and slot.booked_donors < slot.max_donors:
+        raise BookingError("This slot still has free seats; book it directly")
+    if Appointment.objects.filter(donor=donor, slot=slot, status__in=ACTIVE_STATUSES).exists():
+        raise BookingError("You already have an appointment in this slot")
+
+    with transaction.atomic():
+        entry, created = SlotWaitlistEntry.objects.select_for_update().get_or_create(slot=slot, donor=donor)
+        if created:
+            return entry
+        if entry.status == WaitlistStatus.WAITING:
+            raise BookingError("You are already on the waitlist for this slot")
+        entry.delete()
+        return SlotWaitlistEntry.objects.create(slot=slot, donor=donor)
+
+
+def leave_slot_waitlist(donor, slot: AppointmentSlot) -> bool:
+    """Remove `donor` from the queue; False if they were not waiting."""
+
+    return bool(_waiting(slot.pk).filter(donor=donor).update(status=WaitlistStatus.LEFT))
+
+
+def promote_slot_waitlist(slot: AppointmentSlot) -> Appointment | None:
+    """
+    Book the freed seat in `slot` for the donor at the head of its waitlist. Must run
+    inside the transaction that released the seat. Each cancellation frees one seat, so
+    this normally claims exactly one entry; entries whose donor already holds an
+    appointment here are skipped.
+    """
+
+    from notifications.models import NotificationType
+    from notifications.services import NotificationService
+
+    while True:
+        head = _waiting(slot.pk).select_related("donor").order_by("joined_at", "id").first()
+        if head is None:
+            return None
+        now = timezone.now()
+        # Claim the entry; a concurrent cancel that got here first makes this a no-op.
+        if not _waiting(slot.pk).filter(pk=head.pk).update(status=WaitlistStatus.PROMOTED, promoted_at=now):
+            continue
+        try:
+            appointment = _book_slot(head.donor, slot, {})  # Its own savepoint.
+        except SlotFullError:
+            # Seat already re-taken; put the entry back at the head of the queue.
+            SlotWaitlistEntry.objects.filter(pk=head.pk).update(status=WaitlistStatus.WAITING, promoted_at=None)
+            return None
+        except (BookingError, IntegrityError):
+            SlotWaitlistEntry.objects.filter(pk=head.pk).update(status=WaitlistStatus.SKIPPED)
+            continue
+
+        SlotWaitlistEntry.objects.filter(pk=head.pk).update(appointment=appointment)
+        slot_label = f"{slot.blood_bank} on {slot.date} at {slot.start_time:%H:%M}"
+        transaction.on_commit(
+            lambda: NotificationService.notify_custom(
+                head.donor,
+                "A seat opened up for you",
+                f"You were moved off the waitlist and booked at {slot_label}.",
+                notification_type=NotificationType.APPOINTMENT_CONFIRMED,
+                priority="high",
+                content_object=appointment,
+            )
+        )
+        return appointment
+
+
+def _availability_rows(slots):
+    """One grouped query: per (city, blood bank, date) seat totals over non-cancelled slots."""
+
+    open_with_room = Q(status="available", booked_donors__lt=F("max_donors"))
+    return (
+        slots.exclude(status="cancelled")
+        .values("city", "blood_bank", "date")
+        .annotate(
+            slot_count=Count("id"),
+            total_seats=Sum("max_donors"),
+            remaining_seats=Sum(F("max_donors") - F("booked_donors"), filter=open_with_room),
+            earliest_free_time=Min("start_time", filter=open_with_room),
+        )
+        .order_by()
+    )
+
+
+def _upsert_availability(rows) -> set:
+    summaries = [
+        SlotAvailability(
+            city=row["city"],
+            blood_bank=row["blood_bank"],
+            date=row["date"],
+            slot_count=row["slot_count"],
+            total_seats=row["total_seats"] or 0,
+            remaining_seats=row["remaining_seats"] or 0,
+            earliest_free_time=row["earliest_free_time"],
+        )
+        for row in rows
+    ]
+    SlotAvailability.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["city", "blood_bank", "date"],
+        update_fields=["slot_count", "total_seats", "remaining_seats", "earliest_free_time", "updated_at"],
+        batch_size=1000,
+    )
+    return {(s.city, s.blood_bank, s.date) for s in summaries}
+
+
+def refresh_slot_availability(keys) -> None:
+    """Recompute the summaries for the given (city, blood_bank, date) keys; drop ones with no slots left."""
+
+    keys = set(keys)
+    if not keys:
+        return
+    lookup = Q()
+    for city, bank, day in keys:
+        lookup |= Q(city=city, blood_bank=bank, date=day)
+    written = _upsert_availability(_availability_rows(AppointmentSlot.objects.filter(lookup)))
+    stale = Q()
+    for city, bank, day in keys - written:
+        stale |= Q(city=city, blood_bank=bank, date=day)
+    if stale:
+        SlotAvailability.objects.filter(stale).delete()
+
+
+def refresh_slot_availability_between(first: date, last: date, cities=None, blood_banks=None) -> int:
+    """Recompute summaries for a date range (bulk slot generation) with one grouped query."""
+
+    slots = AppointmentSlot.objects.filter(date__range=[first, last])
+    if cities is not None:
+        slots = slots.filter(city__in=cities)
+    if blood_banks is not None:
+        slots = slots.filter(blood_bank__in=blood_banks)
+    return len(_upsert_availability(_availability_rows(slots)))
+
+
+def rebuild_slot_availability() -> int:
+    """Recompute every summary from scratch (backfills, repairs)."""
+
+    with transaction.atomic():
+        written = _upsert_availability(_availability_rows(AppointmentSlot.objects.all()))
+        existing = SlotAvailability.objects.values_list("pk", "city", "blood_bank", "date")
+        SlotAvailability.objects.filter(
+            pk__in=[pk for pk, city, bank, day in existing if (city, bank, day) not in written]
+        ).delete()
+    return len(written)
+
+
+def _template_slots(template: ScheduleTemplate, first: date, last: date):
+    """Yield (date, start, end) for every slot `template` defines in [first, last]."""
+
+    first = max(first, template.valid_from)
+    if template.valid_until:
+        last = min(last, template.valid_until)
+    weekdays = set(template.weekdays)
+    step = timedelta(minutes=template.slot_minutes)
+
+    # Start/end times are the same every day; compute them once.
+    times = []
+    cursor = datetime.combine(first, template.day_start)
+    day_end = datetime.combine(first, template.day_end)
+    while cursor + step <= day_end:
+        times.append((cursor.time(), (cursor + step).time()))
+        cursor += step
+
+    day = first
+    while day <= last:
+        if day.weekday() in weekdays:
+            for start, end in times:
+                yield day, start, end
+        day += timedelta(days=1)
+
+
+def generate_slots(templates=None, first: date | None = None, last: date | None = None, batch_size: int = 1000) -> dict:
+    """
+    Expand schedule templates into AppointmentSlot rows between `first` and `last`.
+
+    Slots that already exist for a (city, blood bank, date, start) are skipped using one
+    query over the whole range and a set difference; new rows go through chunked
+    `bulk_create`, then availability summaries for the range are refreshed in one pass.
+    """
+
+    templates = list(ScheduleTemplate.objects.filter(is_active=True) if templates is None else templates)
+    first = first or timezone.localdate()
+    last = last or first + timedelta(days=365)
+    if not templates or last < first:
+        return {"created": 0, "skipped": 0}
+
+    cities = {t.city for t in templates}
+    banks = {t.blood_bank for t in templates}
+    existing = set(
+        AppointmentSlot.objects.filter(date__range=[first, last], city__in=cities, blood_bank__in=banks)
+        .values_list("city", "blood_bank", "date", "start_time")
+        .iterator(chunk_size=10000)
+    )
+
+    created = skipped = 0
+    batch = []
+    with transaction.atomic():
+        for template in templates:
+            for day, start, end in _template_slots(template, first, last):
+                key = (template.city, template.blood_bank, day, start)
+                if key in existing:
+                    skipped += 1
+                    continue
+                existing.add(key)  # Overlapping templates must not double-create either.
+                batch.append(
+                    AppointmentSlot(
+                        city=template.city,
+                        blood_bank=template.blood_bank,
+                        address=template.address,
+                        date=day,
+                        start_time=start,
+                        end_time=end,
+                        max_donors=template.max_donors,
+                        notes=template.notes,
+                    )
+                )
+                if len(batch) >= batch_size:
+                    AppointmentSlot.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+        if batch:
+            AppointmentSlot.objects.bulk_create(batch)
+            created += len(batch)
+        if created:
+            refresh_slot_availability_between(first, last, cities=cities, blood_banks=banks)
+
+    return {"created": created, "skipped": skipped}
+
+
+def send_due_reminders(now=None, lead: timedelta = timedelta(hours=24), batch_size: int = 500) -> int:
+    """
+    Send the reminder for every active appointment starting within `lead` that has not
+    had one yet. Each batch is locked (SKIP LOCKED where supported), gets its in-app
+    notifications in one INSERT and its `reminder_sent_at` in one `bulk_update`, so
+    overlapping cron runs never double-send. SMS/email go out after the batch commits.
+    Returns the number of reminders sent.
+    """
+
+    from notifications.services import NotificationService
+
+    now = timezone.localtime(now or timezone.now())
+    horizon = now + lead
+    # Slot date/time are local wall-clock values; compare them field by field so the
+    # whole window stays in SQL.
+    window = (
+        (Q(slot__date__gt=now.date()) | Q(slot__date=now.date(), slot__start_time__gt=now.time()))
+        & (Q(slot__date__lt=horizon.date()) | Q(slot__date=horizon.date(), slot__start_time__lte=horizon.time()))
+    )
+    due = (
+        Appointment.objects.filter(window, status__in=ACTIVE_STATUSES, reminder_sent_at__isnull=True)
+        .select_related("slot", "donor__profile")
+        .order_by("slot__date", "slot__start_time", "pk")
+    )
+
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due.select_for_update(skip_locked=True, of=("self",))[:batch_size])
+            if not batch:
+                break
+            notifications = NotificationService.notify_appointment_reminders_bulk(batch, deliver=False)
+            for appointment in batch:
+                appointment.reminder_sent_at = now
+            Appointment.objects.bulk_update(batch, ["reminder_sent_at"])
+        NotificationService.deliver_bulk(notifications)
+        sent += len(batch)
+        if len(batch) < batch_size:
+            break
+    return sent
@@ -0,0 +1,66 @@
+import threading
+import weakref
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AppointmentSlot
+from .services import refresh_slot_availability
+
+# Keys touched in the current transaction; refreshed once on commit, so a bulk
+# delete of thousands of slots costs a few grouped queries, not one per slot.
+_pending = threading.local()
+FLUSH_CHUNK = 200
+
+
+class _Flush:
+    """The keys of one transaction, registered once with on_commit."""
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+
+    def __call__(self):
+        if _current() is self:
+            _pending.flush = None
+        keys = list(self.keys)
+        for start in range(0, len(keys), FLUSH_CHUNK):
+            refresh_slot_availability(keys[start:start + FLUSH_CHUNK])
+
+
+def _current():
+    # Only a weak reference is kept: on rollback (of the transaction or of the savepoint
+    # that registered it) Django drops the callback, the flush is freed and the next
+    # change starts a new one.
+    ref = getattr(_pending, "flush", None)
+    return ref() if ref is not None else None
+
+
+def _queue(keys):
+    pending = _current()
+    if pending is not None:
+        pending.keys.update(keys)
+        return
+    pending = _Flush(keys)
+    _pending.flush = weakref.ref(pending)
+    # Outside a transaction this runs immediately, with the keys already in place.
+    transaction.on_commit(pending, robust=True)
+
+
+@receiver(pre_save, sender=AppointmentSlot)
+def remember_slot_key(sender, instance, **kwargs):
+    # An edit can move a slot to another (city, bank, date); both summaries must be refreshed.
+    instance._availability_key = (
+        AppointmentSlot.objects.filter(pk=instance.pk).values_list("city", "blood_bank", "date").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=AppointmentSlot)
+def slot_changed(sender, instance, **kwargs):
+    keys = {(instance.city, instance.blood_bank, instance.date)}
+    previous = getattr(instance, "_availability_key", None)
+    if previous:
+        keys.add(previous)
+    _queue(keys)
@@ -1,3 +1,336 @@
-from django.test import TestCase
+import threading
+from datetime import datetime, time, timedelta
+from time import sleep
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+
+from .eligibility import RULESET
+from .models import Appointment, AppointmentSlot, HealthQuestionnaire, ScheduleTemplate, SlotAvailability
+from .services import (
+    BookingError,
+    SlotFullError,
+    book_slot,
+    cancel_appointment,
+    generate_slots,
+    join_slot_waitlist,
+    send_due_reminders,
+    waitlist_position,
+)
+
+
+def _slot(max_donors=1):
+    return AppointmentSlot.objects.create(
+        blood_bank="city_hospital",
+        city="Pune",
+        date=timezone.now().date() + timedelta(days=3),
+        start_time=time(10, 0),
+        end_time=time(11, 0),
+        max_donors=max_donors,
+    )
+
+
+class SlotBookingTests(TestCase):
+    def setUp(self):
+        self.slot = _slot(max_donors=1)
+        self.donor = User.objects.create_user(username="donor", password="x")
+        self.other = User.objects.create_user(username="other", password="x")
+
+    def test_last_seat_marks_slot_booked_and_refuses_more(self):
+        book_slot(self.donor, self.slot)
+        self.slot.refresh_from_db()
+        self.assertEqual((self.slot.booked_donors, self.slot.status), (1, "booked"))
+        with self.assertRaises(BookingError):
+            book_slot(self.other, self.slot)
+
+    def test_cancel_releases_seat_once_and_allows_rebooking(self):
+        appointment = book_slot(self.donor, self.slot)
+        cancel_appointment(appointment)
+        with self.assertRaises(BookingError):
+            cancel_appointment(appointment)
+        self.slot.refresh_from_db()
+        self.assertEqual((self.slot.booked_donors, self.slot.status), (0, "available"))
+
+        rebooked = book_slot(self.donor, self.slot)
+        self.assertEqual((rebooked.pk, rebooked.status), (appointment.pk, "scheduled"))
+
+
+class SlotWaitlistTests(TestCase):
+    def setUp(self):
+        self.slot = _slot(max_donors=1)
+        self.donor = User.objects.create_user(username="donor", password="x")
+        self.first = User.objects.create_user(username="first", password="x")
+        self.second = User.objects.create_user(username="second", password="x")
+
+    def test_cancellation_promotes_head_of_queue(self):
+        with self.assertRaises(BookingError):
+            join_slot_waitlist(self.first, self.slot)  # Free seats: book directly.
+        appointment = book_slot(self.donor, self.slot)
+        with self.assertRaises(SlotFullError):
+            book_slot(self.first, self.slot)
+
+        self.slot.refresh_from_db()
+        first = join_slot_waitlist(self.first, self.slot)
+        second = join_slot_waitlist(self.second, self.slot)
+        self.assertEqual((waitlist_position(first), waitlist_position(second)), (1, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_appointment(appointment)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.slot.refresh_from_db()
+        self.assertEqual(first.status, "promoted")
+        self.assertEqual(Appointment.objects.get(pk=first.appointment_id).donor, self.first)
+        self.assertEqual((self.slot.booked_donors, self.slot.status), (1, "booked"))
+        self.assertEqual(waitlist_position(second), 1)
+        self.assertTrue(Notification.objects.filter(recipient=self.first).exists())
+
+
+class EligibilityRulesTests(TestCase):
+    def test_reasons_deferrals_and_batch_screening(self):
+        today = timezone.localdate()
+        result = RULESET.evaluate(
+            {"has_fever": True, "last_donation_date": (today - timedelta(days=20)).isoformat()}, today
+        )
+        self.assertFalse(result.eligible)
+        self.assertEqual([r["code"] for r in result.reasons], ["fever", "recent_donation"])
+        self.assertEqual(result.eligible_from, today + timedelta(days=36))
+        self.assertIsNone(RULESET.evaluate({"has_hepatitis": True}, today).eligible_from)
+        # The checker page's deferral periods: tattoo 12 months, live vaccine 4 weeks.
+        result = RULESET.evaluate({"recent_tattoo_or_piercing": True, "recent_vaccination": True}, today)
+        self.assertEqual(
+            [r["until"] for r in result.reasons], [today + timedelta(days=365), today + timedelta(days=28)]
+        )
+
+        donor = User.objects.create_user(username="donor", password="x")
+        ok = HealthQuestionnaire.objects.create(appointment=book_slot(donor, _slot(max_donors=2)), weight_kg=70)
+        other = User.objects.create_user(username="other", password="x")
+        later = _slot()
+        later.start_time = time(15, 0)
+        later.save()
+        deferred = HealthQuestionnaire.objects.create(
+            appointment=book_slot(other, later), recent_tattoo_or_piercing=True
+        )
+        self.assertTrue(ok.check_eligibility())
+        self.assertFalse(deferred.check_eligibility())
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.post(
+            "/api/eligibility/screen/",
+            {"questionnaire_ids": [ok.pk, deferred.pk], "save": True},
+            format="json",
+            SERVER_NAME="localhost",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["count"], response.json()["eligible"]), (2, 1))
+        self.assertFalse(Appointment.objects.get(pk=deferred.appointment_id).health_check_passed)
+        self.assertTrue(Appointment.objects.get(pk=ok.appointment_id).health_check_passed)
+
+
+class AppointmentReminderTests(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(9, 0)))
+
+    def _appointment(self, name, days, start, status="scheduled"):
+        slot = AppointmentSlot.objects.create(
+            blood_bank="city_hospital",
+            city="Pune",
+            date=self.now.date() + timedelta(days=days),
+            start_time=start,
+            end_time=time(23, 59),
+            max_donors=5,
+        )
+        donor = User.objects.create_user(username=name, password="x")
+        return Appointment.objects.create(slot=slot, donor=donor, status=status)
+
+    def test_window_batches_and_stamping(self):
+        due = [
+            self._appointment("later_today", 0, time(17, 0)),
+            self._appointment("tomorrow_morning", 1, time(9, 0)),  # exactly at the horizon
+            self._appointment("confirmed", 0, time(12, 0), status="confirmed"),
+        ]
+        self._appointment("already_started", 0, time(8, 0))
+        self._appointment("too_far", 1, time(9, 30))
+        self._appointment("cancelled", 0, time(12, 0), status="cancelled")
+
+        self.assertEqual(send_due_reminders(now=self.now, batch_size=2), 3)
+        stamped = Appointment.objects.filter(reminder_sent_at__isnull=False)
+        self.assertEqual({a.pk for a in stamped}, {a.pk for a in due})
+        self.assertEqual({a.reminder_sent_at for a in stamped}, {self.now})
+
+        # Stamped rows are never picked up again.
+        self.assertEqual(send_due_reminders(now=self.now), 0)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_message_names_the_appointment_day(self):
+        appointment = self._appointment("donor", 0, time(17, 0))
+        send_due_reminders(now=self.now)
+        message = Notification.objects.get(recipient=appointment.donor).message
+        self.assertIn(f"on {appointment.slot.date} at 17:00", message)
+        self.assertNotIn("tomorrow", message)
+
+
+class SlotAvailabilityTests(TestCase):
+    def test_summary_follows_bookings_and_cancellations(self):
+        # Slot saves refresh the summary on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            slot = _slot(max_donors=2)
+            later = _slot(max_donors=3)
+            later.start_time = time(14, 0)
+            later.save()
+        donor = User.objects.create_user(username="donor", password="x")
+        other = User.objects.create_user(username="other", password="x")
+
+        def summary():
+            return SlotAvailability.objects.values_list(
+                "slot_count", "total_seats", "remaining_seats", "earliest_free_time"
+            ).get(date=slot.date)
+
+        self.assertEqual(summary(), (2, 5, 5, time(10, 0)))
+        book_slot(donor, slot)
+        appointment = book_slot(other, slot)
+        self.assertEqual(summary(), (2, 5, 3, time(14, 0)))
+        cancel_appointment(appointment)
+        self.assertEqual(summary(), (2, 5, 4, time(10, 0)))
+
+        month = slot.date.strftime("%Y-%m")
+        response = self.client.get(f"/api/slots/calendar/?month={month}&city=pune", SERVER_NAME="localhost")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["days"][0]["remaining_seats"], 4)
+
+
+class SlotGenerationTests(TestCase):
+    def test_expands_templates_and_skips_existing_slots(self):
+        monday = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        template = ScheduleTemplate.objects.create(
+            name="Weekdays", city="Pune", blood_bank="city_hospital",
+            weekdays=[0, 2], day_start=time(9, 0), day_end=time(11, 0), slot_minutes=30,
+            max_donors=6, valid_from=monday,
+        )
+        AppointmentSlot.objects.create(
+            city="Pune", blood_bank="city_hospital", date=monday,
+            start_time=time(9, 30), end_time=time(10, 0), max_donors=2,
+        )
+
+        # Monday + Wednesday, four 30-minute slots each; one already exists.
+        result = generate_slots([template], monday, monday + timedelta(days=6))
+        self.assertEqual(result, {"created": 7, "skipped": 1})
+        self.assertEqual(generate_slots([template], monday, monday + timedelta(days=6))["created"], 0)
+        self.assertEqual(SlotAvailability.objects.get(date=monday).total_seats, 6 * 3 + 2)
+
+
+class ConcurrentSlotBookingTests(TransactionTestCase):
+    """Parallel bookings against a one-seat slot: exactly one wins, the seat count never exceeds 1."""
+
+    workers = 8
+
+    def test_parallel_bookings_never_overbook(self):
+        slot = _slot(max_donors=1)
+        donors = [User.objects.create_user(username=f"donor{i}", password="x") for i in range(self.workers)]
+        barrier = threading.Barrier(self.workers)
+        results = []
+
+        def attempt(donor):
+            try:
+                barrier.wait()
+                for _ in range(5):
+                    try:
+                        book_slot(donor, slot)
+                        results.append("booked")
+                        return
+                    except OperationalError:
+                        sleep(0.05)  # SQLite "database is locked": retry like a client would.
+                    except BookingError:
+                        break
+                results.append("refused")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(donor,)) for donor in donors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        slot.refresh_from_db()
+        self.assertEqual(results.count("booked"), 1)
+        self.assertEqual(slot.booked_donors, 1)
+        self.assertEqual(slot.status, "booked")
+        self.assertEqual(Appointment.objects.filter(slot=slot).count(), 1)
+
+
+class ConcurrentAppointmentCompletionTests(TransactionTestCase):
+    """Parallel completes of one appointment count the donation once."""
+
+    workers = 4
+
+    def test_parallel_completes_count_the_donation_once(self):
+        from donations.models import DonorStatistics
+
+        donor = User.objects.create_user(username="donor", password="x")
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        appointment = book_slot(donor, _slot())
+        barrier = threading.Barrier(self.workers)
+
+        def attempt():
+            client = APIClient()
+            client.force_authenticate(staff)
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    try:
+                        client.post(f"/api/my-appointments/{appointment.pk}/complete/", SERVER_NAME="localhost")
+                        return
+                    except OperationalError:
+                        sleep(0.05)  # SQLite "database is locked": retry like a client would.
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(DonorStatistics.objects.get(donor=donor).total_donations, 1)
+
+
+class SlotAvailabilitySignalTests(TransactionTestCase):
+    """Outside TestCase's wrapping transaction: autocommit saves and rollbacks."""
+
+    def _total_seats(self, day):
+        return SlotAvailability.objects.values_list("total_seats", flat=True).get(date=day)
+
+    def test_autocommit_save_refreshes_summary(self):
+        slot = _slot(max_donors=2)
+        self.assertEqual(self._total_seats(slot.date), 2)
+        slot.max_donors = 4
+        slot.save()
+        self.assertEqual(self._total_seats(slot.date), 4)
+
+    def test_save_after_rolled_back_transaction_refreshes_summary(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                _slot(max_donors=5)
+                raise RuntimeError("rolled back")
+        self.assertFalse(SlotAvailability.objects.exists())
+
+        slot = _slot(max_donors=2)
+        self.assertEqual(self._total_seats(slot.date), 2)
+
+    def test_save_after_rolled_back_savepoint_refreshes_summary(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    _slot(max_donors=5)
+                    raise RuntimeError("rolled back")
+            slot = _slot(max_donors=2)
+        self.assertEqual(self._total_seats(slot.date), 2)
@@ -1,6 +1,12 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentSlotViewSet, AppointmentViewSet, HealthQuestionnaireView
+from .views import (
+    AppointmentSlotViewSet,
+    AppointmentViewSet,
+    EligibilityCheckView,
+    EligibilityScreeningView,
+    HealthQuestionnaireView,
+)
 
 router = DefaultRouter()
 router.register(r'slots', AppointmentSlotViewSet, basename='appointment-slots')
@@ -8,6 +14,8 @@ router.register(r'my-appointments', AppointmentViewSet, basename='my-appointment
 
 urlpatterns = [
     path('appointments/<int:appointment_id>/health-questionnaire/', HealthQuestionnaireView.as_view(), name='health-questionnaire'),
+    path('eligibility/check/', EligibilityCheckView.as_view(), name='eligibility-check'),
+    path('eligibility/screen/', EligibilityScreeningView.as_view(), name='eligibility-screen'),
 ]
 
 urlpatterns += router.urls
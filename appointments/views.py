@@ -2,20 +2,43 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Min, Sum, Value, When
+from django.db.models.functions import Lower
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-from accounts.permissions import IsDonor
-from .models import AppointmentSlot, Appointment, HealthQuestionnaire
+from accounts.permissions import IsAdminRole, IsDonor
+from core.mixins import ConditionalGetMixin
+from core.models import BloodBank
+from core.services.geo import MAX_LIMIT, nearest, parse_point
+from donations import stats as donor_stats
+from .eligibility import RULESET, screen_questionnaires
+from .models import AppointmentSlot, Appointment, HealthQuestionnaire, SlotAvailability, SlotWaitlistEntry
 from .serializers import AppointmentSlotSerializer, AppointmentSerializer, HealthQuestionnaireSerializer
+from .services import (
+    BookingError,
+    SlotFullError,
+    book_slot,
+    cancel_appointment,
+    join_slot_waitlist,
+    leave_slot_waitlist,
+    waitlist_position,
+)
 
 
-class AppointmentSlotViewSet(viewsets.ViewSet):
+class AppointmentSlotViewSet(ConditionalGetMixin, viewsets.ViewSet):
     """
     API endpoints for appointment slot management and availability
     """
     # Allow public read access to view available slots (anonymous users should be able to browse)
     permission_classes = [permissions.AllowAny]
+    # Bookings bump the slot's updated_at, so unchanged slot lists answer 304.
+    conditional_actions = ('list', 'retrieve', 'by_city', 'upcoming')
+    
+    def get_version_querysets(self):
+        return [AppointmentSlot.objects.all()]
     
     def list(self, request):
         """List available appointment slots with filters"""
@@ -72,6 +95,108 @@ class AppointmentSlotViewSet(viewsets.ViewSet):
         
         serializer = AppointmentSlotSerializer(slots, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        One month of availability from the precomputed summaries, one entry per day.
+        Query params: month=YYYY-MM (default: current), city, blood_bank
+        """
+        month = request.query_params.get('month')
+        try:
+            first = datetime.strptime(month, '%Y-%m').date() if month else timezone.now().date().replace(day=1)
+        except ValueError:
+            return Response({'error': 'month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+        last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        
+        queryset = SlotAvailability.objects.filter(date__range=[first, last])
+        city = request.query_params.get('city')
+        if city:
+            queryset = queryset.filter(city__iexact=city)
+        blood_bank = request.query_params.get('blood_bank')
+        if blood_bank:
+            queryset = queryset.filter(blood_bank=blood_bank)
+        
+        days = queryset.values('date').annotate(
+            slots=Sum('slot_count'),
+            total_seats=Sum('total_seats'),
+            remaining_seats=Sum('remaining_seats'),
+            earliest_free_time=Min('earliest_free_time'),
+        ).order_by('date')
+        return Response({
+            'month': first.strftime('%Y-%m'),
+            'city': city or None,
+            'blood_bank': blood_bank or None,
+            'days': list(days),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Bookable slots closest to a point: lat, lon, radius (km, default 50), limit (default 20).
+        Slots carry no coordinates, so each is placed at the nearest active blood bank in
+        its city; results are ordered by that distance, then date and time.
+        """
+        try:
+            lat, lon, radius_km, limit = parse_point(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        city_distance = {}
+        for distance, bank in nearest(BloodBank.objects.filter(is_active=True), lat, lon, radius_km, MAX_LIMIT):
+            city_distance.setdefault(bank.city.strip().lower(), distance)  # Results are nearest first.
+        if not city_distance:
+            return Response([])
+        
+        slots = list(
+            AppointmentSlot.objects.annotate(city_key=Lower('city'))
+            .filter(city_key__in=city_distance, status='available', booked_donors__lt=F('max_donors'), date__gte=timezone.localdate())
+            .annotate(distance_km=Case(
+                *[When(city_key=city, then=Value(distance)) for city, distance in city_distance.items()],
+                output_field=FloatField(),
+            ))
+            .order_by('distance_km', 'date', 'start_time')[:limit]
+        )
+        return Response([
+            dict(data, distance_km=slot.distance_km)
+            for slot, data in zip(slots, AppointmentSlotSerializer(slots, many=True).data)
+        ])
+    
+    @action(detail=True, methods=['get', 'post', 'delete'], permission_classes=[permissions.IsAuthenticated])
+    def waitlist(self, request, pk=None):
+        """
+        Waitlist for a full slot: GET shows your position, POST joins, DELETE leaves.
+        When a booked donor cancels, the head of the queue is booked automatically.
+        """
+        try:
+            slot = AppointmentSlot.objects.get(pk=pk)
+        except AppointmentSlot.DoesNotExist:
+            return Response({'error': 'Slot not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.method == 'DELETE':
+            if not leave_slot_waitlist(request.user, slot):
+                return Response({'error': 'You are not on the waitlist for this slot'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        if request.method == 'POST':
+            try:
+                entry = join_slot_waitlist(request.user, slot)
+            except BookingError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            code = status.HTTP_201_CREATED
+        else:
+            entry = SlotWaitlistEntry.objects.filter(slot=slot, donor=request.user).first()
+            if entry is None:
+                return Response({'error': 'You are not on the waitlist for this slot'}, status=status.HTTP_404_NOT_FOUND)
+            code = status.HTTP_200_OK
+        
+        return Response({
+            'slot': slot.pk,
+            'status': entry.status,
+            'position': waitlist_position(entry),
+            'joined_at': entry.joined_at,
+            'appointment': entry.appointment_id,
+        }, status=code)
 
 
 class AppointmentViewSet(viewsets.ViewSet):
@@ -90,17 +215,16 @@ class AppointmentViewSet(viewsets.ViewSet):
         """Book a new appointment"""
         serializer = AppointmentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
+            fields = dict(serializer.validated_data)
+            slot = fields.pop('slot')
             try:
-                appointment = serializer.save()
-                # Increment booked donors count
-                appointment.slot.booked_donors += 1
-                if appointment.slot.booked_donors >= appointment.slot.max_donors:
-                    appointment.slot.status = 'booked'
-                appointment.slot.save()
-                
-                return Response(AppointmentSerializer(appointment).data, status=status.HTTP_201_CREATED)
-            except Exception as e:
+                # Seat is taken with a conditional UPDATE in the same transaction
+                appointment = book_slot(request.user, slot, **fields)
+            except SlotFullError as e:
+                return Response({'error': str(e), 'waitlist_available': True}, status=status.HTTP_400_BAD_REQUEST)
+            except BookingError as e:
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(AppointmentSerializer(appointment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def retrieve(self, request, pk=None):
@@ -130,16 +254,10 @@ class AppointmentViewSet(viewsets.ViewSet):
         """Cancel appointment"""
         try:
             appointment = Appointment.objects.get(pk=pk, donor=request.user)
-            if appointment.status in ['completed', 'cancelled']:
-                return Response(
-                    {'error': f'Cannot cancel a {appointment.status} appointment'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            appointment.status = 'cancelled'
-            appointment.slot.booked_donors -= 1
-            appointment.slot.status = 'available'
-            appointment.slot.save()
-            appointment.save()
+            try:
+                cancel_appointment(appointment)
+            except BookingError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             return Response(AppointmentSerializer(appointment).data)
         except Appointment.DoesNotExist:
             return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -151,12 +269,17 @@ class AppointmentViewSet(viewsets.ViewSet):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            appointment = Appointment.objects.get(pk=pk)
-            appointment.status = 'completed'
-            appointment.donation_completed = True
-            appointment.completed_at = timezone.now()
-            appointment.units_donated = request.data.get('units_donated', 1)
-            appointment.save()
+            with transaction.atomic():
+                # Locked, so of two concurrent completes only the first counts the donation.
+                appointment = Appointment.objects.select_for_update().get(pk=pk)
+                already_completed = appointment.donation_completed
+                appointment.status = 'completed'
+                appointment.donation_completed = True
+                appointment.completed_at = appointment.completed_at or timezone.now()
+                appointment.units_donated = request.data.get('units_donated', 1)
+                appointment.save()
+                if not already_completed:
+                    donor_stats.donation_completed(appointment.donor_id, appointment.completed_at)
             return Response(AppointmentSerializer(appointment).data)
         except Appointment.DoesNotExist:
             return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -197,3 +320,65 @@ class HealthQuestionnaireView(APIView):
         except (Appointment.DoesNotExist, HealthQuestionnaire.DoesNotExist):
             return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
+
+
+class EligibilityCheckView(APIView):
+    """
+    Evaluate one set of questionnaire answers against the shared rules table.
+    Public: the eligibility checker page posts here. Body: {"has_fever": false, ...}
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        """The questions the checker page asks, in order"""
+        return Response({'questions': RULESET.questions()})
+    
+    def post(self, request):
+        try:
+            result = RULESET.evaluate(request.data)
+        except (TypeError, ValueError) as e:
+            return Response({'error': f'Invalid answer: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+
+class EligibilityScreeningView(APIView):
+    """
+    Batch screening for drive days (staff/admin).
+    Body: {"questionnaire_ids": [...], "save": false} to evaluate stored questionnaires, or
+    {"answers": [{"ref": "A1", "has_fever": false, ...}, ...]} for ad-hoc answer sets.
+    """
+    permission_classes = [IsAdminRole]
+    
+    def post(self, request):
+        limit = getattr(settings, "VEINLINE_SCREENING_BATCH_LIMIT", 5000)
+        ids = request.data.get('questionnaire_ids')
+        answers = request.data.get('answers')
+        batch = ids if ids is not None else answers
+        if not isinstance(batch, list) or not batch:
+            return Response({'error': 'Provide a non-empty questionnaire_ids or answers list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(batch) > limit:
+            return Response({'error': f'At most {limit} questionnaires per request'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if ids is not None:
+            try:
+                ids = [int(pk) for pk in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'questionnaire_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+            results = screen_questionnaires(ids, save=request.data.get('save') in (True, 'true', '1', 1))
+        else:
+            if not all(isinstance(row, dict) for row in answers):
+                return Response({'error': 'answers must be a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+            today = timezone.localdate()
+            results = []
+            for i, row in enumerate(answers):
+                try:
+                    result = RULESET.evaluate(row, today)
+                except (TypeError, ValueError) as e:
+                    return Response({'error': f'Invalid answer in row {i}: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+                results.append(dict(result.as_dict(), ref=row.get('ref', i)))
+        
+        return Response({
+            'count': len(results),
+            'eligible': sum(1 for r in results if r['eligible']),
+            'results': results,
+        })
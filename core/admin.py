@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import BloodGroupCompatibility
+from .models import BloodBank, BloodBankHours, BloodGroupCompatibility
 
 
 @admin.register(BloodGroupCompatibility)
@@ -8,3 +8,16 @@ class BloodGroupCompatibilityAdmin(admin.ModelAdmin):
     list_display = ("donor_group", "recipient_group", "is_compatible")
     list_filter = ("donor_group", "recipient_group", "is_compatible")
     search_fields = ("donor_group", "recipient_group")
+
+
+class BloodBankHoursInline(admin.TabularInline):
+    model = BloodBankHours
+    extra = 0
+
+
+@admin.register(BloodBank)
+class BloodBankAdmin(admin.ModelAdmin):
+    list_display = ("name", "city", "timezone", "opening_time", "closing_time", "is_active")
+    list_filter = ("city", "is_active", "timezone")
+    search_fields = ("name", "city")
+    inlines = [BloodBankHoursInline]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from django.db import models
+
 
 class BloodGroup:
     """
@@ -28,3 +30,10 @@ class BloodGroup:
     )
 
 
+class WaitlistStatus(models.TextChoices):
+    """State of a FIFO waitlist entry (appointment slots and donation drives)."""
+
+    WAITING = "waiting", "Waiting"
+    PROMOTED = "promoted", "Promoted"
+    LEFT = "left", "Left Waitlist"
+    SKIPPED = "skipped", "Skipped"
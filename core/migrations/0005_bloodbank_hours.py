@@ -0,0 +1,80 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:55
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def week_intervals(weekly):
+    # A frozen copy of core.services.hours.week_intervals as of this migration.
+    intervals = []
+    for day, opens_at, closes_at in weekly:
+        opens = opens_at.hour * 60 + opens_at.minute
+        closes = closes_at.hour * 60 + closes_at.minute
+        start = day * MINUTES_PER_DAY + opens
+        end = start + ((closes - opens) % MINUTES_PER_DAY or MINUTES_PER_DAY)
+        if end <= MINUTES_PER_WEEK:
+            intervals.append((start, end))
+        else:  # Sunday night into Monday morning.
+            intervals.append((start, MINUTES_PER_WEEK))
+            intervals.append((0, end - MINUTES_PER_WEEK))
+    return intervals
+
+
+def build_open_intervals(apps, schema_editor):
+    # Existing banks only have daily opening/closing times yet.
+    BloodBank = apps.get_model("core", "BloodBank")
+    BloodBankOpenInterval = apps.get_model("core", "BloodBankOpenInterval")
+    BloodBankOpenInterval.objects.bulk_create(
+        [
+            BloodBankOpenInterval(bank_id=bank.pk, timezone=bank.timezone, start_minute=start, end_minute=end)
+            for bank in BloodBank.objects.filter(is_active=True)
+            for start, end in week_intervals((day, bank.opening_time, bank.closing_time) for day in range(7))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rename_core_bloodbank_city_is_active_idx_core_bloodb_city_e3e83e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodbank',
+            name='timezone',
+            field=models.CharField(default=core.models.default_bank_timezone, max_length=64, validators=[core.models.validate_timezone]),
+        ),
+        migrations.CreateModel(
+            name='BloodBankHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('opens_at', models.TimeField()),
+                ('closes_at', models.TimeField()),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_hours', to='core.bloodbank')),
+            ],
+            options={
+                'ordering': ['bank', 'day_of_week', 'opens_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BloodBankOpenInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timezone', models.CharField(max_length=64)),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_intervals', to='core.bloodbank')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['timezone', 'start_minute', 'end_minute'], name='bloodbank_open_idx')],
+            },
+        ),
+        migrations.RunPython(build_open_intervals, migrations.RunPython.noop),
+    ]
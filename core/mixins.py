@@ -0,0 +1,128 @@
+"""
+Conditional GET for read-mostly DRF endpoints.
+
+`ConditionalGetMixin` gives the view's GET actions a strong ETag derived from a
+cheap version of the underlying data, never from the rendered body:
+
+* `MAX(updated_at)` and `COUNT(*)` of the view's version querysets (one aggregate
+  query each), or
+* a cache counter named by `conditional_version_key`, bumped with `bump_version()`
+  from signals, for tables without `updated_at`.
+
+The ETag also covers the view, action, full path (query string included), the user
+and today's date, so filtered, per-user and date-relative lists get their own tags.
+A request whose `If-None-Match` matches gets an empty 304 right after the
+permission checks, before the handler runs its queryset or serializers.
+
+Counters live in the default cache, which must be shared by all workers (redis or
+memcached) for a bump to reach them at once. They expire after
+`VEINLINE_ETAG_VERSION_TTL_SECONDS` and restart from a fresh value, so with a
+per-process cache (locmem) a worker that missed a bump serves stale 304s for at
+most that long.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = "Not modified."
+
+
+def _counter_seconds() -> int:
+    return getattr(settings, "VEINLINE_ETAG_VERSION_TTL_SECONDS", 300)
+
+
+def bump_version(key: str) -> None:
+    """Invalidate every ETag built from the counter `key`."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing (first bump, expired, or the cache was flushed): restart from a fresh
+        # value so tags issued before can never match again.
+        cache.set(key, time.time_ns(), _counter_seconds())
+
+
+def _counter(key: str) -> int:
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), _counter_seconds())
+        value = cache.get(key)
+    return value
+
+
+class ConditionalGetMixin:
+    conditional_actions: tuple[str, ...] = ("list", "retrieve")
+    conditional_version_key: str | None = None
+
+    def get_version_querysets(self):
+        """Querysets whose MAX(updated_at)/COUNT version the responses (default: get_queryset())."""
+        return [self.get_queryset()]
+
+    def get_version_extra(self) -> str:
+        """Anything else a response depends on (e.g. the clock), mixed into the ETag."""
+        return ""
+
+    def _data_version(self) -> tuple[list, object]:
+        if self.conditional_version_key:
+            return [_counter(self.conditional_version_key)], None
+        parts, last_modified = [], None
+        for queryset in self.get_version_querysets():
+            row = queryset.order_by().aggregate(modified=Max("updated_at"), count=Count("pk"))
+            parts.append((row["modified"].isoformat() if row["modified"] else "", row["count"]))
+            if row["modified"] and (last_modified is None or row["modified"] > last_modified):
+                last_modified = row["modified"]
+        return parts, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional = None
+        if request.method not in ("GET", "HEAD") or getattr(self, "action", None) not in self.conditional_actions:
+            return
+
+        parts, last_modified = self._data_version()
+        key = repr((
+            type(self).__name__,
+            self.action,
+            request.get_full_path(),
+            request.user.pk,
+            timezone.localdate().isoformat(),
+            parts,
+            self.get_version_extra(),
+        ))
+        etag = quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+        self._conditional = (etag, last_modified)
+
+        client_tags = parse_etags(request.headers.get("If-None-Match", ""))
+        if "*" in client_tags or etag.strip('"') in {tag.removeprefix("W/").strip('"') for tag in client_tags}:
+            raise NotModified()
+
+    def _conditional_headers(self, response):
+        etag, last_modified = self._conditional
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return self._conditional_headers(Response(status=status.HTTP_304_NOT_MODIFIED))
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "_conditional", None) and response.status_code == status.HTTP_200_OK:
+            self._conditional_headers(response)
+        return response
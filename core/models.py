@@ -1,8 +1,23 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 
 from .constants import BloodGroup
 
 
+def default_bank_timezone() -> str:
+    return getattr(settings, "VEINLINE_DEFAULT_BANK_TIMEZONE", "Asia/Kolkata")
+
+
+def validate_timezone(value: str) -> None:
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f"Unknown timezone: {value}")
+
+
 class BloodGroupCompatibility(models.Model):
     """
     Rule-based compatibility table: donor blood group -> recipient blood group.
@@ -37,9 +52,10 @@ class BloodBank(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     
-    # Operating hours
+    # Operating hours (local to `timezone`); used every day unless weekly hours are set
     opening_time = models.TimeField(default="08:00")
     closing_time = models.TimeField(default="18:00")
+    timezone = models.CharField(max_length=64, default=default_bank_timezone, validators=[validate_timezone])
     
     # Info
     description = models.TextField(blank=True)
@@ -63,9 +79,58 @@ class BloodBank(models.Model):
     def __str__(self) -> str:
         return f"{self.name} - {self.city}"
     
-    def is_open(self):
-        """Check if blood bank is currently open"""
+    def is_open(self, at=None):
+        """Check if blood bank is open now (or at the aware datetime `at`) in its own timezone"""
         from django.utils import timezone
-        now = timezone.now().time()
-        return self.opening_time <= now <= self.closing_time
+        from .services.hours import local_minute_of_week
+        
+        minute = local_minute_of_week(self.timezone, at or timezone.now())
+        if minute is None:
+            return False
+        return self.open_intervals.filter(start_minute__lte=minute, end_minute__gt=minute).exists()
+
+
+class BloodBankHours(models.Model):
+    """Weekly opening hours; closing at or before opening means open overnight"""
+    
+    DAY_OF_WEEK = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    
+    bank = models.ForeignKey(BloodBank, on_delete=models.CASCADE, related_name="weekly_hours")
+    day_of_week = models.PositiveSmallIntegerField(choices=DAY_OF_WEEK)
+    opens_at = models.TimeField()
+    closes_at = models.TimeField()
+    
+    class Meta:
+        ordering = ['bank', 'day_of_week', 'opens_at']
+    
+    def __str__(self) -> str:
+        return f"{self.bank.name} - {self.get_day_of_week_display()} {self.opens_at}-{self.closes_at}"
+
+
+class BloodBankOpenInterval(models.Model):
+    """
+    Derived index of when a bank is open: [start_minute, end_minute) in local
+    minutes-of-week (Monday 00:00 = 0). Rebuilt by core.services.hours, never edited.
+    """
+    
+    bank = models.ForeignKey(BloodBank, on_delete=models.CASCADE, related_name="open_intervals")
+    timezone = models.CharField(max_length=64)
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['timezone', 'start_minute', 'end_minute'], name='bloodbank_open_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.bank_id}: {self.start_minute}-{self.end_minute} ({self.timezone})"
 
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from .models import BloodGroupCompatibility, BloodBank
+from .models import BloodGroupCompatibility, BloodBank, BloodBankHours
+from .services.hours import open_bank_ids
 
 
 class BloodGroupCompatibilitySerializer(serializers.ModelSerializer):
@@ -9,8 +10,15 @@ class BloodGroupCompatibilitySerializer(serializers.ModelSerializer):
         fields = ["id", "donor_group", "recipient_group", "is_compatible"]
 
 
+class BloodBankHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BloodBankHours
+        fields = ['day_of_week', 'opens_at', 'closes_at']
+
+
 class BloodBankSerializer(serializers.ModelSerializer):
     is_open = serializers.SerializerMethodField()
+    weekly_hours = BloodBankHoursSerializer(many=True, read_only=True)
     
     class Meta:
         model = BloodBank
@@ -25,6 +33,8 @@ class BloodBankSerializer(serializers.ModelSerializer):
             'longitude',
             'opening_time',
             'closing_time',
+            'timezone',
+            'weekly_hours',
             'is_open',
             'description',
             'website',
@@ -35,4 +45,7 @@ class BloodBankSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_open']
     
     def get_is_open(self, obj):
-        return obj.is_open()
+        # One (per-minute cached) lookup shared by every bank in the response.
+        if 'open_bank_ids' not in self.context:
+            self.context['open_bank_ids'] = open_bank_ids()
+        return obj.pk in self.context['open_bank_ids']
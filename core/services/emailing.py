@@ -2,10 +2,11 @@ from django.conf import settings
 from django.core.mail import send_mail
 
 
-def send_fallback_email(to_email: str, subject: str, message: str) -> int:
+def send_fallback_email(to_email: str, subject: str, message: str, connection=None) -> int:
     """
     Backup notification channel.
     In development we default to console email backend.
+    Pass an open `connection` (django.core.mail.get_connection) to send many over one session.
     """
 
     if not to_email:
@@ -16,6 +17,7 @@ def send_fallback_email(to_email: str, subject: str, message: str) -> int:
         from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
         recipient_list=[to_email],
         fail_silently=True,
+        connection=connection,
     )
 
 
@@ -0,0 +1,115 @@
+"""
+Nearby search over models with latitude/longitude columns.
+
+1. A bounding box around the point turns the radius into plain range filters, which
+   the (latitude, longitude) index serves, so only rows near the point are read.
+2. Only (pk, lat, lon) tuples are fetched; great-circle distances are computed on
+   those with the trig for the centre precomputed once.
+3. `heapq.nsmallest` keeps the `limit` closest (O(n log k)), and just those rows are
+   loaded as model instances with one `in_bulk` query.
+
+Cost therefore grows with the number of rows inside the box, not with the table.
+"""
+from __future__ import annotations
+
+import heapq
+from math import asin, cos, pi, radians, sin, sqrt
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = EARTH_RADIUS_KM * pi / 180
+MAX_RADIUS_KM = 500.0
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in km"""
+
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float, lat_field: str = "latitude", lon_field: str = "longitude") -> Q:
+    """Range filter containing every point within `radius_km` of (lat, lon)."""
+
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    box = Q(**{f"{lat_field}__gte": max(-90.0, lat - dlat), f"{lat_field}__lte": min(90.0, lat + dlat)})
+    if abs(lat) + dlat >= 90.0:
+        return box  # The circle reaches a pole: every longitude is in range.
+
+    dlon = dlat / cos(radians(abs(lat) + dlat))
+    if dlon >= 180.0:
+        return box
+    west, east = lon - dlon, lon + dlon
+    if west < -180.0:  # Crosses the antimeridian.
+        return box & (Q(**{f"{lon_field}__gte": west + 360.0}) | Q(**{f"{lon_field}__lte": east}))
+    if east > 180.0:
+        return box & (Q(**{f"{lon_field}__gte": west}) | Q(**{f"{lon_field}__lte": east - 360.0}))
+    return box & Q(**{f"{lon_field}__gte": west, f"{lon_field}__lte": east})
+
+
+def nearest(
+    queryset,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int = DEFAULT_LIMIT,
+    lat_field: str = "latitude",
+    lon_field: str = "longitude",
+) -> list[tuple[float, object]]:
+    """
+    The `limit` rows of `queryset` closest to (lat, lon) within `radius_km`, as
+    (distance_km, instance) pairs sorted by distance.
+    """
+
+    candidates = (
+        queryset.filter(bounding_box(lat, lon, radius_km, lat_field, lon_field))
+        .exclude(**{f"{lat_field}__isnull": True})
+        .exclude(**{f"{lon_field}__isnull": True})
+        .values_list("pk", lat_field, lon_field)
+        .order_by()
+    )
+
+    lat0, lon0 = radians(lat), radians(lon)
+    cos_lat0 = cos(lat0)
+
+    def within():
+        for pk, row_lat, row_lon in candidates.iterator(chunk_size=2000):
+            lat1, lon1 = radians(float(row_lat)), radians(float(row_lon))
+            a = sin((lat1 - lat0) / 2) ** 2 + cos_lat0 * cos(lat1) * sin((lon1 - lon0) / 2) ** 2
+            distance = 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, a)))
+            if distance <= radius_km:
+                yield distance, pk
+
+    closest = heapq.nsmallest(limit, within())
+    objects = queryset.in_bulk([pk for _, pk in closest])
+    return [(round(distance, 2), objects[pk]) for distance, pk in closest if pk in objects]
+
+
+def with_distances(serializer_class, results, **kwargs) -> list[dict]:
+    """Serialize (distance_km, instance) pairs, adding `distance_km` to each item."""
+
+    data = serializer_class([obj for _, obj in results], many=True, **kwargs).data
+    return [dict(item, distance_km=distance) for (distance, _), item in zip(results, data)]
+
+
+def parse_point(params) -> tuple[float, float, float, int]:
+    """
+    (lat, lon, radius_km, limit) from query params `lat`, `lon`, `radius` (km, default
+    50) and `limit`, clamped to sane bounds. Raises ValueError on bad input.
+    """
+
+    if not params.get("lat") or not params.get("lon"):
+        raise ValueError("lat and lon parameters required")
+    try:
+        lat, lon = float(params["lat"]), float(params["lon"])
+        radius_km = float(params.get("radius", 50))
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid coordinates")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0) or not radius_km >= 0:
+        raise ValueError("Invalid coordinates")
+    return lat, lon, min(MAX_RADIUS_KM, radius_km), min(MAX_LIMIT, max(1, limit))
@@ -0,0 +1,133 @@
+"""
+Blood bank opening hours as a minutes-of-week interval index.
+
+Each bank's weekly hours (its `BloodBankHours` rows, or `opening_time`-`closing_time`
+every day when it has none) are expanded once, on save, into `BloodBankOpenInterval`
+rows of local minutes-of-week: `[start_minute, end_minute)` with Monday 00:00 = 0.
+Hours that close at or before they open run overnight into the next day (equal
+times mean open 24 hours), and intervals running past Sunday midnight are split
+in two.
+
+Intervals are local to the bank's timezone, so they stay right across DST changes.
+"Open at T" converts T to each timezone in use (a handful) and is one indexed range
+query over the intervals. The result for a given minute is cached.
+"""
+from __future__ import annotations
+
+from datetime import datetime, time
+from typing import Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+CACHE_SECONDS = 60
+VERSION_KEY = "bloodbanks:hours-version"
+
+
+def minute_of_week(local: datetime) -> int:
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def week_intervals(weekly: Iterable[tuple[int, time, time]]) -> list[tuple[int, int]]:
+    """[start, end) minutes-of-week for (day_of_week, opens_at, closes_at) entries."""
+
+    intervals = []
+    for day, opens_at, closes_at in weekly:
+        start = day * MINUTES_PER_DAY + _minute_of_day(opens_at)
+        length = (_minute_of_day(closes_at) - _minute_of_day(opens_at)) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        end = start + length
+        if end <= MINUTES_PER_WEEK:
+            intervals.append((start, end))
+        else:  # Sunday night into Monday morning.
+            intervals.append((start, MINUTES_PER_WEEK))
+            intervals.append((0, end - MINUTES_PER_WEEK))
+    return intervals
+
+
+def bank_week(bank) -> list[tuple[int, time, time]]:
+    """A bank's weekly hours; banks without weekly hours are open the same hours every day."""
+
+    weekly = [(h.day_of_week, h.opens_at, h.closes_at) for h in bank.weekly_hours.all()]
+    if weekly:
+        return weekly
+    return [(day, _as_time(bank.opening_time), _as_time(bank.closing_time)) for day in range(7)]
+
+
+def _as_time(value) -> time:
+    return time.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild_open_intervals(bank_ids: Iterable[int]) -> int:
+    """Re-expand the intervals of these banks (inactive banks get none). Returns rows written."""
+
+    from core.models import BloodBank, BloodBankOpenInterval
+
+    bank_ids = list(bank_ids)
+    banks = BloodBank.objects.filter(pk__in=bank_ids, is_active=True).prefetch_related("weekly_hours")
+    rows = [
+        BloodBankOpenInterval(bank_id=bank.pk, timezone=bank.timezone, start_minute=start, end_minute=end)
+        for bank in banks
+        for start, end in week_intervals(bank_week(bank))
+    ]
+    # Readers never see a bank with its old intervals gone and the new ones missing.
+    with transaction.atomic():
+        BloodBankOpenInterval.objects.filter(bank_id__in=bank_ids).delete()
+        BloodBankOpenInterval.objects.bulk_create(rows, batch_size=1000)
+    # New version: every cached "open at" answer is dropped at once.
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    return len(rows)
+
+
+def _zones(version) -> list[str]:
+    from core.models import BloodBankOpenInterval
+
+    key = f"bloodbanks:zones:{version}"
+    zones = cache.get(key)
+    if zones is None:
+        zones = sorted(set(BloodBankOpenInterval.objects.values_list("timezone", flat=True).distinct()))
+        # Expires like the answers: the version is only bumped in the process that saved.
+        cache.set(key, zones, CACHE_SECONDS)
+    return zones
+
+
+def local_minute_of_week(zone: str, at: datetime) -> int | None:
+    try:
+        return minute_of_week(at.astimezone(ZoneInfo(zone)))
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def open_bank_ids(at: datetime | None = None) -> frozenset[int]:
+    """Ids of active banks open at `at` (aware; default now), cached per minute."""
+
+    at = (at or timezone.now()).replace(second=0, microsecond=0)
+    version = cache.get(VERSION_KEY, 0)
+    key = f"bloodbanks:open:{version}:{at.astimezone(ZoneInfo('UTC')):%Y%m%d%H%M}"
+    ids = cache.get(key)
+    if ids is not None:
+        return ids
+
+    from core.models import BloodBankOpenInterval
+
+    query = Q()
+    for zone in _zones(version):
+        minute = local_minute_of_week(zone, at)
+        if minute is not None:
+            query |= Q(timezone=zone, start_minute__lte=minute, end_minute__gt=minute)
+    ids = frozenset(
+        BloodBankOpenInterval.objects.filter(query).values_list("bank_id", flat=True).distinct()
+    ) if query else frozenset()
+    cache.set(key, ids, CACHE_SECONDS)
+    return ids
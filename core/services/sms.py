@@ -12,14 +12,17 @@ class SMSDeliveryError(Exception):
     pass
 
 
-def send_sms(phone_e164: str, message: str) -> dict:
+def send_sms(phone_e164: str, message: str, session: requests.Session | None = None) -> dict:
     """
     Sends an SMS using the configured provider.
 
     This contains real HTTP calls, but requires a valid API key in `.env`.
     In development, you can keep the key empty; the function will log and no-op.
+    Pass a `requests.Session` when sending many messages to reuse its connections.
     """
 
+    http = session or requests
+
     api_key = getattr(settings, "VEINLINE_SMS_API_KEY", "")
     provider = getattr(settings, "VEINLINE_SMS_PROVIDER", "fast2sms")
 
@@ -43,7 +46,7 @@ def send_sms(phone_e164: str, message: str) -> dict:
                 "message": message,
                 "sender_id": getattr(settings, "VEINLINE_SMS_SENDER", "VEINLN"),
             }
-            resp = requests.post(url, data=payload, headers=headers, timeout=20)
+            resp = http.post(url, data=payload, headers=headers, timeout=20)
         elif provider == "textlocal":
             # Textlocal API
             url = "https://api.textlocal.in/send/"
@@ -53,7 +56,7 @@ def send_sms(phone_e164: str, message: str) -> dict:
                 "message": message,
                 "sender": getattr(settings, "VEINLINE_SMS_SENDER", "VEINLN"),
             }
-            resp = requests.post(url, data=payload, timeout=20)
+            resp = http.post(url, data=payload, timeout=20)
         else:
             error_msg = f"Unsupported SMS_PROVIDER: {provider}"
             logger.error(error_msg)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .mixins import bump_version
+from .models import BloodBank, BloodBankHours, BloodGroupCompatibility
+from .services.hours import rebuild_open_intervals
+
+COMPATIBILITY_VERSION_KEY = "core:compatibility-version"
+
+
+@receiver(post_save, sender=BloodBank)
+def bank_saved(sender, instance, raw=False, **kwargs):
+    # Timezone, default hours or is_active may have changed; re-expand the bank's index.
+    if not raw:
+        rebuild_open_intervals([instance.pk])
+
+
+@receiver(post_save, sender=BloodBankHours)
+@receiver(post_delete, sender=BloodBankHours)
+def bank_hours_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rebuild_open_intervals([instance.bank_id])
+        # Hours are part of the bank's API representation (and its ETag version).
+        BloodBank.objects.filter(pk=instance.bank_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=BloodGroupCompatibility)
+@receiver(post_delete, sender=BloodGroupCompatibility)
+def compatibility_changed(sender, **kwargs):
+    bump_version(COMPATIBILITY_VERSION_KEY)
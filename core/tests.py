@@ -1,3 +1,100 @@
+from datetime import datetime, time, timezone
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import BloodBank, BloodBankHours, BloodGroupCompatibility
+from .services.geo import haversine_km, nearest
+from .services.hours import open_bank_ids, week_intervals
+from .signals import COMPATIBILITY_VERSION_KEY
+
+
+def _bank(name, lat, lon, **fields):
+    return BloodBank.objects.create(name=name, city=name, address="-", latitude=lat, longitude=lon, **fields)
+
+
+class NearestBloodBankTests(TestCase):
+    def test_radius_limit_order_and_antimeridian(self):
+        _bank("Pune", 18.5204, 73.8567)
+        _bank("Pimpri", 18.6298, 73.7997)
+        _bank("Mumbai", 19.0760, 72.8777)
+        _bank("Closed", 18.5210, 73.8570, is_active=False)
+        _bank("Suva", -18.1416, 178.4419)
+        _bank("Apia", -13.8333, -171.7500)
+
+        active = BloodBank.objects.filter(is_active=True)
+        found = nearest(active, 18.52, 73.85, radius_km=200)
+        self.assertEqual([bank.name for _, bank in found], ["Pune", "Pimpri", "Mumbai"])
+        self.assertEqual([bank.name for _, bank in nearest(active, 18.52, 73.85, 200, limit=1)], ["Pune"])
+        self.assertEqual(nearest(active, 18.52, 73.85, radius_km=5)[0][0], round(haversine_km(18.52, 73.85, 18.5204, 73.8567), 2))
+
+        # A 1200 km circle around Suva crosses 180°; Apia (at -171.75) is ~1150 km away.
+        self.assertEqual([bank.name for _, bank in nearest(active, -18.1416, 178.4419, 1200)], ["Suva", "Apia"])
+
+
+class OpenHoursTests(TestCase):
+    def test_local_timezones_and_overnight_hours(self):
+        pune = _bank("Pune", 18.52, 73.85, timezone="Asia/Kolkata")  # 08:00-18:00 daily
+        night = _bank("Night", 40.71, -74.0, timezone="America/New_York")
+        BloodBankHours.objects.create(bank=night, day_of_week=6, opens_at=time(22), closes_at=time(6))  # Sun -> Mon
+
+        self.assertEqual(week_intervals([(6, time(22), time(6))]), [(9960, 10080), (0, 360)])
+
+        # Monday 2026-03-02 04:00 UTC = 09:30 in Pune, 23:00 Sunday in New York (EST).
+        monday = datetime(2026, 3, 2, 4, 0, tzinfo=timezone.utc)
+        self.assertEqual(open_bank_ids(monday), {pune.pk, night.pk})
+        # 10:00 UTC = 15:30 Pune, 05:00 Monday New York: still inside the overnight shift.
+        self.assertEqual(open_bank_ids(monday.replace(hour=10)), {pune.pk, night.pk})
+        # 13:00 UTC = 18:30 Pune (closed), 08:00 New York (closed).
+        self.assertEqual(open_bank_ids(monday.replace(hour=13)), set())
+        self.assertTrue(night.is_open(monday))
+        self.assertFalse(pune.is_open(monday.replace(hour=13)))
+
+        response = APIClient().get(
+            "/api/blood-banks/open_now/", {"at": "2026-03-02T10:00:00+00:00"}, SERVER_NAME="localhost"
+        )
+        self.assertEqual(sorted(bank["name"] for bank in response.data), ["Night", "Pune"])
+        self.assertTrue(all(bank["is_open"] for bank in response.data))
+        for at in ("tomorrow", "2026-13-40T10:00"):
+            response = APIClient().get("/api/blood-banks/open_now/", {"at": at}, SERVER_NAME="localhost")
+            self.assertEqual(response.status_code, 400)
+
+        night.is_active = False
+        night.save()
+        self.assertEqual(open_bank_ids(monday), {pune.pk})
+
+
+class ConditionalGetTests(TestCase):
+    def get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return APIClient().get(url, SERVER_NAME="localhost", **headers)
+
+    def test_matching_etag_answers_304_without_running_the_view(self):
+        first = self.get("/api/compatibility/")
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = self.get("/api/compatibility/", first["ETag"])
+        self.assertEqual((cached.status_code, cached.content, cached["ETag"]), (304, b"", first["ETag"]))
+
+        rule = BloodGroupCompatibility.objects.first()
+        rule.is_compatible = not rule.is_compatible
+        rule.save()
+        self.assertEqual(self.get("/api/compatibility/", first["ETag"]).status_code, 200)
+
+    def test_expired_counter_restarts_and_invalidates_old_tags(self):
+        first = self.get("/api/compatibility/")
+        cache.delete(COMPATIBILITY_VERSION_KEY)  # As when the counter's TTL runs out.
+        second = self.get("/api/compatibility/", first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_bank_list_version_follows_updates(self):
+        bank = _bank("Pune", 18.52, 73.85)
+        first = self.get("/api/blood-banks/")
+        self.assertIn("Last-Modified", first)
+        self.assertEqual(self.get("/api/blood-banks/", first["ETag"]).status_code, 304)
+        self.assertEqual(self.get("/api/blood-banks/?city=Pune", first["ETag"]).status_code, 200)
 
-# Create your tests here.
+        BloodBankHours.objects.create(bank=bank, day_of_week=0, opens_at=time(9), closes_at=time(12))
+        self.assertEqual(self.get("/api/blood-banks/", first["ETag"]).status_code, 200)
@@ -1,38 +1,57 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import permissions, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .mixins import ConditionalGetMixin
 from .models import BloodGroupCompatibility, BloodBank
+from .services.geo import nearest, parse_point, with_distances
+from .services.hours import open_bank_ids
+from .signals import COMPATIBILITY_VERSION_KEY
 from .serializers import BloodGroupCompatibilitySerializer, BloodBankSerializer
 
 
-class BloodGroupCompatibilityViewSet(viewsets.ReadOnlyModelViewSet):
+class BloodGroupCompatibilityViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Public read endpoint so clients can understand compatibility rules.
     Admins can manage full table in Django admin.
     """
+    conditional_version_key = COMPATIBILITY_VERSION_KEY
 
     queryset = BloodGroupCompatibility.objects.all().order_by("donor_group", "recipient_group")
     serializer_class = BloodGroupCompatibilitySerializer
     permission_classes = [permissions.AllowAny]
 
 
-class BloodBankViewSet(viewsets.ViewSet):
+def _banks():
+    return BloodBank.objects.filter(is_active=True).prefetch_related('weekly_hours')
+
+
+class BloodBankViewSet(ConditionalGetMixin, viewsets.ViewSet):
     """
     API endpoints for finding blood banks and donation centers
     """
     permission_classes = [permissions.AllowAny]
+    conditional_actions = ('list', 'retrieve', 'by_city', 'nearby', 'open_now')
+    
+    def get_version_querysets(self):
+        return [BloodBank.objects.all()]
+    
+    def get_version_extra(self):
+        # is_open changes with the clock: the set of banks open this minute is part of the version.
+        return ','.join(map(str, sorted(open_bank_ids())))
     
     def list(self, request):
         """Get all active blood banks"""
-        banks = BloodBank.objects.filter(is_active=True).order_by('city', 'name')
+        banks = _banks().order_by('city', 'name')
         serializer = BloodBankSerializer(banks, many=True)
         return Response(serializer.data)
     
     def retrieve(self, request, pk=None):
         """Get specific blood bank details"""
         try:
-            bank = BloodBank.objects.get(pk=pk, is_active=True)
+            bank = _banks().get(pk=pk)
             serializer = BloodBankSerializer(bank)
             return Response(serializer.data)
         except BloodBank.DoesNotExist:
@@ -45,73 +64,42 @@ class BloodBankViewSet(viewsets.ViewSet):
         if not city:
             return Response({'error': 'city parameter required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        banks = BloodBank.objects.filter(city__iexact=city, is_active=True)
+        banks = _banks().filter(city__iexact=city)
         serializer = BloodBankSerializer(banks, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def nearby(self, request):
-        """Find nearby blood banks using coordinates"""
-        lat = request.query_params.get('lat')
-        lon = request.query_params.get('lon')
-        radius_km = float(request.query_params.get('radius', 50))
-        
-        if not lat or not lon:
-            return Response(
-                {'error': 'lat and lon parameters required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
+        """
+        Closest active blood banks: lat, lon, radius (km, default 50), limit (default 20).
+        Each result carries distance_km; results are sorted nearest first.
+        """
         try:
-            from django.db.models import F
-            from math import asin, cos, radians, sin, sqrt
-            
-            lat, lon = float(lat), float(lon)
-            
-            # Haversine formula to calculate distance
-            banks = BloodBank.objects.filter(is_active=True)
-            results = []
-            
-            for bank in banks:
-                # Simple distance calculation
-                distance = calculate_distance(lat, lon, float(bank.latitude), float(bank.longitude))
-                if distance <= radius_km:
-                    results.append((distance, bank))
-            
-            # Sort by distance
-            results.sort(key=lambda x: x[0])
-            banks_sorted = [bank for _, bank in results]
-            
-            serializer = BloodBankSerializer(banks_sorted, many=True)
-            return Response(serializer.data)
-        except (ValueError, TypeError):
-            return Response({'error': 'Invalid coordinates'}, status=status.HTTP_400_BAD_REQUEST)
+            lat, lon, radius_km, limit = parse_point(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = nearest(_banks(), lat, lon, radius_km, limit)
+        return Response(with_distances(BloodBankSerializer, results))
     
     @action(detail=False, methods=['get'])
     def open_now(self, request):
-        """Get blood banks currently open"""
-        from django.utils import timezone
-        
-        now = timezone.now().time()
-        banks = BloodBank.objects.filter(
-            is_active=True,
-            opening_time__lte=now,
-            closing_time__gte=now
-        )
+        """
+        Blood banks open now, each in its own timezone, or at ?at=<ISO datetime>
+        (naive values are read in the server timezone). Overnight hours are handled.
+        """
+        at = None
+        if request.query_params.get('at'):
+            try:
+                at = parse_datetime(request.query_params['at'])
+            except ValueError:  # Well formed but impossible, e.g. month 13.
+                at = None
+            if at is None:
+                return Response({'error': 'Invalid at parameter. Use ISO 8601'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
         
-        serializer = BloodBankSerializer(banks, many=True)
+        ids = open_bank_ids(at)
+        banks = _banks().filter(pk__in=ids)
+        serializer = BloodBankSerializer(banks, many=True, context={'open_bank_ids': ids})
         return Response(serializer.data)
-
-
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two coordinates in km (Haversine formula)"""
-    from math import asin, cos, radians, sin, sqrt
-    
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    km = 6371 * c
-    return km
-
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import BloodBankInventory, DonorDetails
+from .models import BloodBankInventory, DonorDetails, InventoryForecast
 
 
 @admin.register(DonorDetails)
@@ -12,6 +12,13 @@ class DonorDetailsAdmin(admin.ModelAdmin):
 
 @admin.register(BloodBankInventory)
 class BloodBankInventoryAdmin(admin.ModelAdmin):
-    list_display = ("city", "blood_group", "units_available", "updated_at")
+    list_display = ("city", "blood_group", "units_available", "version", "updated_at")
     list_filter = ("city", "blood_group")
     search_fields = ("city",)
+
+
+@admin.register(InventoryForecast)
+class InventoryForecastAdmin(admin.ModelAdmin):
+    list_display = ("city", "blood_group", "units_available", "daily_demand", "days_of_cover", "shortage_expected", "computed_at")
+    list_filter = ("shortage_expected", "blood_group", "city")
+    search_fields = ("city",)
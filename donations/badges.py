@@ -0,0 +1,105 @@
+"""
+Set-based badge engine.
+
+Every badge is a predicate over `DonorStatistics` (a `Q`). Evaluation runs one
+query per rule across all donors that do not hold the badge yet, locks only those
+donors, writes the changes with one `bulk_update` and sends one bulk batch of
+"badge earned" notifications.
+"""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, TextField
+from django.db.models.functions import Cast
+
+from .models import Badge, DonorStatistics
+
+BADGE_POINTS = 50
+SPEED_RESPONSE_WINDOW = timedelta(hours=1)
+
+
+def _speed_donor_ids():
+    from sos.models import ResponseChoice, SOSResponse
+
+    return (
+        SOSResponse.objects.filter(
+            response=ResponseChoice.YES,
+            responded_at__isnull=False,
+            responded_at__lte=F("created_at") + SPEED_RESPONSE_WINDOW,
+        )
+        .values("donor_id")
+        .distinct()
+    )
+
+
+def badge_rules() -> dict[str, Q]:
+    return {
+        Badge.FIRST_DONATION: Q(total_donations__gte=1),
+        Badge.FIVE_DONATIONS: Q(total_donations__gte=5),
+        Badge.TEN_DONATIONS: Q(total_donations__gte=10),
+        Badge.HERO: Q(total_donations__gte=20),
+        Badge.LIFESAVER: Q(total_donations__gte=30),
+        Badge.CONSISTENT: Q(current_donation_streak__gte=6),
+        Badge.EMERGENCY_RESPONDER: Q(sos_responses__gte=3),
+        Badge.TRUSTED_DONOR: Q(successful_sos_responses__gte=5),
+        Badge.SPEED_DONOR: Q(donor_id__in=_speed_donor_ids()),
+    }
+
+
+def award_badges(queryset=None, notify: bool = True) -> dict[int, list[str]]:
+    """
+    Evaluate every rule for the donors in `queryset` (default: all) and award new badges.
+    Badges are never revoked. Returns {donor_id: [newly earned badge keys]}.
+    """
+
+    from notifications.services import NotificationService
+    from .ranking import rank_index
+    from .services import invalidate_leaderboard
+
+    queryset = DonorStatistics.objects.all() if queryset is None else queryset
+    # Membership in the JSON list as a text match on the quoted key, which works on every
+    # backend (JSONField `__contains` is not supported on SQLite).
+    queryset = queryset.annotate(badges_text=Cast("badges", TextField()))
+
+    qualifying = defaultdict(set)  # stats pk -> badges it qualifies for and does not hold
+    for badge, predicate in badge_rules().items():
+        candidates = queryset.filter(predicate).exclude(badges_text__contains=json.dumps(str(badge)))
+        for pk in candidates.values_list("pk", flat=True).iterator(chunk_size=5000):
+            qualifying[pk].add(str(badge))
+    if not qualifying:
+        return {}
+
+    changed = []
+    earned: dict[int, list[str]] = {}
+    pks = list(qualifying)
+    with transaction.atomic():
+        for start in range(0, len(pks), 1000):
+            rows = DonorStatistics.objects.select_for_update().filter(pk__in=pks[start:start + 1000]).only(
+                "pk", "donor_id", "badges", "points"
+            )
+            for stats in rows:
+                held = set(stats.badges or [])
+                new = sorted(qualifying[stats.pk] - held)
+                if not new:
+                    continue
+                stats.badges = list(stats.badges or []) + new
+                stats.points += BADGE_POINTS * len(new)
+                changed.append(stats)
+                earned[stats.donor_id] = new
+        DonorStatistics.objects.bulk_update(changed, ["badges", "points"], batch_size=1000)
+        if changed:
+            # bulk_update fires no post_save.
+            transaction.on_commit(invalidate_leaderboard)
+
+    for stats in changed:
+        rank_index.update_points(stats.donor_id, stats.points)
+    if notify and earned:
+        labels = dict(Badge.choices)
+        NotificationService.notify_new_badges_bulk(
+            [(donor_id, labels.get(badge, badge)) for donor_id, badges in earned.items() for badge in badges]
+        )
+    return earned
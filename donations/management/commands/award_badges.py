@@ -0,0 +1,22 @@
+"""
+Evaluate badge rules for every donor and award newly earned badges.
+Usage: python manage.py award_badges [--no-notify]
+
+Meant to run periodically (e.g. hourly from cron) after stats have been updated.
+"""
+
+from django.core.management.base import BaseCommand
+
+from donations.badges import award_badges
+
+
+class Command(BaseCommand):
+    help = 'Award badges to all qualifying donors in one batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-notify', action='store_true', help='Do not send badge notifications')
+
+    def handle(self, *args, **options):
+        earned = award_badges(notify=not options['no_notify'])
+        total = sum(len(badges) for badges in earned.values())
+        self.stdout.write(self.style.SUCCESS(f'✓ Awarded {total} badge(s) to {len(earned)} donor(s)'))
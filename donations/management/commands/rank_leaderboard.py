@@ -0,0 +1,18 @@
+"""
+Materialize leaderboard ranks (RANK() over points) and refresh the cached top list.
+Usage: python manage.py rank_leaderboard
+
+Meant to run periodically (e.g. every few minutes from cron); leaderboard reads never write.
+"""
+
+from django.core.management.base import BaseCommand
+
+from donations.services import recompute_leaderboard_ranks
+
+
+class Command(BaseCommand):
+    help = 'Recompute DonorStatistics.rank for every donor and drop the cached leaderboard'
+
+    def handle(self, *args, **options):
+        updated = recompute_leaderboard_ranks()
+        self.stdout.write(self.style.SUCCESS(f'✓ Leaderboard ranked ({updated} rank(s) changed)'))
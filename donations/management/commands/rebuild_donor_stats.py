@@ -0,0 +1,18 @@
+"""
+Recompute event-driven DonorStatistics fields from history (backfills, repairs).
+Usage: python manage.py rebuild_donor_stats
+
+Day-to-day, the same fields are kept current incrementally by donations.stats events.
+"""
+
+from django.core.management.base import BaseCommand
+
+from donations.stats import rebuild_donor_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild donation totals, SOS response stats and streaks for every donor'
+
+    def handle(self, *args, **options):
+        count = rebuild_donor_statistics()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt statistics for {count} donors'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0004_alter_donorstatistics_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodbankinventory',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Version of the last applied stock snapshot; older snapshots are rejected.'),
+        ),
+    ]
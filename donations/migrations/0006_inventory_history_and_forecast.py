@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0005_bloodbankinventory_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=64)),
+                ('blood_group', models.CharField(choices=[('O+', 'O+'), ('O-', 'O-'), ('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('AB+', 'AB+'), ('AB-', 'AB-')], max_length=3)),
+                ('units_available', models.PositiveIntegerField(default=0)),
+                ('daily_demand', models.FloatField(default=0.0, help_text='Expected units consumed per day')),
+                ('days_of_cover', models.FloatField(blank=True, help_text='Empty when there is no observed demand', null=True)),
+                ('shortage_expected', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['shortage_expected', 'days_of_cover'], name='donations_i_shortag_3bbbd4_idx')],
+                'unique_together': {('city', 'blood_group')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=64)),
+                ('blood_group', models.CharField(choices=[('O+', 'O+'), ('O-', 'O-'), ('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('AB+', 'AB+'), ('AB-', 'AB-')], max_length=3)),
+                ('bucket', models.DateTimeField(help_text='Start of the downsampling bucket (UTC)')),
+                ('units_available', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='donations_i_bucket_cee11d_idx')],
+                'unique_together': {('city', 'blood_group', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0006_inventory_history_and_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donorstatistics',
+            index=models.Index(fields=['-points', '-total_donations'], name='donorstats_points_idx'),
+        ),
+    ]
@@ -43,45 +43,18 @@ class DonorStatistics(models.Model):
     class Meta:
         verbose_name_plural = "Donor Statistics"
         ordering = ['-points', '-total_donations']
+        indexes = [models.Index(fields=["-points", "-total_donations"], name="donorstats_points_idx")]
 
     def __str__(self) -> str:
         return f"{self.donor.username} - {self.total_donations} donations"
 
     def check_badges(self):
-        """Automatically award badges based on statistics"""
-        new_badges = []
-        
-        # Donation milestones
-        if self.total_donations >= 1 and Badge.FIRST_DONATION not in self.badges:
-            new_badges.append(Badge.FIRST_DONATION)
-        if self.total_donations >= 5 and Badge.FIVE_DONATIONS not in self.badges:
-            new_badges.append(Badge.FIVE_DONATIONS)
-        if self.total_donations >= 10 and Badge.TEN_DONATIONS not in self.badges:
-            new_badges.append(Badge.TEN_DONATIONS)
-        if self.total_donations >= 20 and Badge.HERO not in self.badges:
-            new_badges.append(Badge.HERO)
-        if self.total_donations >= 30 and Badge.LIFESAVER not in self.badges:
-            new_badges.append(Badge.LIFESAVER)
-        
-        # Streak badges
-        if self.current_donation_streak >= 6 and Badge.CONSISTENT not in self.badges:
-            new_badges.append(Badge.CONSISTENT)
-        
-        # SOS engagement badges
-        if self.sos_responses >= 3 and Badge.EMERGENCY_RESPONDER not in self.badges:
-            new_badges.append(Badge.EMERGENCY_RESPONDER)
-        if self.successful_sos_responses >= 5 and Badge.TRUSTED_DONOR not in self.badges:
-            new_badges.append(Badge.TRUSTED_DONOR)
-        
-        # Add new badges
-        for badge in new_badges:
-            if badge not in self.badges:
-                self.badges.append(badge)
-                self.points += 50  # Award points for each badge
+        """Award any badges this donor now qualifies for (see donations.badges for the rules)"""
+        from .badges import award_badges
         
+        new_badges = award_badges(DonorStatistics.objects.filter(pk=self.pk)).get(self.donor_id, [])
         if new_badges:
-            self.save()
-        
+            self.refresh_from_db(fields=['badges', 'points'])
         return new_badges
 
     def get_badge_display(self):
@@ -134,6 +107,10 @@ class BloodBankInventory(models.Model):
     city = models.CharField(max_length=64)
     blood_group = models.CharField(max_length=3, choices=BloodGroup.CHOICES)
     units_available = models.PositiveIntegerField(default=0)
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Version of the last applied stock snapshot; older snapshots are rejected.",
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -144,6 +121,47 @@ class BloodBankInventory(models.Model):
         return f"{self.city}: {self.blood_group} = {self.units_available} units"
 
 
+class InventorySnapshot(models.Model):
+    """
+    Append-only inventory history, downsampled on write to one row per
+    (city, blood group, time bucket). The latest level inside a bucket wins.
+    """
+
+    city = models.CharField(max_length=64)
+    blood_group = models.CharField(max_length=3, choices=BloodGroup.CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the downsampling bucket (UTC)")
+    units_available = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("city", "blood_group", "bucket")
+        indexes = [models.Index(fields=["bucket"])]
+
+    def __str__(self) -> str:
+        return f"{self.city}: {self.blood_group} = {self.units_available} units @ {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class InventoryForecast(models.Model):
+    """
+    Precomputed days-of-cover per (city, blood group), refreshed offline by
+    `manage.py forecast_inventory` and read by the analytics dashboards.
+    """
+
+    city = models.CharField(max_length=64)
+    blood_group = models.CharField(max_length=3, choices=BloodGroup.CHOICES)
+    units_available = models.PositiveIntegerField(default=0)
+    daily_demand = models.FloatField(default=0.0, help_text="Expected units consumed per day")
+    days_of_cover = models.FloatField(null=True, blank=True, help_text="Empty when there is no observed demand")
+    shortage_expected = models.BooleanField(default=False)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("city", "blood_group")
+        indexes = [models.Index(fields=["shortage_expected", "days_of_cover"])]
+
+    def __str__(self) -> str:
+        return f"{self.city}: {self.blood_group} cover={self.days_of_cover}"
+
+
 class DonorFeedback(models.Model):
     """Feedback from patients/recipients about donors"""
     
@@ -0,0 +1,161 @@
+"""
+In-process order-statistic index over donor points.
+
+Each partition (everyone, one city, one blood group) keeps a sorted list of
+`(-points, donor_id)` keys, so "my rank", "my percentile" and "who is around me"
+are `bisect` lookups (O(log n)) instead of a COUNT over `DonorStatistics`.
+
+The index is rebuilt from the DB in one query when it is older than
+`VEINLINE_RANK_INDEX_TTL_SECONDS` (each worker process has its own copy) and is
+kept current in between by `update_points()` / `update_partitions()` /
+`remove_donor()` from signals (an insert/remove is a bisect plus a list memmove).
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, bisect_right, insort
+from threading import Lock
+
+from django.conf import settings
+
+from .models import DonorDetails, DonorStatistics
+
+ALL = ("all", "")
+
+
+def _partitions(city: str | None, blood_group: str | None) -> list[tuple[str, str]]:
+    keys = [ALL]
+    if city:
+        keys.append(("city", city.strip().lower()))
+    if blood_group:
+        keys.append(("blood_group", blood_group))
+    return keys
+
+
+class RankIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._donors: dict[int, tuple[int, str | None, str | None]] = {}
+        self._partitions: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        self.built_at = 0.0
+
+    def rebuild(self) -> None:
+        donors = {
+            donor_id: (points, city, group)
+            for donor_id, points, city, group in DonorStatistics.objects.values_list(
+                "donor_id", "points", "donor__donor_details__city", "donor__donor_details__blood_group"
+            ).iterator(chunk_size=5000)
+        }
+        partitions: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        for donor_id, (points, city, group) in donors.items():
+            for part in _partitions(city, group):
+                partitions.setdefault(part, []).append((-points, donor_id))
+        for keys in partitions.values():
+            keys.sort()
+        with self._lock:
+            self._donors = donors
+            self._partitions = partitions
+            self.built_at = time.monotonic()
+
+    def _remove(self, donor_id: int) -> None:
+        current = self._donors.pop(donor_id, None)
+        if current is None:
+            return
+        points, city, group = current
+        key = (-points, donor_id)
+        for part in _partitions(city, group):
+            keys = self._partitions.get(part, [])
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def _insert(self, donor_id: int, points: int, city: str | None, group: str | None) -> None:
+        self._donors[donor_id] = (points, city, group)
+        for part in _partitions(city, group):
+            insort(self._partitions.setdefault(part, []), (-points, donor_id))
+
+    def update_points(self, donor_id: int, points: int) -> None:
+        """Move a donor after a points change, keeping their city / blood group."""
+        if not self.built_at:
+            return
+        details = (None, None)
+        if donor_id not in self._donors:
+            # New to the index: load the partitions the rebuild would have given them.
+            row = DonorDetails.objects.filter(user_id=donor_id).values_list("city", "blood_group").first()
+            details = row or details
+        with self._lock:
+            if not self.built_at:
+                return
+            _, city, group = self._donors.get(donor_id, (0, *details))
+            self._remove(donor_id)
+            self._insert(donor_id, points, city, group)
+
+    def update_partitions(self, donor_id: int, city: str | None, group: str | None) -> None:
+        """Move a donor after a city / blood group change, keeping their points."""
+        with self._lock:
+            if donor_id not in self._donors:
+                return
+            points = self._donors[donor_id][0]
+            self._remove(donor_id)
+            self._insert(donor_id, points, city, group)
+
+    def remove_donor(self, donor_id: int) -> None:
+        with self._lock:
+            self._remove(donor_id)
+
+    @staticmethod
+    def _neighbour(keys, key) -> dict:
+        neg_points, donor_id = key
+        return {"donor_id": donor_id, "points": -neg_points, "rank": bisect_left(keys, (neg_points,)) + 1}
+
+    def position(self, donor_id: int, scope: str = "all", window: int = 5) -> dict | None:
+        """
+        Rank (ties share the best rank), percentile (share of the partition with fewer
+        points) and up to `window` neighbours above and below, for one donor.
+        `scope` is "all", "city" or "blood_group".
+        """
+
+        with self._lock:
+            current = self._donors.get(donor_id)
+            if current is None:
+                return None
+            points, city, group = current
+            part = {
+                "all": ALL,
+                "city": ("city", (city or "").strip().lower()),
+                "blood_group": ("blood_group", group or ""),
+            }[scope]
+            keys = self._partitions.get(part)
+            if not keys:
+                return None
+
+            total = len(keys)
+            i = bisect_left(keys, (-points, donor_id))
+            ahead = bisect_left(keys, (-points,))
+            below = total - bisect_right(keys, (-points, float("inf")))
+            above = [self._neighbour(keys, key) for key in keys[max(0, i - window):i]]
+            after = [self._neighbour(keys, key) for key in keys[i + 1:i + 1 + window]]
+
+        return {
+            "scope": scope,
+            "partition": part[1] or None,
+            "donor_id": donor_id,
+            "points": points,
+            "rank": ahead + 1,
+            "total": total,
+            "percentile": round(100 * below / total, 1),
+            "above": above,
+            "below": after,
+        }
+
+
+# Signal handlers update this directly (no-ops until the first read builds it).
+rank_index = RankIndex()
+
+
+def get_rank_index() -> RankIndex:
+    """The process-wide index, rebuilt from the DB if missing or older than the TTL."""
+    ttl = getattr(settings, "VEINLINE_RANK_INDEX_TTL_SECONDS", 300)
+    if not rank_index.built_at or time.monotonic() - rank_index.built_at > ttl:
+        rank_index.rebuild()
+    return rank_index
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from .models import BloodBankInventory, DonorDetails, DonorStatistics, Badge, DonorFeedback
+from core.constants import BloodGroup
+from .models import BloodBankInventory, DonorDetails, DonorStatistics, Badge, DonorFeedback, InventoryForecast
 
 
 class DonorDetailsSerializer(serializers.ModelSerializer):
@@ -27,8 +28,39 @@ class DonorDetailsSerializer(serializers.ModelSerializer):
 class BloodBankInventorySerializer(serializers.ModelSerializer):
     class Meta:
         model = BloodBankInventory
-        fields = ["id", "city", "blood_group", "units_available", "updated_at"]
-        read_only_fields = ["id", "updated_at"]
+        fields = ["id", "city", "blood_group", "units_available", "version", "updated_at"]
+        read_only_fields = ["id", "version", "updated_at"]
+
+
+class InventoryForecastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryForecast
+        fields = [
+            "city",
+            "blood_group",
+            "units_available",
+            "daily_demand",
+            "days_of_cover",
+            "shortage_expected",
+            "computed_at",
+        ]
+        read_only_fields = fields
+
+
+class InventoryRowSerializer(serializers.Serializer):
+    city = serializers.CharField(max_length=64)
+    blood_group = serializers.ChoiceField(choices=BloodGroup.CHOICES)
+    units_available = serializers.IntegerField(min_value=0)
+
+
+class InventorySnapshotSerializer(serializers.Serializer):
+    """
+    Whole stock snapshot pushed by a blood bank.
+    `version` must increase between snapshots (a sequence number or unix timestamp works).
+    """
+
+    version = serializers.IntegerField(min_value=1)
+    rows = InventoryRowSerializer(many=True, allow_empty=False)
 
 
 class DonorStatisticsSerializer(serializers.ModelSerializer):
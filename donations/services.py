@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Sum, Window
+from django.db.models.functions import Lower, Rank
+from django.utils import timezone
+
+from sos.models import SOSRequest, SOSStatus
+from .models import BloodBankInventory, DonorStatistics, InventoryForecast, InventorySnapshot
+from .serializers import LeaderboardSerializer
+
+
+def ingest_inventory_snapshot(rows, version: int) -> dict:
+    """
+    Apply a whole stock snapshot as a single upsert.
+
+    - Rows whose stored version is >= `version` are stale and skipped.
+    - Rows whose units did not change are not rewritten; only their version is advanced
+      so an older snapshot arriving later cannot overwrite them.
+    - Everything else goes through one `bulk_create(update_conflicts=True)`.
+
+    Missing rows are inserted first (`ignore_conflicts`), so every row of the snapshot
+    exists and is locked before the versions are compared: two concurrent snapshots
+    touching the same new row are applied one after the other, and the older one is
+    then seen as stale. The upsert and the version-only update fire no signals, so the
+    analytics snapshot and the cached pages are invalidated explicitly on commit.
+    """
+
+    # Last row wins if a snapshot repeats a (city, group) pair.
+    incoming = {(r["city"], r["blood_group"]): r["units_available"] for r in rows}
+    if not incoming:
+        return {"version": version, "created": 0, "updated": 0, "unchanged": 0, "stale": 0}
+
+    lookup = Q()
+    for city, group in incoming:
+        lookup |= Q(city=city, blood_group=group)
+
+    created = updated = unchanged = stale = 0
+    to_write = []
+    unchanged_lookup = Q()
+
+    with transaction.atomic():
+        new_keys = incoming.keys() - set(
+            BloodBankInventory.objects.filter(lookup).values_list("city", "blood_group")
+        )
+        if new_keys:
+            BloodBankInventory.objects.bulk_create(
+                [BloodBankInventory(city=city, blood_group=group) for city, group in new_keys],
+                ignore_conflicts=True,
+            )
+        existing = {
+            (city, group): (units, row_version)
+            for city, group, units, row_version in BloodBankInventory.objects.select_for_update()
+            .filter(lookup)
+            .values_list("city", "blood_group", "units_available", "version")
+        }
+
+        for key, units in incoming.items():
+            current_units, current_version = existing[key]
+            if current_version >= version:
+                stale += 1
+                continue
+            if key in new_keys:
+                created += 1
+            elif current_units == units:
+                unchanged += 1
+                unchanged_lookup |= Q(city=key[0], blood_group=key[1])
+                continue
+            else:
+                updated += 1
+            to_write.append(
+                BloodBankInventory(city=key[0], blood_group=key[1], units_available=units, version=version)
+            )
+
+        if to_write:
+            BloodBankInventory.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=["city", "blood_group"],
+                update_fields=["units_available", "version", "updated_at"],
+            )
+        if unchanged:
+            BloodBankInventory.objects.filter(unchanged_lookup).update(version=version)
+        record_inventory_history(
+            (obj.city, obj.blood_group, obj.units_available) for obj in to_write
+        )
+        if to_write:
+            transaction.on_commit(_inventory_changed)
+
+    return {"version": version, "created": created, "updated": updated, "unchanged": unchanged, "stale": stale}
+
+
+def _inventory_changed() -> None:
+    from analyticsapp.services import mark_analytics_dirty
+    from webui.caching import invalidate_pages
+
+    mark_analytics_dirty()
+    invalidate_pages("analytics")
+
+
+def _history_bucket(at: datetime) -> datetime:
+    minutes = max(1, int(getattr(settings, "VEINLINE_INVENTORY_HISTORY_BUCKET_MINUTES", 60)))
+    size = minutes * 60
+    epoch = int(at.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % size, tz=dt_timezone.utc)
+
+
+def record_inventory_history(levels, at: datetime | None = None) -> int:
+    """
+    Append (city, blood_group, units) levels to the history, downsampled on write:
+    repeated writes inside one bucket overwrite that bucket's row instead of adding rows.
+    """
+
+    bucket = _history_bucket(at or timezone.now())
+    snapshots = {
+        (city, group): InventorySnapshot(city=city, blood_group=group, bucket=bucket, units_available=units)
+        for city, group, units in levels
+    }
+    if not snapshots:
+        return 0
+    InventorySnapshot.objects.bulk_create(
+        list(snapshots.values()),
+        update_conflicts=True,
+        unique_fields=["city", "blood_group", "bucket"],
+        update_fields=["units_available"],
+    )
+    return len(snapshots)
+
+
+def compute_inventory_forecast(window_days: int | None = None, horizon_days: int | None = None, now=None) -> int:
+    """
+    Rebuild the `InventoryForecast` table in one pass.
+
+    Daily demand per (city, group) is the larger of:
+    - SOS demand: units requested over the window (cancelled requests excluded), per day
+    - observed drawdown: sum of stock decreases in the history, per day of history
+
+    Days of cover is `units_available / daily_demand`; a shortage is flagged when
+    cover drops below `horizon_days`. Every input is a single grouped query.
+    """
+
+    window_days = window_days or int(getattr(settings, "VEINLINE_FORECAST_WINDOW_DAYS", 30))
+    horizon_days = horizon_days or int(getattr(settings, "VEINLINE_SHORTAGE_HORIZON_DAYS", 7))
+    now = now or timezone.now()
+    since = now - timedelta(days=window_days)
+
+    # SOS cities are free text; match them case-insensitively against inventory.
+    sos_units = {
+        (city, group): units
+        for city, group, units in SOSRequest.objects.filter(created_at__gte=since)
+        .exclude(status=SOSStatus.CANCELLED)
+        .annotate(city_key=Lower("city"))
+        .values("city_key", "blood_group_needed")
+        .annotate(units=Sum("units_needed"))
+        .values_list("city_key", "blood_group_needed", "units")
+    }
+
+    drawdown = {}
+    first_seen = {}
+    previous = {}
+    history = (
+        InventorySnapshot.objects.filter(bucket__gte=since)
+        .order_by("city", "blood_group", "bucket")
+        .values_list("city", "blood_group", "bucket", "units_available")
+    )
+    for city, group, bucket, units in history.iterator(chunk_size=2000):
+        key = (city, group)
+        first_seen.setdefault(key, bucket)
+        last_units = previous.get(key)
+        if last_units is not None and units < last_units:
+            drawdown[key] = drawdown.get(key, 0) + (last_units - units)
+        previous[key] = units
+
+    forecasts = []
+    for city, group, units in BloodBankInventory.objects.values_list("city", "blood_group", "units_available"):
+        key = (city, group)
+        daily = sos_units.get((city.lower(), group), 0) / window_days
+        if key in drawdown:
+            span_days = max(1.0, (now - first_seen[key]).total_seconds() / 86400)
+            daily = max(daily, drawdown[key] / span_days)
+        cover = round(units / daily, 2) if daily else None
+        forecasts.append(
+            InventoryForecast(
+                city=city,
+                blood_group=group,
+                units_available=units,
+                daily_demand=round(daily, 3),
+                days_of_cover=cover,
+                shortage_expected=cover is not None and cover < horizon_days,
+                computed_at=now,
+            )
+        )
+
+    with transaction.atomic():
+        if forecasts:
+            InventoryForecast.objects.bulk_create(
+                forecasts,
+                update_conflicts=True,
+                unique_fields=["city", "blood_group"],
+                update_fields=["units_available", "daily_demand", "days_of_cover", "shortage_expected", "computed_at"],
+                batch_size=1000,
+            )
+        # Rows for inventory that no longer exists.
+        InventoryForecast.objects.exclude(computed_at=now).delete()
+    return len(forecasts)
+
+
+LEADERBOARD_CACHE_KEY = "donations:leaderboard:top"
+LEADERBOARD_SIZE = 100
+
+
+def recompute_leaderboard_ranks() -> int:
+    """
+    Materialize `DonorStatistics.rank` with a `RANK() OVER (ORDER BY points DESC)` window.
+    Only rows whose rank actually changed are written (one `bulk_update`); donors without
+    points drop back to rank 0. Returns the number of rows written.
+    """
+
+    ranked = (
+        DonorStatistics.objects.filter(points__gt=0)
+        .annotate(new_rank=Window(Rank(), order_by=F("points").desc()))
+        .values_list("pk", "rank", "new_rank")
+    )
+    changed = [
+        DonorStatistics(pk=pk, rank=new_rank)
+        for pk, rank, new_rank in ranked.iterator(chunk_size=2000)
+        if rank != new_rank
+    ]
+
+    with transaction.atomic():
+        DonorStatistics.objects.bulk_update(changed, ["rank"], batch_size=1000)
+        unranked = DonorStatistics.objects.filter(points=0).exclude(rank=0).update(rank=0)
+
+    cache.delete(LEADERBOARD_CACHE_KEY)
+    from .signals import leaderboard_ranked
+
+    leaderboard_ranked.send(sender=DonorStatistics, updated=len(changed) + unranked)
+    return len(changed) + unranked
+
+
+def invalidate_leaderboard() -> None:
+    """
+    Drop the cached top-donor list and the leaderboard pages. For `DonorStatistics`
+    writes that fire no post_save (`F()` updates, `bulk_update`).
+    """
+
+    from webui.caching import invalidate_pages
+
+    cache.delete(LEADERBOARD_CACHE_KEY)
+    invalidate_pages("leaderboard")
+
+
+def get_top_donors(limit: int = LEADERBOARD_SIZE) -> list[dict]:
+    """
+    Serialized top-N leaderboard, read from the materialized ranks and cached until the
+    next `recompute_leaderboard_ranks()` (or `VEINLINE_LEADERBOARD_CACHE_SECONDS`).
+    """
+
+    rows = cache.get(LEADERBOARD_CACHE_KEY)
+    if rows is None:
+        stats = (
+            DonorStatistics.objects.filter(points__gt=0)
+            .select_related("donor", "donor__donor_details")
+            .order_by("-points", "-total_donations")[:LEADERBOARD_SIZE]
+        )
+        rows = [dict(row) for row in LeaderboardSerializer(stats, many=True).data]
+        cache.set(LEADERBOARD_CACHE_KEY, rows, getattr(settings, "VEINLINE_LEADERBOARD_CACHE_SECONDS", 300))
+    return rows[:limit]
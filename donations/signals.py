@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import BloodBankInventory, DonorDetails, DonorStatistics
+from .ranking import rank_index
+from .services import record_inventory_history
+
+# Sent by `recompute_leaderboard_ranks()` once ranks are materialized (bulk_update
+# bypasses post_save). kwargs: updated=<rows written>.
+leaderboard_ranked = Signal()
+
+
+@receiver(post_save, sender=BloodBankInventory)
+def record_inventory_level(sender, instance, **kwargs):
+    """Single-row edits (API PATCH, admin) feed the same history as bulk snapshots."""
+    record_inventory_history([(instance.city, instance.blood_group, instance.units_available)])
+
+
+@receiver(post_save, sender=DonorStatistics)
+def rerank_donor(sender, instance, **kwargs):
+    rank_index.update_points(instance.donor_id, instance.points)
+
+
+@receiver(post_delete, sender=DonorStatistics)
+def unrank_donor(sender, instance, **kwargs):
+    rank_index.remove_donor(instance.donor_id)
+
+
+@receiver(post_save, sender=DonorDetails)
+def repartition_donor(sender, instance, **kwargs):
+    rank_index.update_partitions(instance.user_id, instance.city, instance.blood_group)
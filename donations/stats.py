@@ -0,0 +1,202 @@
+"""
+Event-driven `DonorStatistics` updates.
+
+Call sites emit one event per state transition (an SOS reply, a completed SOS
+donation, a completed appointment, drive attendance). Each event is a single
+`UPDATE ... SET x = x + 1` with `F()` expressions, so concurrent events never lose
+writes and nothing rescans history. Averages are kept as running means:
+`new_avg = (avg * n + value) / (n + 1)`.
+
+Within one UPDATE, derived columns (rates, averages, streaks) are listed before the
+counters/dates they read: SQLite/PostgreSQL evaluate every SET against the old row,
+MySQL evaluates left to right, and this order gives the same result on both.
+
+`rebuild_donor_statistics()` recomputes everything from history for backfills.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import DonorStatistics
+
+YES = "yes"
+NO = "no"
+
+
+def _leaderboard_changed() -> None:
+    from .services import invalidate_leaderboard
+
+    invalidate_leaderboard()
+
+
+def _apply(donor_id: int, **updates) -> None:
+    if not DonorStatistics.objects.filter(donor_id=donor_id).update(**updates):
+        try:
+            with transaction.atomic():
+                DonorStatistics.objects.create(donor_id=donor_id)
+        except IntegrityError:
+            pass  # Created concurrently; the update below still applies.
+        DonorStatistics.objects.filter(donor_id=donor_id).update(**updates)
+    # update() fires no post_save, so the leaderboard caches are dropped here.
+    transaction.on_commit(_leaderboard_changed)
+
+
+def _as_float(expr):
+    return Cast(expr, FloatField())
+
+
+def sos_reply(donor_id: int, previous: str, new: str, response_hours: float | None) -> None:
+    """
+    A donor answered (or changed their answer to) an SOS. Only yes/no count as replies.
+    - first reply (pending -> yes/no): sos_responses + 1, rate and response time folded in
+    - changed reply (yes <-> no): rate shifted by 100 / n, counters unchanged
+    """
+
+    if new not in (YES, NO) or previous == new:
+        return
+    accepted = 100.0 if new == YES else 0.0
+    n = _as_float(F("sos_responses"))
+
+    if previous not in (YES, NO):
+        updates = {
+            "response_rate": (F("response_rate") * n + accepted) / (n + 1),
+        }
+        if response_hours is not None:
+            updates["average_response_time_hours"] = (
+                F("average_response_time_hours") * n + max(0.0, response_hours)
+            ) / (n + 1)
+        updates["sos_responses"] = F("sos_responses") + 1
+    else:
+        shift = 100.0 if new == YES else -100.0
+        updates = {
+            "response_rate": Case(
+                When(sos_responses__gt=0, then=F("response_rate") + Value(shift) / n),
+                default=F("response_rate"),
+                output_field=FloatField(),
+            ),
+        }
+    _apply(donor_id, **updates)
+
+
+def _streak_update(day: date) -> dict:
+    this_month = day.replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    return {
+        "current_donation_streak": Case(
+            # Out-of-order (older) event: keep the current streak.
+            When(last_donation_streak_date__gt=day, then=F("current_donation_streak")),
+            When(last_donation_streak_date__gte=this_month, then=F("current_donation_streak")),
+            When(last_donation_streak_date__gte=last_month, then=F("current_donation_streak") + 1),
+            default=Value(1),
+        ),
+        "last_donation_streak_date": Case(
+            When(last_donation_streak_date__gt=day, then=F("last_donation_streak_date")),
+            default=Value(day),
+        ),
+    }
+
+
+def donation_completed(donor_id: int, at: datetime | date | None = None, sos: bool = False) -> None:
+    """A donation happened (appointment, drive or SOS): total + 1 and the monthly streak advances."""
+
+    at = at or timezone.now()
+    day = timezone.localdate(at) if isinstance(at, datetime) else at
+    updates = _streak_update(day)
+    updates["total_donations"] = F("total_donations") + 1
+    if sos:
+        updates["successful_sos_responses"] = F("successful_sos_responses") + 1
+    _apply(donor_id, **updates)
+
+
+def _month_streak(days: list[date]) -> tuple[int, date | None]:
+    """Consecutive months with a donation, ending at the month of the latest donation."""
+
+    if not days:
+        return 0, None
+    months = sorted({(d.year, d.month) for d in days}, reverse=True)
+    streak = 1
+    for (y1, m1), (y2, m2) in zip(months, months[1:]):
+        if y1 * 12 + m1 - (y2 * 12 + m2) != 1:
+            break
+        streak += 1
+    return streak, max(days)
+
+
+def rebuild_donor_statistics() -> int:
+    """
+    Recompute the event-driven fields for every donor from history (one pass per
+    source table) and write them with `bulk_update`. Returns the number of rows written.
+    """
+
+    from appointments.models import Appointment
+    from drives.models import DriveRegistration
+    from sos.models import DonationStatus, DonationTracker, SOSResponse
+
+    replies = defaultdict(lambda: [0, 0, 0.0, 0])  # count, yes, hours total, hours count
+    for donor_id, response, created_at, responded_at in SOSResponse.objects.filter(
+        response__in=(YES, NO)
+    ).values_list("donor_id", "response", "created_at", "responded_at").iterator(chunk_size=5000):
+        row = replies[donor_id]
+        row[0] += 1
+        row[1] += response == YES
+        if responded_at and created_at:
+            row[2] += max(0.0, (responded_at - created_at).total_seconds() / 3600)
+            row[3] += 1
+
+    donation_days = defaultdict(list)
+    successful_sos = defaultdict(int)
+    for donor_id, completed_at in DonationTracker.objects.filter(
+        current_status=DonationStatus.COMPLETED
+    ).values_list("sos_response__donor_id", "completed_at").iterator(chunk_size=5000):
+        successful_sos[donor_id] += 1
+        donation_days[donor_id].append(timezone.localdate(completed_at) if completed_at else None)
+    for donor_id, completed_at in Appointment.objects.filter(
+        donation_completed=True
+    ).values_list("donor_id", "completed_at").iterator(chunk_size=5000):
+        donation_days[donor_id].append(timezone.localdate(completed_at) if completed_at else None)
+    for donor_id, completed_at in DriveRegistration.objects.filter(
+        donated=True
+    ).values_list("donor_id", "donation_completed_at").iterator(chunk_size=5000):
+        donation_days[donor_id].append(timezone.localdate(completed_at) if completed_at else None)
+
+    donor_ids = set(replies) | set(donation_days) | set(successful_sos)
+    existing = set(DonorStatistics.objects.filter(donor_id__in=donor_ids).values_list("donor_id", flat=True))
+    DonorStatistics.objects.bulk_create(
+        [DonorStatistics(donor_id=donor_id) for donor_id in donor_ids - existing],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+    rows = []
+    for stats in DonorStatistics.objects.only("pk", "donor_id").iterator(chunk_size=5000):
+        count, yes, hours, timed = replies.get(stats.donor_id, (0, 0, 0.0, 0))
+        days = donation_days.get(stats.donor_id, [])
+        stats.sos_responses = count
+        stats.response_rate = round(100.0 * yes / count, 2) if count else 0.0
+        stats.average_response_time_hours = round(hours / timed, 2) if timed else 0.0
+        stats.successful_sos_responses = successful_sos.get(stats.donor_id, 0)
+        stats.total_donations = len(days)
+        stats.current_donation_streak, stats.last_donation_streak_date = _month_streak([d for d in days if d])
+        rows.append(stats)
+
+    DonorStatistics.objects.bulk_update(
+        rows,
+        [
+            "sos_responses",
+            "response_rate",
+            "average_response_time_hours",
+            "successful_sos_responses",
+            "total_donations",
+            "current_donation_streak",
+            "last_donation_streak_date",
+        ],
+        batch_size=1000,
+    )
+    transaction.on_commit(_leaderboard_changed)
+    return len(rows)
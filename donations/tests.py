@@ -1,3 +1,367 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analyticsapp.models import AnalyticsSnapshot
+from analyticsapp.services import refresh_analytics_snapshot
+from drives.models import DonationDrive, DriveRegistration
+from sos.models import SOSRequest, SOSResponse
+from webui.caching import scope_version
+
+from . import stats as donor_stats
+from .badges import BADGE_POINTS, award_badges, badge_rules
+from .models import Badge, BloodBankInventory, DonorDetails, DonorStatistics, InventoryForecast, InventorySnapshot
+from .ranking import RankIndex, rank_index
+from .services import (
+    LEADERBOARD_CACHE_KEY,
+    compute_inventory_forecast,
+    get_top_donors,
+    ingest_inventory_snapshot,
+    recompute_leaderboard_ranks,
+    record_inventory_history,
+)
+
+
+def _stock():
+    return dict(
+        BloodBankInventory.objects.values_list("blood_group", "units_available").order_by("blood_group")
+    )
+
+
+class InventorySnapshotIngestTests(TestCase):
+    def setUp(self):
+        BloodBankInventory.objects.create(city="Pune", blood_group="A+", units_available=5, version=10)
+        BloodBankInventory.objects.create(city="Pune", blood_group="B+", units_available=7, version=10)
+        InventorySnapshot.objects.all().delete()
+
+    def _ingest(self, version, units):
+        rows = [{"city": "Pune", "blood_group": group, "units_available": n} for group, n in units.items()]
+        with self.captureOnCommitCallbacks(execute=True):
+            return ingest_inventory_snapshot(rows, version)
+
+    def test_newer_version_updates_creates_and_skips_unchanged_rows(self):
+        result = self._ingest(11, {"A+": 5, "B+": 3, "O-": 2})
+        self.assertEqual(
+            (result["created"], result["updated"], result["unchanged"], result["stale"]), (1, 1, 1, 0)
+        )
+        self.assertEqual(_stock(), {"A+": 5, "B+": 3, "O-": 2})
+        # Unchanged rows still move to the new version, so version 10 is stale for all of them.
+        self.assertEqual(set(BloodBankInventory.objects.values_list("version", flat=True)), {11})
+        # Only rewritten rows go into the history.
+        self.assertEqual(
+            set(InventorySnapshot.objects.values_list("blood_group", flat=True)), {"B+", "O-"}
+        )
+
+    def test_stale_and_repeated_versions_are_skipped(self):
+        result = self._ingest(9, {"A+": 1, "B+": 1, "O-": 1})
+        self.assertEqual((result["stale"], result["created"]), (2, 1))
+        self.assertEqual(_stock(), {"A+": 5, "B+": 7, "O-": 1})
+
+        result = self._ingest(9, {"O-": 4})
+        self.assertEqual((result["stale"], result["updated"]), (1, 0))
+        self.assertEqual(_stock()["O-"], 1)
+
+    def test_changes_mark_analytics_dirty_and_invalidate_pages(self):
+        refresh_analytics_snapshot()
+        before = scope_version(["analytics"])
+
+        self._ingest(5, {"A+": 1})  # stale: nothing written
+        self.assertFalse(AnalyticsSnapshot.objects.get().is_dirty)
+        self.assertEqual(scope_version(["analytics"]), before)
+
+        self._ingest(11, {"A+": 1})
+        self.assertTrue(AnalyticsSnapshot.objects.get().is_dirty)
+        self.assertNotEqual(scope_version(["analytics"]), before)
+
+
+class InventoryForecastTests(TestCase):
+    def test_cover_from_drawdown_and_sos_demand(self):
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)  # On a history bucket.
+        for group, units in (("A+", 20), ("B+", 10), ("O-", 4)):
+            BloodBankInventory.objects.create(city="Pune", blood_group=group, units_available=units)
+        InventorySnapshot.objects.all().delete()
+        InventoryForecast.objects.create(city="Gone", blood_group="A+", computed_at=now - timedelta(days=1))
+
+        # A+: 10 units drawn down over 10 days of history; the restock is not demand.
+        for days_ago, units in ((10, 50), (5, 40), (1, 45)):
+            record_inventory_history([("Pune", "A+", units)], at=now - timedelta(days=days_ago))
+        # B+: 60 units requested over the 30-day window (city matched case-insensitively).
+        patient = User.objects.create_user(username="patient", password="x")
+        for _ in range(3):
+            SOSRequest.objects.create(requester=patient, blood_group_needed="B+", units_needed=20, city="pune")
+        SOSRequest.objects.create(
+            requester=patient, blood_group_needed="B+", units_needed=90, city="Pune", status="cancelled"
+        )
+
+        self.assertEqual(compute_inventory_forecast(window_days=30, horizon_days=7, now=now), 3)
+        forecast = {
+            row[0]: row[1:]
+            for row in InventoryForecast.objects.values_list(
+                "blood_group", "daily_demand", "days_of_cover", "shortage_expected"
+            )
+        }
+        self.assertEqual(forecast, {"A+": (1.0, 20.0, False), "B+": (2.0, 5.0, True), "O-": (0.0, None, False)})
+        self.assertFalse(InventoryForecast.objects.filter(city="Gone").exists())
+
+
+class InventoryHistoryTests(TestCase):
+    @override_settings(VEINLINE_INVENTORY_HISTORY_BUCKET_MINUTES=60)
+    def test_writes_inside_a_bucket_overwrite_its_row(self):
+        ten = datetime(2026, 3, 2, 10, 0, tzinfo=dt_timezone.utc)
+        record_inventory_history([("Pune", "A+", 5), ("Pune", "B+", 3)], at=ten + timedelta(minutes=5))
+        record_inventory_history([("Pune", "A+", 8)], at=ten + timedelta(minutes=50))
+        record_inventory_history([("Pune", "A+", 6)], at=ten + timedelta(minutes=61))
+
+        rows = list(
+            InventorySnapshot.objects.filter(blood_group="A+")
+            .order_by("bucket")
+            .values_list("bucket", "units_available")
+        )
+        self.assertEqual(rows, [(ten, 8), (ten + timedelta(hours=1), 6)])
+        self.assertEqual(InventorySnapshot.objects.filter(blood_group="B+").count(), 1)
+
+
+class LeaderboardRankTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stats = {}
+        for name, points in (("a", 30), ("b", 20), ("c", 20), ("d", 10), ("e", 0)):
+            donor = User.objects.create_user(username=name, password="x")
+            self.stats[name] = DonorStatistics.objects.create(donor=donor, points=points)
+
+    def _ranks(self):
+        return dict(DonorStatistics.objects.values_list("donor__username", "rank"))
+
+    def _set_points(self, name, points):
+        # Like the F()/bulk writes: no post_save.
+        DonorStatistics.objects.filter(pk=self.stats[name].pk).update(points=points)
+
+    def test_ties_share_a_rank_and_only_changed_rows_are_written(self):
+        self.assertEqual(recompute_leaderboard_ranks(), 4)
+        self.assertEqual(self._ranks(), {"a": 1, "b": 2, "c": 2, "d": 4, "e": 0})
+        self.assertEqual(recompute_leaderboard_ranks(), 0)
+
+        # d overtakes b and c: those 3 rows are written, a keeps rank 1 and is not.
+        self._set_points("d", 25)
+        self.assertEqual(recompute_leaderboard_ranks(), 3)
+        self.assertEqual(self._ranks(), {"a": 1, "d": 2, "b": 3, "c": 3, "e": 0})
+
+        # Losing every point drops a donor back to rank 0.
+        self._set_points("a", 0)
+        self.assertEqual(recompute_leaderboard_ranks(), 4)
+        self.assertEqual(self._ranks(), {"a": 0, "d": 1, "b": 2, "c": 2, "e": 0})
+
+    def test_top_donors_are_cached_until_the_next_recompute(self):
+        recompute_leaderboard_ranks()
+        self.assertEqual([row["points"] for row in get_top_donors()], [30, 20, 20, 10])
+        self.assertIsNotNone(cache.get(LEADERBOARD_CACHE_KEY))
+
+        self._set_points("d", 40)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_top_donors(2)[0]["points"], 30)
+
+        recompute_leaderboard_ranks()
+        top = get_top_donors(2)
+        self.assertEqual([(row["rank"], row["points"]) for row in top], [(1, 40), (2, 30)])
+
+
+class RankIndexTests(TestCase):
+    def setUp(self):
+        self.ids = {}
+        for name, points, city, group in (
+            ("a", 50, "Pune", "O+"),
+            ("b", 30, "Pune", "A+"),
+            ("c", 30, "Mumbai", "O+"),
+            ("d", 10, "pune ", "O+"),
+        ):
+            donor = User.objects.create_user(username=name, password="x")
+            DonorDetails.objects.create(user=donor, full_name=name, age=30, blood_group=group, city=city)
+            DonorStatistics.objects.create(donor=donor, points=points)
+            self.ids[name] = donor.id
+        self.index = RankIndex()
+        self.index.rebuild()
+
+    def test_rank_ties_percentile_and_neighbours(self):
+        c = self.index.position(self.ids["c"], window=1)
+        self.assertEqual((c["rank"], c["total"], c["percentile"]), (2, 4, 25.0))
+        self.assertEqual([n["donor_id"] for n in c["above"]], [self.ids["b"]])
+        self.assertEqual([(n["donor_id"], n["rank"]) for n in c["below"]], [(self.ids["d"], 4)])
+        self.assertEqual(self.index.position(self.ids["b"])["rank"], 2)
+
+        # City names are normalized, so "pune " shares a partition with "Pune".
+        d = self.index.position(self.ids["d"], scope="city")
+        self.assertEqual((d["partition"], d["rank"], d["total"], d["percentile"]), ("pune", 3, 3, 0.0))
+        o = self.index.position(self.ids["c"], scope="blood_group")
+        self.assertEqual((o["rank"], o["total"]), (2, 3))
+
+    def test_updates_move_donors_between_positions_and_partitions(self):
+        self.index.update_points(self.ids["d"], 60)
+        self.assertEqual(self.index.position(self.ids["d"])["rank"], 1)
+        self.assertEqual(self.index.position(self.ids["a"], scope="city")["rank"], 2)
+
+        self.index.update_partitions(self.ids["d"], "Mumbai", "O+")
+        self.assertEqual(self.index.position(self.ids["d"], scope="city")["total"], 2)
+        self.assertEqual(self.index.position(self.ids["a"], scope="city")["total"], 2)
+
+        self.index.remove_donor(self.ids["a"])
+        self.assertIsNone(self.index.position(self.ids["a"]))
+        self.assertEqual(self.index.position(self.ids["b"])["total"], 3)
+
+    def test_donor_new_to_the_index_gets_city_and_blood_group(self):
+        donor = User.objects.create_user(username="e", password="x")
+        DonorDetails.objects.create(user=donor, full_name="e", age=30, blood_group="A+", city="Pune")
+        self.index.update_points(donor.id, 40)
+
+        position = self.index.position(donor.id, scope="city")
+        self.assertEqual((position["partition"], position["rank"], position["total"]), ("pune", 2, 4))
+        self.assertEqual(self.index.position(donor.id, scope="blood_group")["total"], 2)
+
+    def test_signals_keep_the_shared_index_current(self):
+        rank_index.rebuild()
+        donor = User.objects.create_user(username="e", password="x")
+        DonorDetails.objects.create(user=donor, full_name="e", age=30, blood_group="A+", city="Mumbai")
+        DonorStatistics.objects.create(donor=donor, points=99)
+        position = rank_index.position(donor.id, scope="city")
+        self.assertEqual((position["partition"], position["rank"], position["total"]), ("mumbai", 1, 2))
+
+
+def _at(day):
+    return timezone.make_aware(datetime.combine(day, time(12, 0)))
+
+
+class DonorStatisticsEventTests(TestCase):
+    fields = (
+        "total_donations",
+        "current_donation_streak",
+        "last_donation_streak_date",
+        "successful_sos_responses",
+        "sos_responses",
+        "response_rate",
+        "average_response_time_hours",
+    )
+
+    def setUp(self):
+        self.donor = User.objects.create_user(username="donor", password="x")
+
+    def _stats(self, *fields):
+        return DonorStatistics.objects.values_list(*fields).get(donor=self.donor)
+
+    def _donate(self, *days):
+        for day in days:
+            donor_stats.donation_completed(self.donor.id, _at(day))
+
+    def test_first_donation_creates_the_row_and_starts_a_streak(self):
+        self.assertFalse(DonorStatistics.objects.filter(donor=self.donor).exists())
+        self._donate(date(2026, 3, 10))
+        self.assertEqual(
+            self._stats("total_donations", "current_donation_streak", "last_donation_streak_date"),
+            (1, 1, date(2026, 3, 10)),
+        )
+
+    def test_streak_grows_once_per_consecutive_month(self):
+        self._donate(date(2026, 1, 5), date(2026, 2, 20), date(2026, 2, 25), date(2026, 3, 1))
+        self.assertEqual(
+            self._stats("total_donations", "current_donation_streak", "last_donation_streak_date"),
+            (4, 3, date(2026, 3, 1)),
+        )
+        # An older event arriving late counts, but does not move the streak.
+        self._donate(date(2025, 11, 1))
+        self.assertEqual(
+            self._stats("total_donations", "current_donation_streak", "last_donation_streak_date"),
+            (5, 3, date(2026, 3, 1)),
+        )
+
+    def test_missed_month_restarts_the_streak(self):
+        self._donate(date(2026, 1, 5), date(2026, 2, 5), date(2026, 4, 5))
+        self.assertEqual(self._stats("current_donation_streak", "last_donation_streak_date"), (1, date(2026, 4, 5)))
+
+    def test_replies_fold_into_rate_and_response_time(self):
+        donor_stats.sos_reply(self.donor.id, "pending", "yes", 2.0)
+        donor_stats.sos_reply(self.donor.id, "pending", "no", 4.0)
+        self.assertEqual(
+            self._stats("sos_responses", "response_rate", "average_response_time_hours"), (2, 50.0, 3.0)
+        )
+        # Changing an answer shifts the rate only.
+        donor_stats.sos_reply(self.donor.id, "no", "yes", None)
+        self.assertEqual(self._stats("sos_responses", "response_rate"), (2, 100.0))
+        donor_stats.sos_reply(self.donor.id, "pending", "maybe", 1.0)
+        self.assertEqual(self._stats("sos_responses"), (2,))
+
+    def test_rebuild_agrees_with_incremental_events(self):
+        organizer = User.objects.create_user(username="organizer", password="x")
+        days = (date(2025, 12, 3), date(2026, 1, 5), date(2026, 2, 20), date(2026, 2, 25))
+        for i, day in enumerate(days):
+            drive = DonationDrive.objects.create(
+                title=f"Drive {i}", description="", organizer=organizer, city="Pune",
+                venue_name="Hall", venue_address="Road", start_date=day, end_date=day,
+                start_time=time(9, 0), end_time=time(13, 0), status="completed",
+            )
+            DriveRegistration.objects.create(
+                drive=drive, donor=self.donor, status="attended", donated=True, units_donated=1,
+                donation_completed_at=_at(day),
+            )
+            self._donate(day)
+
+        patient = User.objects.create_user(username="patient", password="x")
+        for answer, hours in (("yes", 1), ("no", 3), ("yes", 5)):
+            request = SOSRequest.objects.create(requester=patient, blood_group_needed="O+", city="Pune")
+            response = SOSResponse.objects.create(request=request, donor=self.donor, response=answer)
+            SOSResponse.objects.filter(pk=response.pk).update(
+                responded_at=response.created_at + timedelta(hours=hours)
+            )
+            donor_stats.sos_reply(self.donor.id, "pending", answer, hours)
+
+        incremental = self._stats(*self.fields)
+        DonorStatistics.objects.filter(donor=self.donor).update(
+            total_donations=0, current_donation_streak=0, last_donation_streak_date=None,
+            sos_responses=0, response_rate=0, average_response_time_hours=0,
+        )
+        donor_stats.rebuild_donor_statistics()
+        rebuilt = self._stats(*self.fields)
+
+        self.assertEqual(rebuilt[:5], incremental[:5])
+        self.assertAlmostEqual(rebuilt[5], incremental[5], places=2)
+        self.assertAlmostEqual(rebuilt[6], incremental[6], places=2)
+        self.assertEqual(incremental[:5], (4, 3, date(2026, 2, 25), 0, 3))
+
+
+class BadgeEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.new = DonorStatistics.objects.create(
+            donor=User.objects.create_user(username="new", password="x"), total_donations=1
+        )
+        self.holder = DonorStatistics.objects.create(
+            donor=User.objects.create_user(username="holder", password="x"),
+            total_donations=5,
+            badges=[Badge.FIRST_DONATION],
+            points=BADGE_POINTS,
+        )
+
+    def test_only_missing_badges_are_awarded_once(self):
+        earned = award_badges(notify=False)
+        self.assertEqual(
+            earned, {self.new.donor_id: [Badge.FIRST_DONATION], self.holder.donor_id: [Badge.FIVE_DONATIONS]}
+        )
+        self.holder.refresh_from_db()
+        self.assertEqual(self.holder.badges, [Badge.FIRST_DONATION, Badge.FIVE_DONATIONS])
+        self.assertEqual(self.holder.points, 2 * BADGE_POINTS)
+
+        # Everyone holds what they qualify for: one query per rule, nothing locked or written.
+        with self.assertNumQueries(len(badge_rules())):
+            self.assertEqual(award_badges(notify=False), {})
+
+    def test_awards_invalidate_the_leaderboard_and_move_the_rank_index(self):
+        rank_index.rebuild()
+        get_top_donors()
+        before = scope_version(["leaderboard"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            award_badges(DonorStatistics.objects.filter(pk=self.new.pk), notify=False)
+
+        self.assertIsNone(cache.get(LEADERBOARD_CACHE_KEY))
+        self.assertNotEqual(scope_version(["leaderboard"]), before)
+        self.assertEqual(rank_index.position(self.new.donor_id)["points"], BADGE_POINTS)
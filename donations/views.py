@@ -4,10 +4,14 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from django.db.models import Q, Avg
 from django.db import models
+from django.contrib.auth.models import User
 
 from accounts.permissions import IsDonor
-from .models import BloodBankInventory, DonorDetails, DonorStatistics, DonorFeedback
-from .serializers import BloodBankInventorySerializer, DonorDetailsSerializer, DonorStatisticsSerializer, LeaderboardSerializer, DonorFeedbackSerializer
+from core.mixins import ConditionalGetMixin
+from .models import BloodBankInventory, DonorDetails, DonorStatistics, DonorFeedback, InventoryForecast
+from .serializers import BloodBankInventorySerializer, DonorDetailsSerializer, DonorStatisticsSerializer, LeaderboardSerializer, DonorFeedbackSerializer, InventorySnapshotSerializer, InventoryForecastSerializer
+from .ranking import get_rank_index
+from .services import LEADERBOARD_SIZE, get_top_donors, ingest_inventory_snapshot
 
 
 class DonorMeView(APIView):
@@ -39,10 +43,37 @@ class BloodBankInventoryViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_permissions(self):
-        if self.action in {"create", "update", "partial_update", "destroy"}:
+        if self.action in {"create", "update", "partial_update", "destroy", "bulk"}:
             return [permissions.IsAdminUser()]
         return super().get_permissions()
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Ingest a whole stock snapshot in one request:
+        {"version": 42, "rows": [{"city": "...", "blood_group": "O+", "units_available": 12}, ...]}
+        """
+
+        ser = InventorySnapshotSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        result = ingest_inventory_snapshot(ser.validated_data["rows"], ser.validated_data["version"])
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def forecast(self, request):
+        """
+        Precomputed days-of-cover per (city, blood group). Pass `shortage=1` for flagged rows only.
+        Refreshed offline by `manage.py forecast_inventory`.
+        """
+
+        qs = InventoryForecast.objects.order_by("days_of_cover", "city", "blood_group")
+        if request.query_params.get("shortage") in {"1", "true"}:
+            qs = qs.filter(shortage_expected=True)
+        city = request.query_params.get("city")
+        if city:
+            qs = qs.filter(city__iexact=city)
+        return Response(InventoryForecastSerializer(qs, many=True).data)
+
 
 class DonorStatisticsView(APIView):
     """
@@ -55,25 +86,29 @@ class DonorStatisticsView(APIView):
         return Response(DonorStatisticsSerializer(stats).data)
 
 
-class LeaderboardViewSet(viewsets.ViewSet):
+class LeaderboardViewSet(ConditionalGetMixin, viewsets.ViewSet):
     """
     Public leaderboard of top donors
     """
     permission_classes = [permissions.AllowAny]
+    # The badge catalogue only changes with the code.
+    conditional_actions = ('badges',)
+    
+    def get_version_querysets(self):
+        return []
+    
+    def get_version_extra(self):
+        from .models import Badge
+        return repr(Badge.choices)
 
     @action(detail=False, methods=['get'])
     def top_donors(self, request):
-        """Get top 100 donors by points"""
-        limit = int(request.query_params.get('limit', 100))
-        stats = DonorStatistics.objects.filter(points__gt=0).order_by('-points')[:limit]
-        
-        # Update ranks
-        for idx, stat in enumerate(stats, 1):
-            stat.rank = idx
-            stat.save()
-        
-        serializer = LeaderboardSerializer(stats, many=True)
-        return Response(serializer.data)
+        """Get top 100 donors by points (ranks are materialized by `rank_leaderboard`)"""
+        try:
+            limit = int(request.query_params.get('limit', LEADERBOARD_SIZE))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_top_donors(max(1, min(limit, LEADERBOARD_SIZE))))
 
     @action(detail=False, methods=['get'])
     def by_city(self, request):
@@ -85,7 +120,7 @@ class LeaderboardViewSet(viewsets.ViewSet):
         stats = DonorStatistics.objects.filter(
             points__gt=0,
             donor__donor_details__city__iexact=city
-        ).order_by('-points')[:50]
+        ).select_related('donor', 'donor__donor_details').order_by('-points')[:50]
         
         serializer = LeaderboardSerializer(stats, many=True)
         return Response(serializer.data)
@@ -100,11 +135,40 @@ class LeaderboardViewSet(viewsets.ViewSet):
         stats = DonorStatistics.objects.filter(
             points__gt=0,
             donor__donor_details__blood_group=blood_group
-        ).order_by('-points')[:50]
+        ).select_related('donor', 'donor__donor_details').order_by('-points')[:50]
         
         serializer = LeaderboardSerializer(stats, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsDonor])
+    def me(self, request):
+        """
+        Current donor's rank, percentile and the donors around them.
+        Query params: scope=all|city|blood_group (default all), window=1..20 (default 5)
+        """
+        scope = request.query_params.get('scope', 'all')
+        if scope not in ('all', 'city', 'blood_group'):
+            return Response({"error": "scope must be one of all, city, blood_group"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window = max(1, min(int(request.query_params.get('window', 5)), 20))
+        except ValueError:
+            return Response({"error": "window must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        position = get_rank_index().position(request.user.id, scope=scope, window=window)
+        if position is None:
+            return Response({"detail": "No leaderboard statistics for this donor yet."}, status=status.HTTP_404_NOT_FOUND)
+
+        # One query for the neighbours' display names.
+        neighbours = position['above'] + position['below']
+        names = {
+            user_id: (first + ' ' + last).strip()
+            for user_id, first, last in User.objects.filter(id__in=[n['donor_id'] for n in neighbours])
+            .values_list('id', 'first_name', 'last_name')
+        }
+        for row in neighbours:
+            row['donor_name'] = names.get(row['donor_id'], '')
+        return Response(position)
+
     @action(detail=False, methods=['get'])
     def badges(self, request):
         """Get all available badges with descriptions"""
@@ -0,0 +1,106 @@
+"""
+Donor availability over date ranges, for many donors at once.
+
+`resolve_availability()` loads every specific-date slot in the range and every
+recurring weekday slot for the donors with one query, then builds one integer
+bitmap per donor: bit `i` is set when the donor is available on `start + i days`.
+The rules are those of the single-date check:
+
+* a slot on the exact date decides that day;
+* otherwise a recurring slot for the weekday decides it;
+* otherwise the donor is available.
+
+When several slots apply to the same day, any "unavailable" or "vacation" slot
+wins over "available", so a donor on vacation is never treated as reachable.
+Donors without slots are simply absent from `bitmaps` and read as available.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.db.models import Q
+
+MAX_DAYS = 366
+MAX_DONORS = 1000
+
+
+@dataclass
+class AvailabilityMap:
+    start: date
+    days: int
+    bitmaps: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def full(self) -> int:
+        return (1 << self.days) - 1
+
+    def bitmap(self, donor_id: int) -> int:
+        return self.bitmaps.get(donor_id, self.full)
+
+    def _bit(self, day: date) -> int:
+        offset = (day - self.start).days
+        if not 0 <= offset < self.days:
+            raise ValueError(f"{day} is outside the resolved range")
+        return 1 << offset
+
+    def is_available(self, donor_id: int, day: date) -> bool:
+        return bool(self.bitmap(donor_id) & self._bit(day))
+
+    def unavailable_on(self, day: date) -> set[int]:
+        """Donors (among those with slots) who are not available on `day`."""
+        bit = self._bit(day)
+        return {donor_id for donor_id, bitmap in self.bitmaps.items() if not bitmap & bit}
+
+    def as_string(self, donor_id: int) -> str:
+        """The bitmap as "1"/"0" per day, first day first."""
+        bitmap = self.bitmap(donor_id)
+        return "".join("1" if bitmap >> offset & 1 else "0" for offset in range(self.days))
+
+
+def resolve_availability(donor_ids: Iterable[int], start: date, end: date) -> AvailabilityMap:
+    """
+    Availability of `donor_ids` (a list of ids or a `values("pk")`-style queryset,
+    used as a subquery) on every day from `start` to `end` inclusive, in one query.
+    """
+
+    from .models import DonorAvailabilitySlot
+
+    days = (end - start).days + 1
+    if days < 1:
+        raise ValueError("end must not be before start")
+    result = AvailabilityMap(start=start, days=days)
+
+    # weekday -> bits of the days in range falling on that weekday
+    weekday_bits = [0] * 7
+    for offset in range(days):
+        weekday_bits[(start + timedelta(days=offset)).weekday()] |= 1 << offset
+
+    rows = DonorAvailabilitySlot.objects.filter(
+        Q(date__range=(start, end)) | Q(is_recurring=True, day_of_week__isnull=False),
+        donor_id__in=donor_ids,
+    ).values_list("donor_id", "date", "is_recurring", "day_of_week", "availability_type").order_by()
+
+    # donor -> {weekday: available} and {date: available}; a restriction wins over "available".
+    recurring: dict[int, dict[int, bool]] = {}
+    specific: dict[int, dict[date, bool]] = {}
+    for donor_id, day, is_recurring, day_of_week, availability_type in rows:
+        available = availability_type == "available"
+        if day is not None and start <= day <= end:
+            by_date = specific.setdefault(donor_id, {})
+            by_date[day] = by_date.get(day, True) and available
+        elif is_recurring and day_of_week is not None:
+            by_weekday = recurring.setdefault(donor_id, {})
+            by_weekday[day_of_week] = by_weekday.get(day_of_week, True) and available
+
+    for donor_id in recurring.keys() | specific.keys():
+        bitmap = result.full
+        for weekday, available in recurring.get(donor_id, {}).items():
+            if not available:
+                bitmap &= ~weekday_bits[weekday]
+        for day, available in specific.get(donor_id, {}).items():
+            bit = 1 << (day - start).days
+            bitmap = bitmap | bit if available else bitmap & ~bit
+        result.bitmaps[donor_id] = bitmap
+    return result
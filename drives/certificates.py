@@ -0,0 +1,246 @@
+"""
+Donation certificate PDFs.
+
+Rendering is a pure function from a small dict to PDF bytes (a one-page PDF written
+directly, with the verification QR drawn as vector squares), so it can run in worker
+processes: `generate_certificates()` builds the payloads with one query, renders them
+in a `ProcessPoolExecutor` and writes each file once under
+`MEDIA_ROOT/certificates/<sha256[:2]>/<sha256>.pdf`. Identical output is stored once
+and the hash doubles as the download ETag.
+
+This module imports no models at import time, so worker processes can load it
+without setting Django up.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 landscape, in points
+QR_SIZE = 130
+BRAND_RGB = "0.725 0.110 0.110"
+STORAGE_DIR = "certificates"
+
+
+def _text(value) -> str:
+    value = str(value).encode("latin-1", "replace").decode("latin-1")
+    return value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _line(font: str, size: int, x: float, y: float, value) -> str:
+    return f"BT /{font} {size} Tf 1 0 0 1 {x} {y} Tm ({_text(value)}) Tj ET"
+
+
+def _qr_ops(data: str, x0: float, y0: float, size: float) -> list[str]:
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+    code.add_data(data)
+    code.make(fit=True)
+    matrix = code.get_matrix()
+    module = size / len(matrix)
+    ops = ["0 0 0 rg"]
+    for row, cells in enumerate(matrix):
+        y = y0 + (len(matrix) - 1 - row) * module
+        col = 0
+        while col < len(cells):
+            if not cells[col]:
+                col += 1
+                continue
+            start = col
+            while col < len(cells) and cells[col]:
+                col += 1
+            # One rectangle per horizontal run of dark modules.
+            ops.append(f"{x0 + start * module:.3f} {y:.3f} {(col - start) * module:.3f} {module:.3f} re")
+    ops.append("f")
+    return ops
+
+
+def render_certificate_pdf(payload: dict) -> bytes:
+    """
+    One-page certificate. `payload` keys: certificate_number, donor_name, blood_group,
+    units_donated, donation_date, location, qr_code_data. Output is deterministic.
+    """
+
+    units = payload["units_donated"]
+    ops = [
+        f"{BRAND_RGB} RG 4 w 24 24 {PAGE_WIDTH - 48} {PAGE_HEIGHT - 48} re S",
+        f"{BRAND_RGB} rg",
+        _line("F2", 34, 60, 480, "Certificate of Blood Donation"),
+        "0.2 0.2 0.2 rg",
+        _line("F1", 16, 60, 420, "This certifies that"),
+        f"{BRAND_RGB} rg",
+        _line("F2", 28, 60, 380, payload["donor_name"]),
+        "0.2 0.2 0.2 rg",
+        _line("F1", 16, 60, 335, f"donated {units} unit{'s' if units != 1 else ''} of blood"
+              + (f" (group {payload['blood_group']})" if payload["blood_group"] else "")),
+        _line("F1", 16, 60, 310, f"on {payload['donation_date']} at {payload['location']}."),
+        _line("F1", 14, 60, 250, "Thank you for saving lives."),
+        _line("F1", 11, 60, 70, f"Certificate No. {payload['certificate_number']}"),
+        _line("F1", 11, 60, 54, "VeinLine"),
+    ]
+    qr_x, qr_y = PAGE_WIDTH - 60 - QR_SIZE, 70
+    ops += _qr_ops(payload["qr_code_data"], qr_x, qr_y, QR_SIZE)
+    ops.append("0.2 0.2 0.2 rg")
+    ops.append(_line("F1", 9, qr_x + 30, qr_y - 14, "Scan to verify"))
+    content = "\n".join(ops).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            "/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>"
+        ).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def storage_path(digest: str) -> str:
+    """MEDIA_ROOT-relative path of the PDF with this sha256."""
+    return f"{STORAGE_DIR}/{digest[:2]}/{digest}.pdf"
+
+
+def store_pdf(pdf: bytes) -> str:
+    """Write `pdf` under MEDIA_ROOT by content hash (once) and return the hash."""
+
+    digest = hashlib.sha256(pdf).hexdigest()
+    path = Path(settings.MEDIA_ROOT) / storage_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(pdf)
+        os.replace(tmp, path)  # Atomic: concurrent writers of the same hash are harmless.
+    return digest
+
+
+def certificate_payload(certificate) -> dict:
+    donor = certificate.donor
+    return {
+        "certificate_number": certificate.certificate_number,
+        "donor_name": donor.get_full_name() or donor.username,
+        "blood_group": certificate.blood_group,
+        "units_donated": certificate.units_donated,
+        "donation_date": certificate.donation_date.strftime("%d %B %Y"),
+        "location": certificate.location,
+        "qr_code_data": certificate.qr_code_data,
+    }
+
+
+def _workers() -> int:
+    return getattr(settings, "VEINLINE_CERTIFICATE_WORKERS", 0) or os.cpu_count() or 1
+
+
+def generate_certificates(certificates=None, workers: int | None = None) -> int:
+    """
+    Render and store PDFs for the `certificates` queryset (default: every certificate
+    not generated yet), rendering in a process pool when there is more than one, then
+    record the hash/URL with one `bulk_update`. Returns the number written.
+    """
+
+    from .models import DonationCertificate
+
+    if certificates is None:
+        certificates = DonationCertificate.objects.filter(is_generated=False)
+    certificates = list(certificates.select_related("donor"))
+    if not certificates:
+        return 0
+
+    payloads = [certificate_payload(certificate) for certificate in certificates]
+    workers = _workers() if workers is None else workers
+    if workers > 1 and len(payloads) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as pool:
+            pdfs = list(pool.map(render_certificate_pdf, payloads, chunksize=max(1, len(payloads) // (workers * 4))))
+    else:
+        pdfs = [render_certificate_pdf(payload) for payload in payloads]
+
+    for certificate, pdf in zip(certificates, pdfs):
+        certificate.pdf_sha256 = store_pdf(pdf)
+        url = settings.MEDIA_URL + storage_path(certificate.pdf_sha256)
+        certificate.pdf_url = url if url.startswith(("/", "http://", "https://")) else "/" + url
+        certificate.is_generated = True
+    DonationCertificate.objects.bulk_update(certificates, ["pdf_sha256", "pdf_url", "is_generated"], batch_size=500)
+    return len(certificates)
+
+
+def assign_certificate_numbers(certificates) -> None:
+    """
+    Give each certificate a random number not used by any other certificate, checked
+    against the table in one query per round, so one collision of the short random
+    part cannot fail the whole `bulk_create`.
+    """
+
+    from .models import DonationCertificate
+
+    taken: set[str] = set()
+    pending = list(certificates)
+    while pending:
+        for certificate in pending:
+            certificate.certificate_number = certificate.generate_certificate_number()
+        numbers = [certificate.certificate_number for certificate in pending]
+        existing = DonationCertificate.objects.filter(certificate_number__in=numbers)
+        taken.update(existing.values_list("certificate_number", flat=True))
+        collided = []
+        for certificate in pending:
+            if certificate.certificate_number in taken:
+                collided.append(certificate)
+            else:
+                taken.add(certificate.certificate_number)
+        pending = collided
+
+
+def issue_drive_certificates(drive, workers: int | None = None, render: bool = True) -> int:
+    """
+    Create a certificate for every registration in `drive` that donated and has none
+    yet, then (unless `render=False`) generate all their PDFs in one batch. Returns the
+    number issued.
+    """
+
+    from .models import DonationCertificate, DriveRegistration
+    from .verification import qr_code_data
+
+    registrations = (
+        DriveRegistration.objects.filter(drive=drive, donated=True, certificate__isnull=True)
+        .select_related("donor__donor_details")
+    )
+    location = f"{drive.venue_name}, {drive.city}"
+    issued = []
+    for registration in registrations:
+        details = getattr(registration.donor, "donor_details", None)
+        certificate = DonationCertificate(
+            donor=registration.donor,
+            drive_registration=registration,
+            donation_date=(registration.donation_completed_at.date() if registration.donation_completed_at else drive.start_date),
+            blood_group=getattr(details, "blood_group", "") or "",
+            units_donated=registration.units_donated or 1,
+            location=location[:200],
+        )
+        issued.append(certificate)
+    if not issued:
+        return 0
+
+    assign_certificate_numbers(issued)
+    for certificate in issued:
+        certificate.qr_code_data = qr_code_data(certificate)
+    DonationCertificate.objects.bulk_create(issued, batch_size=500)
+    if render:
+        numbers = [certificate.certificate_number for certificate in issued]
+        generate_certificates(DonationCertificate.objects.filter(certificate_number__in=numbers), workers=workers)
+    return len(issued)
@@ -0,0 +1,30 @@
+"""
+Issue and render donation certificate PDFs in a process pool.
+Usage: python manage.py generate_certificates [--drive ID] [--workers N]
+
+With --drive, certificates are first issued for every donor of that drive who has none;
+without it, every certificate whose PDF has not been generated yet is rendered.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from drives.certificates import generate_certificates, issue_drive_certificates
+from drives.models import DonationDrive
+
+
+class Command(BaseCommand):
+    help = 'Render pending donation certificate PDFs (content-addressed under MEDIA_ROOT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drive', type=int, help='Issue certificates for this drive first')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        if options['drive']:
+            drive = DonationDrive.objects.filter(pk=options['drive']).first()
+            if drive is None:
+                raise CommandError(f"Drive {options['drive']} not found")
+            issued = issue_drive_certificates(drive, workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Issued {issued} certificate(s) for "{drive.title}"'))
+        generated = generate_certificates(workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Generated {generated} pending certificate PDF(s)'))
@@ -0,0 +1,27 @@
+"""
+Send pending drive registration confirmations and reminders for drives starting soon.
+Usage: python manage.py send_drive_notifications [--hours=24] [--batch-size=500]
+
+Idempotent: registrations are stamped with confirmation_sent_at / reminder_sent_at and
+skipped on the next run, so it is safe to run every minute from cron.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from drives.services import send_due_drive_notifications
+
+
+class Command(BaseCommand):
+    help = 'Send due drive registration confirmations and reminders in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Reminder lead time in hours (default: 24)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        sent = send_due_drive_notifications(lead=timedelta(hours=options['hours']), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Sent {sent['confirmations']} confirmation(s) and {sent['reminders']} reminder(s)"
+        ))
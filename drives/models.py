@@ -3,6 +3,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from datetime import datetime
 
+from core.constants import WaitlistStatus
+
 
 class DriveStatus(models.TextChoices):
     DRAFT = "draft", "Draft"
@@ -63,6 +65,7 @@ class DonationDrive(models.Model):
         indexes = [
             models.Index(fields=['city', 'status', 'start_date']),
             models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['latitude', 'longitude']),
         ]
     
     def __str__(self) -> str:
@@ -123,6 +126,29 @@ class DriveRegistration(models.Model):
         return f"{self.donor.username} -> {self.drive.title} ({self.status})"
 
 
+class DriveWaitlistEntry(models.Model):
+    """FIFO waitlist for a full drive; the head is registered when someone cancels"""
+    
+    drive = models.ForeignKey(DonationDrive, on_delete=models.CASCADE, related_name="waitlist")
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="drive_waitlist_entries")
+    status = models.CharField(max_length=16, choices=WaitlistStatus.choices, default=WaitlistStatus.WAITING)
+    registration = models.ForeignKey(DriveRegistration, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    
+    joined_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = "Drive Waitlist Entries"
+        unique_together = ('drive', 'donor')
+        ordering = ['joined_at', 'id']
+        indexes = [
+            models.Index(fields=['drive', 'status', 'joined_at', 'id'], name='drive_waitlist_head_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.donor.username} waiting for {self.drive.title} ({self.status})"
+
+
 class DonationCertificate(models.Model):
     """Donation certificates for donors"""
     
@@ -144,10 +170,15 @@ class DonationCertificate(models.Model):
     # QR code for verification
     qr_code_data = models.TextField(help_text="QR code content for verification")
     
-    # PDF generation
+    # PDF generation (drives.certificates); the file lives at MEDIA_ROOT/certificates/<sha256>
     pdf_url = models.URLField(blank=True)
+    pdf_sha256 = models.CharField(max_length=64, blank=True)
     is_generated = models.BooleanField(default=False)
     
+    # Revocation (verification stays stateless otherwise; see drives.verification)
+    is_revoked = models.BooleanField(default=False)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    
     # Sharing
     share_count = models.PositiveIntegerField(default=0)
     
@@ -174,6 +205,9 @@ class DonationCertificate(models.Model):
     def save(self, *args, **kwargs):
         if not self.certificate_number:
             self.certificate_number = self.generate_certificate_number()
+        if not self.qr_code_data:
+            from .verification import qr_code_data
+            self.qr_code_data = qr_code_data(self)
         super().save(*args, **kwargs)
 
 
@@ -78,7 +78,16 @@ class DriveRegistrationSerializer(serializers.ModelSerializer):
             'drive_title',
             'drive_details',
         ]
-        read_only_fields = ['id', 'donor', 'registered_at', 'updated_at', 'reminder_sent_at', 'confirmation_sent_at']
+        # Status and donation changes go through register/cancel/attend, which keep seats and counters.
+        read_only_fields = [
+            'id', 'donor', 'status', 'donated', 'units_donated', 'donation_completed_at',
+            'registered_at', 'updated_at', 'reminder_sent_at', 'confirmation_sent_at',
+        ]
+
+    def validate_drive(self, drive):
+        if self.instance is not None and drive.pk != self.instance.drive_id:
+            raise serializers.ValidationError('A registration cannot be moved to another drive.')
+        return drive
 
 
 class DonationCertificateSerializer(serializers.ModelSerializer):
@@ -100,10 +109,12 @@ class DonationCertificateSerializer(serializers.ModelSerializer):
             'qr_code_data',
             'pdf_url',
             'is_generated',
+            'is_revoked',
+            'revoked_at',
             'share_count',
             'issued_at',
         ]
-        read_only_fields = ['id', 'donor', 'certificate_number', 'qr_code_data', 'issued_at']
+        read_only_fields = ['id', 'donor', 'certificate_number', 'qr_code_data', 'pdf_url', 'is_generated', 'is_revoked', 'revoked_at', 'issued_at']
 
 
 class DonorAvailabilitySlotSerializer(serializers.ModelSerializer):
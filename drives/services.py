@@ -0,0 +1,284 @@
+"""
+Drive registration, cancellation and the drive waitlist.
+
+`current_registrations` is only ever changed with conditional `UPDATE`s
+(`... + 1 WHERE current_registrations < max_participants`), in the same transaction
+as the registration row, so concurrent requests cannot overfill a drive. The row is
+inserted directly and a duplicate is detected by the unique (drive, donor)
+constraint, never by a prior `exists()` check. A
+cancellation releases one seat and promotes the head of the drive's FIFO waitlist in
+that transaction; the entry is claimed with `UPDATE ... WHERE status = 'waiting'`, so
+two concurrent cancels never promote the same donor.
+
+Confirmations and reminders are not sent on the request path: `send_due_drive_notifications`
+(run from cron) picks up registrations whose `confirmation_sent_at` / `reminder_sent_at`
+is still empty, batch by batch.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import stats as drive_stats
+from .models import (
+    DonationDrive,
+    DriveRegistration,
+    DriveStatus,
+    DriveWaitlistEntry,
+    RegistrationStatus,
+    WaitlistStatus,
+)
+
+ACTIVE_STATUSES = (RegistrationStatus.REGISTERED, RegistrationStatus.CONFIRMED)
+NOTIFIABLE_DRIVE_STATUSES = (DriveStatus.PUBLISHED, DriveStatus.ONGOING)
+
+
+class RegistrationError(Exception):
+    """Registration or cancellation was refused; the message is safe to show to the user."""
+
+
+class DriveFullError(RegistrationError):
+    """No seat left in the drive (the donor can join its waitlist instead)."""
+
+
+def take_drive_seat(drive_id: int) -> bool:
+    return bool(
+        DonationDrive.objects.filter(pk=drive_id, current_registrations__lt=F("max_participants")).update(
+            current_registrations=F("current_registrations") + 1, updated_at=timezone.now()
+        )
+    )
+
+
+def release_drive_seat(drive_id: int) -> bool:
+    return bool(
+        DonationDrive.objects.filter(pk=drive_id, current_registrations__gt=0).update(
+            current_registrations=F("current_registrations") - 1, updated_at=timezone.now()
+        )
+    )
+
+
+def register_for_drive(drive: DonationDrive, donor) -> DriveRegistration:
+    """Take one seat in `drive` for `donor` and create (or re-open a cancelled) registration."""
+
+    with transaction.atomic():
+        # The seat is taken first, so a full drive is refused before any insert and the
+        # drive row lock orders concurrent registrations.
+        if not take_drive_seat(drive.pk):
+            raise DriveFullError("Drive is full")
+        try:
+            with transaction.atomic():
+                return DriveRegistration.objects.create(drive=drive, donor=donor, status=RegistrationStatus.REGISTERED)
+        except IntegrityError:
+            pass  # unique (drive, donor): the donor has a registration already.
+
+        reopened = DriveRegistration.objects.filter(
+            drive=drive, donor=donor, status=RegistrationStatus.CANCELLED
+        ).update(
+            # A fresh registration: the cancelled one's donation no longer counts (see snapshot()).
+            status=RegistrationStatus.REGISTERED,
+            donated=False,
+            units_donated=0,
+            donation_completed_at=None,
+            reminder_sent_at=None,
+            confirmation_sent_at=None,
+            updated_at=timezone.now(),
+        )
+        if not reopened:
+            raise RegistrationError("Already registered")  # Rolls the seat back.
+        return DriveRegistration.objects.get(drive=drive, donor=donor)
+
+
+def cancel_registration(registration: DriveRegistration) -> DriveRegistration:
+    """Cancel a registration and release its seat, exactly once."""
+
+    with transaction.atomic():
+        current = (
+            DriveRegistration.objects.select_for_update()
+            .filter(pk=registration.pk)
+            .exclude(status=RegistrationStatus.CANCELLED)
+            .values_list("status", "donated", "units_donated")
+            .first()
+        )
+        if current is None:
+            raise RegistrationError("Already cancelled")
+        DriveRegistration.objects.filter(pk=registration.pk).update(
+            status=RegistrationStatus.CANCELLED, updated_at=timezone.now()
+        )
+        drive_stats.registration_changed(
+            registration.drive_id,
+            drive_stats.snapshot(*current),
+            drive_stats.snapshot(RegistrationStatus.CANCELLED, *current[1:]),
+        )
+        release_drive_seat(registration.drive_id)
+        promote_drive_waitlist(registration.drive)
+    registration.refresh_from_db()
+    return registration
+
+
+def record_attendance(registration: DriveRegistration, donated: bool, units_donated: int = 1) -> DriveRegistration:
+    """
+    Mark a registration attended (and donated, with its units) and move the drive's
+    counters by the difference. The donor's statistics count the first recorded
+    donation only.
+    """
+
+    from donations import stats as donor_stats
+
+    with transaction.atomic():
+        registration = DriveRegistration.objects.select_for_update().get(pk=registration.pk)
+        if registration.status == RegistrationStatus.CANCELLED:
+            raise RegistrationError("Registration is cancelled")
+        before = drive_stats.snapshot(registration.status, registration.donated, registration.units_donated)
+        newly_donated = donated and not registration.donated
+
+        registration.status = RegistrationStatus.ATTENDED
+        if donated:
+            registration.donated = True
+            registration.units_donated = units_donated
+            registration.donation_completed_at = registration.donation_completed_at or timezone.now()
+        registration.save(update_fields=["status", "donated", "units_donated", "donation_completed_at", "updated_at"])
+        drive_stats.registration_changed(
+            registration.drive_id,
+            before,
+            drive_stats.snapshot(registration.status, registration.donated, registration.units_donated),
+        )
+        if newly_donated:
+            donor_stats.donation_completed(registration.donor_id, registration.donation_completed_at)
+    return registration
+
+
+def _waiting(drive_id: int):
+    return DriveWaitlistEntry.objects.filter(drive_id=drive_id, status=WaitlistStatus.WAITING)
+
+
+def waitlist_position(entry: DriveWaitlistEntry) -> int | None:
+    """1-based FIFO position of a waiting entry, None once it has left the queue."""
+
+    if entry.status != WaitlistStatus.WAITING:
+        return None
+    ahead = _waiting(entry.drive_id).filter(
+        Q(joined_at__lt=entry.joined_at) | Q(joined_at=entry.joined_at, id__lt=entry.id)
+    )
+    return ahead.count() + 1
+
+
+def join_drive_waitlist(drive: DonationDrive, donor) -> DriveWaitlistEntry:
+    """Queue `donor` for a full drive (re-joining puts them at the back of the queue)."""
+
+    if not drive.is_full():
+        raise RegistrationError("Drive still has free places; register directly")
+    if DriveRegistration.objects.filter(drive=drive, donor=donor).exclude(status=RegistrationStatus.CANCELLED).exists():
+        raise RegistrationError("Already registered")
+
+    with transaction.atomic():
+        entry, created = DriveWaitlistEntry.objects.select_for_update().get_or_create(drive=drive, donor=donor)
+        if created:
+            return entry
+        if entry.status == WaitlistStatus.WAITING:
+            raise RegistrationError("Already on the waitlist")
+        entry.delete()
+        return DriveWaitlistEntry.objects.create(drive=drive, donor=donor)
+
+
+def leave_drive_waitlist(drive: DonationDrive, donor) -> bool:
+    """Remove `donor` from the queue; False if they were not waiting."""
+
+    return bool(_waiting(drive.pk).filter(donor=donor).update(status=WaitlistStatus.LEFT))
+
+
+def promote_drive_waitlist(drive: DonationDrive) -> DriveRegistration | None:
+    """
+    Register the donor at the head of `drive`'s waitlist into a freed seat. Must run
+    inside the transaction that released the seat; entries whose donor is already
+    registered are skipped.
+    """
+
+    from notifications.models import NotificationType
+    from notifications.services import NotificationService
+
+    while True:
+        head = _waiting(drive.pk).select_related("donor").order_by("joined_at", "id").first()
+        if head is None:
+            return None
+        # Claim the entry; a concurrent cancel that got here first makes this a no-op.
+        if not _waiting(drive.pk).filter(pk=head.pk).update(status=WaitlistStatus.PROMOTED, promoted_at=timezone.now()):
+            continue
+        try:
+            registration = register_for_drive(drive, head.donor)  # Its own savepoint.
+        except DriveFullError:
+            # Seat already re-taken; put the entry back at the head of the queue.
+            DriveWaitlistEntry.objects.filter(pk=head.pk).update(status=WaitlistStatus.WAITING, promoted_at=None)
+            return None
+        except (RegistrationError, IntegrityError):
+            DriveWaitlistEntry.objects.filter(pk=head.pk).update(status=WaitlistStatus.SKIPPED)
+            continue
+
+        DriveWaitlistEntry.objects.filter(pk=head.pk).update(registration=registration)
+        # The promotion notice below is the confirmation; keep the batch sender off it.
+        DriveRegistration.objects.filter(pk=registration.pk).update(confirmation_sent_at=timezone.now())
+        transaction.on_commit(
+            lambda: NotificationService.notify_custom(
+                head.donor,
+                f"Registration Confirmed: {drive.title}",
+                f"A place opened up and you were moved off the waitlist for {drive.title} on {drive.start_date}.",
+                notification_type=NotificationType.APPOINTMENT_CONFIRMED,
+                priority="high",
+                content_object=registration,
+            )
+        )
+        return registration
+
+
+def _send_batches(due, field: str, reminder: bool, now, batch_size: int) -> int:
+    from notifications.services import NotificationService
+
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due.select_for_update(skip_locked=True, of=("self",))[:batch_size])
+            if not batch:
+                break
+            notifications = NotificationService.notify_drive_registrations_bulk(batch, reminder=reminder, deliver=False)
+            for registration in batch:
+                setattr(registration, field, now)
+            DriveRegistration.objects.bulk_update(batch, [field])
+        NotificationService.deliver_bulk(notifications)
+        sent += len(batch)
+        if len(batch) < batch_size:
+            break
+    return sent
+
+
+def send_due_drive_notifications(now=None, lead: timedelta = timedelta(hours=24), batch_size: int = 500) -> dict:
+    """
+    Send the pending registration confirmations for upcoming drives, then the reminder
+    for every active registration whose drive starts within `lead`. Each batch is one
+    query (ordered by drive, so a drive's registrations go out together), is locked
+    with SKIP LOCKED where supported, gets its in-app notifications in one INSERT and
+    its timestamp in one `bulk_update`; SMS/email go out over pooled connections
+    after the batch commits. Returns {"confirmations": n, "reminders": n}.
+    """
+
+    now = timezone.localtime(now or timezone.now())
+    horizon = now + lead
+    active = DriveRegistration.objects.filter(
+        status__in=ACTIVE_STATUSES, drive__status__in=NOTIFIABLE_DRIVE_STATUSES
+    ).select_related("drive", "donor__profile").order_by("drive_id", "pk")
+
+    upcoming = Q(drive__start_date__gt=now.date()) | Q(drive__start_date=now.date(), drive__start_time__gt=now.time())
+    # Drive date/time are local wall-clock values; compared field by field to stay in SQL.
+    within_lead = upcoming & (
+        Q(drive__start_date__lt=horizon.date())
+        | Q(drive__start_date=horizon.date(), drive__start_time__lte=horizon.time())
+    )
+    return {
+        "confirmations": _send_batches(
+            active.filter(upcoming, confirmation_sent_at__isnull=True), "confirmation_sent_at", False, now, batch_size
+        ),
+        "reminders": _send_batches(
+            active.filter(within_lead, reminder_sent_at__isnull=True), "reminder_sent_at", True, now, batch_size
+        ),
+    }
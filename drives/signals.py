@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .certificates import issue_drive_certificates
+from .models import DonationDrive, DriveStatus
+
+
+@receiver(pre_save, sender=DonationDrive)
+def remember_drive_status(sender, instance, **kwargs):
+    instance._previous_status = (
+        DonationDrive.objects.filter(pk=instance.pk).values_list("status", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=DonationDrive)
+def drive_completed(sender, instance, **kwargs):
+    # Certificates for the whole drive are issued when it completes. Only the rows are
+    # created here, inside the request: the PDFs are rendered in a process pool by
+    # `manage.py generate_certificates`, or one at a time on first download.
+    if instance.status == DriveStatus.COMPLETED and getattr(instance, "_previous_status", None) != DriveStatus.COMPLETED:
+        transaction.on_commit(lambda: issue_drive_certificates(instance, render=False))
@@ -0,0 +1,354 @@
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from datetime import date, datetime, time, timedelta
+from time import sleep
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from donations.models import DonorDetails
+from notifications.models import Notification
+from sos.models import SOSRequest
+from sos.services import match_donors_for_request
+from .availability import resolve_availability
+from .certificates import issue_drive_certificates
+from .models import DonationCertificate, DonationDrive, DonorAvailabilitySlot, DriveRegistration
+from .services import (
+    DriveFullError,
+    RegistrationError,
+    cancel_registration,
+    record_attendance,
+    register_for_drive,
+    send_due_drive_notifications,
+)
+from .stats import Snapshot, reconcile_drive_stats, registration_changed
+from .verification import RevocationFilter, revocations
+
+
+def _drive(max_participants=1):
+    organizer, _ = User.objects.get_or_create(username="organizer")
+    day = timezone.localdate() + timedelta(days=7)
+    return DonationDrive.objects.create(
+        title="City Drive",
+        description="Community drive",
+        organizer=organizer,
+        city="Pune",
+        venue_name="Town Hall",
+        venue_address="Main Road",
+        start_date=day,
+        end_date=day,
+        start_time=time(9, 0),
+        end_time=time(13, 0),
+        max_participants=max_participants,
+        status="published",
+    )
+
+
+class DriveRegistrationTests(TestCase):
+    def setUp(self):
+        self.drive = _drive(max_participants=1)
+        self.donor = User.objects.create_user(username="donor", password="x")
+        self.other = User.objects.create_user(username="other", password="x")
+
+    def test_full_drive_refuses_and_cancel_releases_once(self):
+        registration = register_for_drive(self.drive, self.donor)
+        with self.assertRaises(DriveFullError):
+            register_for_drive(self.drive, self.other)
+
+        cancel_registration(registration)
+        with self.assertRaises(RegistrationError):
+            cancel_registration(registration)
+        self.drive.refresh_from_db()
+        self.assertEqual(self.drive.current_registrations, 0)
+
+        reopened = register_for_drive(self.drive, self.donor)
+        self.assertEqual((reopened.pk, reopened.status), (registration.pk, "registered"))
+        with self.assertRaises(RegistrationError):
+            register_for_drive(self.drive, self.donor)
+        self.drive.refresh_from_db()
+        self.assertEqual(self.drive.current_registrations, 1)
+
+    def test_updates_cannot_bypass_seat_accounting(self):
+        registration = register_for_drive(self.drive, self.donor)
+        cancel_registration(registration)
+        register_for_drive(self.drive, self.other)
+        client = APIClient()
+        client.force_authenticate(self.donor)
+        url = f"/api/drive-registrations/{registration.pk}/"
+
+        response = client.patch(url, {"status": "registered", "donated": True, "notes": "hi"}, SERVER_NAME="localhost")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["status"], response.data["donated"]), ("cancelled", False))
+        other_drive = _drive(max_participants=1)
+        response = client.patch(url, {"drive": other_drive.pk}, SERVER_NAME="localhost")
+        self.assertEqual(response.status_code, 400)
+
+        registration.refresh_from_db()
+        self.assertEqual((registration.drive_id, registration.notes), (self.drive.pk, "hi"))
+        self.drive.refresh_from_db()
+        self.assertEqual(self.drive.current_registrations, 1)
+
+
+class DriveStatsTests(TestCase):
+    def setUp(self):
+        self.drive = _drive(max_participants=5)
+        self.a, self.b, self.c = (
+            register_for_drive(self.drive, User.objects.create_user(username=n, password="x")) for n in "abc"
+        )
+
+    def counters(self):
+        self.drive.refresh_from_db()
+        return (self.drive.total_donors_attended, self.drive.total_successful_donations, self.drive.units_collected)
+
+    def test_check_ins_and_cancellations_move_counters(self):
+        record_attendance(self.a, donated=True, units_donated=1)
+        record_attendance(self.b, donated=True, units_donated=2)
+        record_attendance(self.b, donated=True, units_donated=1)  # Corrected on the spot.
+        record_attendance(self.c, donated=False)
+        self.assertEqual(self.counters(), (3, 2, 2))
+
+        cancel_registration(self.a)
+        self.assertEqual(self.counters(), (2, 1, 1))
+
+    def test_registering_again_after_cancelling_a_donation_starts_afresh(self):
+        record_attendance(self.a, donated=True, units_donated=2)
+        cancel_registration(self.a)
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+        reopened = register_for_drive(self.drive, self.a.donor)
+        self.assertEqual((reopened.donated, reopened.units_donated, reopened.donation_completed_at), (False, 0, None))
+        record_attendance(reopened, donated=True, units_donated=1)
+        self.assertEqual(self.counters(), (1, 1, 1))
+        self.assertEqual(reconcile_drive_stats(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        record_attendance(self.a, donated=True, units_donated=2)
+        DonationDrive.objects.filter(pk=self.drive.pk).update(units_collected=9)
+
+        self.assertEqual(reconcile_drive_stats(), 1)
+        self.assertEqual(self.counters(), (1, 1, 2))
+        self.assertEqual(reconcile_drive_stats(), 0)
+
+    def test_change_that_would_underflow_falls_back_to_reconcile(self):
+        record_attendance(self.a, donated=True, units_donated=2)
+        # Drift: the counter is lower than the registrations say.
+        DonationDrive.objects.filter(pk=self.drive.pk).update(units_collected=1)
+
+        registration_changed(self.drive.pk, Snapshot(1, 1, 2), Snapshot(1, 1, 0))
+
+        # 1 - 2 would go below zero; the drive is recomputed from its registrations instead.
+        self.assertEqual(self.counters(), (1, 1, 2))
+
+    def test_stats_endpoint_is_for_the_organizer(self):
+        record_attendance(self.a, donated=True, units_donated=1)
+        client = APIClient()
+        client.force_authenticate(self.drive.organizer)
+        response = client.get(f"/api/drives/{self.drive.pk}/stats/", SERVER_NAME="localhost")
+        self.assertEqual((response.data["units_collected"], response.data["current_registrations"]), (1, 3))
+
+        client.force_authenticate(self.c.donor)
+        self.assertEqual(client.get(f"/api/drives/{self.drive.pk}/stats/", SERVER_NAME="localhost").status_code, 403)
+
+    def test_stats_endpoint_returns_404_for_unknown_or_malformed_ids(self):
+        client = APIClient()
+        client.force_authenticate(self.drive.organizer)
+        for pk in (self.drive.pk + 1000, "abc"):
+            self.assertEqual(client.get(f"/api/drives/{pk}/stats/", SERVER_NAME="localhost").status_code, 404)
+
+
+class DriveNotificationSenderTests(TestCase):
+    def test_confirmations_then_reminders_are_sent_once_in_batches(self):
+        drive = _drive(max_participants=5)
+        for i in range(3):
+            register_for_drive(drive, User.objects.create_user(username=f"donor{i}", password="x"))
+        week_before = timezone.make_aware(datetime.combine(drive.start_date - timedelta(days=7), time(9, 0)))
+        day_before = week_before + timedelta(days=6, hours=1)
+
+        self.assertEqual(send_due_drive_notifications(now=week_before, batch_size=2), {"confirmations": 3, "reminders": 0})
+        self.assertEqual(send_due_drive_notifications(now=day_before), {"confirmations": 0, "reminders": 3})
+        self.assertEqual(send_due_drive_notifications(now=day_before), {"confirmations": 0, "reminders": 0})
+        self.assertEqual(Notification.objects.filter(object_id__in=drive.registrations.values("pk")).count(), 6)
+        self.assertFalse(drive.registrations.filter(confirmation_sent_at__isnull=True).exists())
+
+
+class CertificateGenerationTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    def test_completing_drive_issues_certificates_rendered_in_batch_and_download_uses_etag(self):
+        drive = _drive(max_participants=5)
+        donors = [User.objects.create_user(username=f"donor{i}", password="x") for i in range(3)]
+        for donor in donors:
+            registration = register_for_drive(drive, donor)
+            registration.donated = True
+            registration.units_donated = 1
+            registration.save()
+
+        with override_settings(MEDIA_ROOT=self.media), self.captureOnCommitCallbacks(execute=True):
+            drive.status = "completed"
+            drive.save()
+
+        issued = DonationCertificate.objects.filter(drive_registration__drive=drive)
+        self.assertEqual(issued.count(), 3)
+        # The request only issues the rows; rendering is left to the batch command.
+        self.assertFalse(issued.filter(is_generated=True).exists())
+
+        with override_settings(MEDIA_ROOT=self.media):
+            call_command("generate_certificates", workers=2, stdout=StringIO())
+        certificates = list(issued)
+        self.assertTrue(all(c.is_generated and len(c.pdf_sha256) == 64 for c in certificates))
+
+        client = APIClient()
+        client.force_authenticate(donors[0])
+        mine = next(c for c in certificates if c.donor_id == donors[0].pk)
+        with override_settings(MEDIA_ROOT=self.media):
+            response = client.get(f"/api/certificates/{mine.pk}/download/", SERVER_NAME="localhost")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["ETag"], f'"{mine.pdf_sha256}"')
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF-1.4"))
+
+            cached = client.get(
+                f"/api/certificates/{mine.pk}/download/", HTTP_IF_NONE_MATCH=response["ETag"], SERVER_NAME="localhost"
+            )
+            self.assertEqual(cached.status_code, 304)
+
+
+class CertificateNumberTests(TestCase):
+    def test_colliding_numbers_are_drawn_again_before_the_insert(self):
+        drive = _drive(max_participants=5)
+        for name in "ab":
+            record_attendance(register_for_drive(drive, User.objects.create_user(username=name, password="x")), True)
+        existing = DonationCertificate.objects.create(
+            donor=drive.organizer, donation_date=drive.start_date, certificate_number="VL-2026-AAAAAAAA"
+        )
+
+        # Both candidates hit the existing number, then each other, then come out distinct.
+        numbers = iter([existing.certificate_number] * 2 + ["VL-2026-BBBBBBBB"] * 2 + ["VL-2026-CCCCCCCC"])
+        with mock.patch.object(DonationCertificate, "generate_certificate_number", lambda self: next(numbers)):
+            self.assertEqual(issue_drive_certificates(drive, render=False), 2)
+
+        issued = DonationCertificate.objects.filter(drive_registration__drive=drive)
+        self.assertEqual(
+            sorted(issued.values_list("certificate_number", flat=True)), ["VL-2026-BBBBBBBB", "VL-2026-CCCCCCCC"]
+        )
+
+
+class CertificateVerificationTests(TestCase):
+    def setUp(self):
+        self.donor = User.objects.create_user(username="donor", password="x", first_name="Asha")
+        self.certificate = DonationCertificate.objects.create(
+            donor=self.donor, donation_date=timezone.localdate(), blood_group="O+", units_donated=1, location="Hall"
+        )
+        self.token = parse_qs(urlparse(self.certificate.qr_code_data).query)["token"][0]
+        self.client = APIClient()
+        revocations.rebuild()
+
+    def verify(self, token):
+        return self.client.get("/api/certificates/verify/", {"token": token}, SERVER_NAME="localhost")
+
+    def test_signed_token_verifies_without_login_until_revoked(self):
+        response = self.verify(self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["valid"])
+        self.assertEqual(response.data["certificate_number"], self.certificate.certificate_number)
+        self.assertEqual(response.data["donor_name"], "Asha")
+
+        self.assertEqual(self.verify(self.token[:-2] + "xx").data, {"valid": False, "reason": "invalid_signature"})
+        self.assertEqual(self.verify("").status_code, 400)
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_authenticate(staff)
+        revoked = self.client.post(f"/api/certificates/{self.certificate.pk}/revoke/", SERVER_NAME="localhost")
+        self.assertTrue(revoked.data["is_revoked"])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.verify(self.token).data["reason"], "revoked")
+
+    def test_revocation_reaches_filters_of_other_workers(self):
+        other_worker = RevocationFilter()
+        self.assertFalse(other_worker.might_be_revoked(self.certificate.certificate_number))
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_authenticate(staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/certificates/{self.certificate.pk}/revoke/", SERVER_NAME="localhost")
+
+        # Long before the TTL: the shared version changed, so the filter is rebuilt.
+        self.assertTrue(other_worker.might_be_revoked(self.certificate.certificate_number))
+        with self.assertNumQueries(0):
+            other_worker.might_be_revoked(self.certificate.certificate_number)
+
+
+class AvailabilityResolverTests(TestCase):
+    def test_bitmaps_follow_slot_precedence_and_matcher_skips_vacation(self):
+        monday = date(2026, 3, 2)
+        away, busy_mondays, free = (
+            User.objects.create_user(username=name, password="x") for name in ("away", "mondays", "free")
+        )
+        DonorAvailabilitySlot.objects.create(donor=away, date=monday + timedelta(days=1), availability_type="vacation")
+        DonorAvailabilitySlot.objects.create(donor=busy_mondays, is_recurring=True, day_of_week=0, availability_type="unavailable")
+        DonorAvailabilitySlot.objects.create(donor=busy_mondays, date=monday + timedelta(days=7), availability_type="available")
+
+        with self.assertNumQueries(1):
+            availability = resolve_availability([away.pk, busy_mondays.pk, free.pk], monday, monday + timedelta(days=7))
+        self.assertEqual(availability.as_string(away.pk), "10111111")
+        self.assertEqual(availability.as_string(busy_mondays.pk), "01111111")
+        self.assertEqual(availability.as_string(free.pk), "11111111")
+
+        today = timezone.localdate()
+        DonorAvailabilitySlot.objects.create(donor=away, date=today, availability_type="vacation")
+        for user in (away, free):
+            DonorDetails.objects.create(user=user, full_name=user.username, age=30, blood_group="O+", city="Pune")
+        matched = match_donors_for_request(SOSRequest(blood_group_needed="O+", city="Pune"))
+        self.assertEqual([d.user_id for d in matched], [free.pk])
+
+
+class ConcurrentDriveRegistrationTests(TransactionTestCase):
+    """Parallel registrations against a small drive: exactly `capacity` win, never more."""
+
+    workers = 8
+    capacity = 3
+    attempts = 20
+
+    def test_parallel_registrations_never_overfill(self):
+        drive = _drive(max_participants=self.capacity)
+        donors = [User.objects.create_user(username=f"donor{i}", password="x") for i in range(self.workers)]
+        barrier = threading.Barrier(self.workers)
+        results = []
+
+        def attempt(donor):
+            try:
+                barrier.wait()
+                for _ in range(self.attempts):
+                    try:
+                        register_for_drive(drive, donor)
+                        results.append("registered")
+                        return
+                    except OperationalError:
+                        sleep(0.05)  # SQLite "database is locked": retry like a client would.
+                    except RegistrationError:
+                        results.append("refused")
+                        return
+                results.append("gave up")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(donor,)) for donor in donors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        drive.refresh_from_db()
+        self.assertEqual(results.count("registered"), self.capacity)
+        self.assertEqual(results.count("refused"), self.workers - self.capacity)
+        self.assertEqual(drive.current_registrations, self.capacity)
+        self.assertEqual(DriveRegistration.objects.filter(drive=drive).count(), self.capacity)
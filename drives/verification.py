@@ -0,0 +1,153 @@
+"""
+Stateless certificate verification.
+
+The QR on a certificate carries the certificate's public facts signed with
+`django.core.signing` (HMAC-SHA256 keyed by SECRET_KEY), so a scan is verified by
+recomputing the signature; no row has to be read.
+
+Revocation is the only state. Revoked certificate numbers are kept in an in-memory
+Bloom filter, rebuilt from the DB when older than
+`VEINLINE_REVOCATION_FILTER_TTL_SECONDS`. A filter miss proves the certificate is
+not revoked (no DB access); only a hit (a revoked certificate or a rare false
+positive) is confirmed against the DB.
+
+Each revocation also bumps a version counter in the shared cache; every process
+compares it with the version its filter was built at and rebuilds on a change, so a
+revocation applies in all workers on their next check, not after the TTL.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from threading import Lock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+
+from core.mixins import bump_version
+
+SALT = "veinline.certificate"
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 1024
+VERSION_KEY = "certificates:revocations-version"
+
+
+def sign_certificate(certificate) -> str:
+    """Compact signed token with the facts printed on the certificate."""
+
+    donor = certificate.donor
+    return signing.dumps(
+        {
+            "n": certificate.certificate_number,
+            "d": donor.get_full_name() or donor.username,
+            "g": certificate.blood_group,
+            "u": certificate.units_donated,
+            "t": certificate.donation_date.isoformat(),
+        },
+        salt=SALT,
+        compress=True,
+    )
+
+
+def qr_code_data(certificate) -> str:
+    """What the QR encodes: the public verify URL carrying the signed token."""
+
+    base = getattr(settings, "VEINLINE_SITE_URL", "").rstrip("/")
+    return f"{base}/api/certificates/verify/?{urlencode({'token': sign_certificate(certificate)})}"
+
+
+def read_token(token: str) -> dict | None:
+    """The signed facts, or None if the token was not issued by us or was altered."""
+
+    try:
+        data = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+    return {
+        "certificate_number": data["n"],
+        "donor_name": data["d"],
+        "blood_group": data["g"],
+        "units_donated": data["u"],
+        "donation_date": data["t"],
+    }
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    def __init__(self):
+        self._lock = Lock()
+        self._filter: BloomFilter | None = None
+        self._version = None
+        self.built_at = 0.0
+
+    def rebuild(self) -> None:
+        from .models import DonationCertificate
+
+        # Read the version first: a revocation landing during the query bumps it again.
+        version = cache.get(VERSION_KEY)
+        numbers = list(DonationCertificate.objects.filter(is_revoked=True).values_list("certificate_number", flat=True))
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(numbers)))
+        for number in numbers:
+            bloom.add(number)
+        with self._lock:
+            self._filter = bloom
+            self._version = version
+            self.built_at = time.monotonic()
+
+    def add(self, number: str) -> None:
+        """Record a revocation here, and in every other process once it commits."""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(number)
+        transaction.on_commit(lambda: bump_version(VERSION_KEY))
+
+    def might_be_revoked(self, number: str) -> bool:
+        ttl = getattr(settings, "VEINLINE_REVOCATION_FILTER_TTL_SECONDS", 300)
+        if (
+            self._filter is None
+            or time.monotonic() - self.built_at > ttl
+            or cache.get(VERSION_KEY) != self._version
+        ):
+            self.rebuild()
+        return number in self._filter
+
+
+revocations = RevocationFilter()
+
+
+def verify_token(token: str) -> dict:
+    """{"valid": bool, ...}: signature check, then revocation (DB only on a filter hit)."""
+
+    facts = read_token(token)
+    if facts is None:
+        return {"valid": False, "reason": "invalid_signature"}
+    if revocations.might_be_revoked(facts["certificate_number"]):
+        from .models import DonationCertificate
+
+        if DonationCertificate.objects.filter(certificate_number=facts["certificate_number"], is_revoked=True).exists():
+            return {"valid": False, "reason": "revoked", "certificate_number": facts["certificate_number"]}
+    return dict(facts, valid=True)
@@ -1,22 +1,50 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import DonationDrive, DriveRegistration, DonationCertificate, DonorAvailabilitySlot
+from core.mixins import ConditionalGetMixin
+from core.services.geo import nearest, parse_point, with_distances
+from .availability import MAX_DAYS as MAX_AVAILABILITY_DAYS, MAX_DONORS as MAX_AVAILABILITY_DONORS, resolve_availability
+from . import stats as drive_stats
+from .certificates import generate_certificates, storage_path
+from .verification import revocations, verify_token
+from .models import (
+    DonationDrive,
+    DriveRegistration,
+    DriveWaitlistEntry,
+    DonationCertificate,
+    DonorAvailabilitySlot,
+    WaitlistStatus,
+)
 from .serializers import (
     DonationDriveSerializer,
     DriveRegistrationSerializer,
     DonationCertificateSerializer,
     DonorAvailabilitySlotSerializer,
 )
-from notifications.services import NotificationService
+from .services import (
+    DriveFullError,
+    RegistrationError,
+    cancel_registration,
+    join_drive_waitlist,
+    leave_drive_waitlist,
+    record_attendance,
+    register_for_drive,
+    waitlist_position,
+)
 
 
-class DonationDriveViewSet(viewsets.ModelViewSet):
+class DonationDriveViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Blood donation drives/events"""
     serializer_class = DonationDriveSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    conditional_actions = ('list', 'retrieve', 'upcoming', 'nearby')
     
     def get_queryset(self):
         queryset = DonationDrive.objects.all().order_by('-start_date')
@@ -45,34 +73,82 @@ class DonationDriveViewSet(viewsets.ModelViewSet):
         """Register for a donation drive"""
         drive = self.get_object()
         
-        # Check if drive is full
-        if drive.is_full():
-            return Response({'detail': 'Drive is full'}, status=400)
-        
-        # Check if already registered
-        if DriveRegistration.objects.filter(drive=drive, donor=request.user).exists():
-            return Response({'detail': 'Already registered'}, status=400)
-        
-        # Create registration
-        registration = DriveRegistration.objects.create(
-            drive=drive,
-            donor=request.user,
-            status='registered'
-        )
+        try:
+            # Seat is taken with a conditional UPDATE in the same transaction
+            registration = register_for_drive(drive, request.user)
+        except DriveFullError as e:
+            return Response({'detail': str(e), 'waitlist_available': True}, status=400)
+        except RegistrationError as e:
+            return Response({'detail': str(e)}, status=400)
+        
+        # The confirmation goes out with the next send_drive_notifications batch.
+        return Response(DriveRegistrationSerializer(registration).data, status=201)
+    
+    @action(detail=True, methods=['get', 'post', 'delete'], permission_classes=[permissions.IsAuthenticated])
+    def waitlist(self, request, pk=None):
+        """
+        Waitlist for a full drive: GET shows your position, POST joins, DELETE leaves.
+        When a registered donor cancels, the head of the queue is registered automatically.
+        """
+        drive = self.get_object()
         
-        # Update drive registration count
-        drive.current_registrations += 1
-        drive.save(update_fields=['current_registrations'])
+        if request.method == 'DELETE':
+            if not leave_drive_waitlist(drive, request.user):
+                return Response({'detail': 'Not on the waitlist'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        if request.method == 'POST':
+            try:
+                entry = join_drive_waitlist(drive, request.user)
+            except RegistrationError as e:
+                return Response({'detail': str(e)}, status=400)
+            code = status.HTTP_201_CREATED
+        else:
+            entry = DriveWaitlistEntry.objects.filter(drive=drive, donor=request.user).first()
+            if entry is None:
+                return Response({'detail': 'Not on the waitlist'}, status=status.HTTP_404_NOT_FOUND)
+            code = status.HTTP_200_OK
         
-        # Send confirmation notification
-        NotificationService.notify_custom(
-            request.user,
-            f"Registration Confirmed: {drive.title}",
-            f"You have successfully registered for {drive.title} on {drive.start_date}",
-            notification_type='appointment_reminder'
-        )
+        return Response({
+            'drive': drive.pk,
+            'status': entry.status,
+            'position': waitlist_position(entry),
+            'joined_at': entry.joined_at,
+            'registration': entry.registration_id,
+        }, status=code)
+    
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def stats(self, request, pk=None):
+        """
+        Live counters for the organizer (or staff) during the event. Read from the
+        drive row alone, which check-ins keep current, so it is cheap to poll.
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        stats = drive_stats.live_stats(pk)
+        if stats is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if stats.pop('organizer_id') != request.user.id and not request.user.is_staff:
+            return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
+        stats['waitlist'] = DriveWaitlistEntry.objects.filter(drive_id=pk, status=WaitlistStatus.WAITING).count()
+        return Response(stats)
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Closest drives that have not ended: lat, lon, radius (km, default 50), limit (default 20).
+        Honours the same status/city filters as the list.
+        """
+        try:
+            lat, lon, radius_km, limit = parse_point(request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=400)
         
-        return Response(DriveRegistrationSerializer(registration).data, status=201)
+        queryset = self.get_queryset().filter(end_date__gte=timezone.localdate())
+        results = nearest(queryset, lat, lon, radius_km, limit)
+        return Response(with_distances(self.get_serializer_class(), results, context=self.get_serializer_context()))
     
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
@@ -101,6 +177,26 @@ class DriveRegistrationViewSet(viewsets.ModelViewSet):
         # Donors see their own registrations
         return DriveRegistration.objects.filter(donor=user).select_related('drive')
     
+    def create(self, request, *args, **kwargs):
+        """Register for a drive (same seat accounting as /drives/{id}/register/)"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            registration = register_for_drive(serializer.validated_data['drive'], request.user)
+        except DriveFullError as e:
+            return Response({'detail': str(e), 'waitlist_available': True}, status=400)
+        except RegistrationError as e:
+            return Response({'detail': str(e)}, status=400)
+        return Response(self.get_serializer(registration).data, status=status.HTTP_201_CREATED)
+    
+    def perform_destroy(self, instance):
+        # An active registration gives its seat back (and promotes the waitlist) first.
+        try:
+            cancel_registration(instance)
+        except RegistrationError:
+            pass  # Already cancelled; the seat was released then.
+        instance.delete()
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel registration"""
@@ -110,16 +206,34 @@ class DriveRegistrationViewSet(viewsets.ModelViewSet):
         if registration.donor_id != request.user.id and not request.user.is_staff:
             return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
         
-        if registration.status == 'cancelled':
-            return Response({'detail': 'Already cancelled'}, status=400)
-        
-        registration.status = 'cancelled'
-        registration.save(update_fields=['status'])
+        try:
+            # Releases the seat and promotes the head of the waitlist
+            cancel_registration(registration)
+        except RegistrationError as e:
+            return Response({'detail': str(e)}, status=400)
         
-        # Update drive registration count
-        drive = registration.drive
-        drive.current_registrations = max(0, drive.current_registrations - 1)
-        drive.save(update_fields=['current_registrations'])
+        return Response(self.get_serializer(registration).data)
+
+    @action(detail=True, methods=['post'])
+    def attend(self, request, pk=None):
+        """Record attendance after the drive (organizer/staff). Body: {"donated": true, "units_donated": 1}"""
+        registration = DriveRegistration.objects.select_related('drive').filter(pk=pk).first()
+        if registration is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if registration.drive.organizer_id != request.user.id and not request.user.is_staff:
+            return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
+        donated = request.data.get('donated', True) in (True, 'true', '1', 1)
+        try:
+            units = int(request.data.get('units_donated', 1))
+        except (TypeError, ValueError):
+            units = -1
+        if units < 0:
+            return Response({'detail': 'units_donated must be a non-negative number'}, status=400)
+        try:
+            # Also moves the drive's attendance/donation counters by the difference
+            registration = record_attendance(registration, donated, units)
+        except RegistrationError as e:
+            return Response({'detail': str(e)}, status=400)
         
         return Response(self.get_serializer(registration).data)
 
@@ -140,24 +254,59 @@ class DonationCertificateViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
-        """Download certificate PDF (placeholder - requires PDF generation library)"""
+        """
+        Certificate PDF. Rendered once, then streamed from the content-addressed file;
+        the ETag is the file's sha256, so unchanged certificates answer 304.
+        """
         certificate = self.get_object()
         
         if certificate.donor_id != request.user.id and not request.user.is_staff:
             return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
         
-        # TODO: Implement actual PDF generation using ReportLab or WeasyPrint
-        # For now, return certificate data
-        return Response({
-            'certificate_number': certificate.certificate_number,
-            'donor_name': certificate.donor.get_full_name() or certificate.donor.username,
-            'blood_group': certificate.blood_group,
-            'units_donated': certificate.units_donated,
-            'donation_date': certificate.donation_date,
-            'location': certificate.location,
-            'qr_code_data': certificate.qr_code_data,
-            'message': 'PDF generation not yet implemented. Use this data to generate certificate.'
-        })
+        path = Path(settings.MEDIA_ROOT) / storage_path(certificate.pdf_sha256) if certificate.pdf_sha256 else None
+        if not certificate.is_generated or path is None or not path.exists():
+            generate_certificates(DonationCertificate.objects.filter(pk=certificate.pk), workers=1)
+            certificate.refresh_from_db()
+            path = Path(settings.MEDIA_ROOT) / storage_path(certificate.pdf_sha256)
+        
+        etag = f'"{certificate.pdf_sha256}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                path.open('rb'),
+                content_type='application/pdf',
+                as_attachment=True,
+                filename=f'{certificate.certificate_number}.pdf',
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny], authentication_classes=[])
+    def verify(self, request):
+        """
+        Public QR check: ?token=<signed payload>. Verified by signature; the DB is only
+        read when the in-memory revocation filter reports a possible revocation.
+        """
+        token = request.query_params.get('token')
+        if not token:
+            return Response({'detail': 'token parameter required'}, status=400)
+        return Response(verify_token(token))
+    
+    @action(detail=True, methods=['post'])
+    def revoke(self, request, pk=None):
+        """Revoke a certificate (staff only); its QR stops verifying"""
+        if not request.user.is_staff:
+            return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
+        certificate = self.get_object()
+        
+        DonationCertificate.objects.filter(pk=certificate.pk, is_revoked=False).update(
+            is_revoked=True, revoked_at=timezone.now()
+        )
+        revocations.add(certificate.certificate_number)
+        certificate.refresh_from_db()
+        return Response(self.get_serializer(certificate).data)
     
     @action(detail=True, methods=['post'])
     def share(self, request, pk=None):
@@ -233,3 +382,36 @@ class DonorAvailabilitySlotViewSet(viewsets.ModelViewSet):
         
         # Default: available
         return Response({'is_available': True, 'availability_type': 'available'})
+    
+    @action(detail=False, methods=['get'])
+    def resolve(self, request):
+        """
+        Availability of many donors over a date range:
+        ?donors=1,2,3&start=YYYY-MM-DD&end=YYYY-MM-DD. Each donor gets a "1"/"0" string,
+        one character per day from start. Donors may only query themselves; staff any.
+        """
+        from datetime import datetime
+        try:
+            start = datetime.strptime(request.query_params.get('start', ''), '%Y-%m-%d').date()
+            end = datetime.strptime(request.query_params.get('end') or str(start), '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'detail': 'start (and optional end) required in YYYY-MM-DD format'}, status=400)
+        if not 0 <= (end - start).days < MAX_AVAILABILITY_DAYS:
+            return Response({'detail': f'end must be on or after start and within {MAX_AVAILABILITY_DAYS} days'}, status=400)
+        
+        try:
+            donor_ids = sorted({int(v) for v in request.query_params.get('donors', '').split(',') if v.strip()})
+        except ValueError:
+            return Response({'detail': 'donors must be a comma-separated list of ids'}, status=400)
+        donor_ids = donor_ids or [request.user.id]
+        if len(donor_ids) > MAX_AVAILABILITY_DONORS:
+            return Response({'detail': f'At most {MAX_AVAILABILITY_DONORS} donors per request'}, status=400)
+        if not request.user.is_staff and donor_ids != [request.user.id]:
+            return Response({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        availability = resolve_availability(donor_ids, start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'donors': {donor_id: availability.as_string(donor_id) for donor_id in donor_ids},
+        })
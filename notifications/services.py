@@ -10,6 +10,12 @@ from .models import Notification, NotificationType, NotificationChannel
 User = get_user_model()
 
 
+def _appointment_reminder_message(appointment):
+    # Reminders go out anywhere inside the lead window, so name the day instead of "tomorrow".
+    slot = appointment.slot
+    return f"Reminder: You have a donation appointment at {slot.blood_bank} on {slot.date} at {slot.start_time}"
+
+
 class NotificationService:
     """Service for managing notifications"""
     
@@ -68,47 +74,49 @@ class NotificationService:
         return notification
     
     @staticmethod
-    def _send_via_channels(notification: Notification, channels: list):
-        """Send notification via specified channels"""
+    def _send_via_channels(notification: Notification, channels: list, email_connection=None, sms_session=None):
+        """Send notification via specified channels (optionally over pooled connections)"""
         for channel in channels:
             if channel == NotificationChannel.IN_APP:
                 # Already saved to DB
                 pass
             elif channel == NotificationChannel.EMAIL:
-                NotificationService._send_email(notification)
+                NotificationService._send_email(notification, email_connection)
             elif channel == NotificationChannel.SMS:
-                NotificationService._send_sms(notification)
+                NotificationService._send_sms(notification, sms_session)
             elif channel == NotificationChannel.PUSH:
                 NotificationService._send_push(notification)
     
     @staticmethod
-    def _send_email(notification: Notification):
+    def _send_email(notification: Notification, connection=None):
         """Send email notification"""
         # TODO: Implement email sending
-        from core.services.emailing import send_email
+        from core.services.emailing import send_fallback_email
         
         try:
-            send_email(
+            send_fallback_email(
                 to_email=notification.recipient.email,
                 subject=notification.title,
-                body=notification.message,
+                message=notification.message,
+                connection=connection,
             )
         except Exception as e:
             print(f"Error sending email notification: {e}")
     
     @staticmethod
-    def _send_sms(notification: Notification):
+    def _send_sms(notification: Notification, session=None):
         """Send SMS notification"""
         # TODO: Implement SMS sending
         try:
             from core.services.sms import send_sms
-            from accounts.models import Profile
             
-            profile = Profile.objects.get(user=notification.recipient)
+            # Uses the cached profile when the caller select_related() it (bulk sends).
+            profile = notification.recipient.profile
             if profile.phone_e164:
                 send_sms(
-                    phone=profile.phone_e164,
-                    message=f"{notification.title}: {notification.message[:160]}"
+                    phone_e164=profile.phone_e164,
+                    message=f"{notification.title}: {notification.message[:160]}",
+                    session=session,
                 )
         except Exception as e:
             print(f"Error sending SMS notification: {e}")
@@ -158,8 +166,7 @@ class NotificationService:
     @staticmethod
     def notify_appointment_reminder(appointment):
         """Send appointment reminder (24 hours before)"""
-        donor_name = appointment.slot.blood_bank
-        message = f"Reminder: You have a donation appointment at {donor_name} tomorrow at {appointment.slot.start_time}"
+        message = _appointment_reminder_message(appointment)
         
         NotificationService.create_notification(
             recipient=appointment.donor,
@@ -173,6 +180,94 @@ class NotificationService:
             content_object=appointment,
         )
     
+    @staticmethod
+    def notify_appointment_reminders_bulk(appointments, deliver=True):
+        """
+        Reminders for many appointments: one INSERT for the in-app rows, then SMS/email
+        per recipient. Pass deliver=False to only create the rows (see deliver_bulk).
+        Appointments should come with select_related('slot', 'donor__profile').
+        """
+        channels = [NotificationChannel.IN_APP, NotificationChannel.SMS, NotificationChannel.EMAIL]
+        content_type = ContentType.objects.get_for_model(appointments[0]) if appointments else None
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient=appointment.donor,
+                notification_type=NotificationType.APPOINTMENT_REMINDER,
+                title="📅 Appointment Reminder",
+                message=_appointment_reminder_message(appointment),
+                channels=channels,
+                priority='high',
+                action_url=f'/appointments/{appointment.id}/',
+                icon='📅',
+                content_type=content_type,
+                object_id=appointment.id,
+            )
+            for appointment in appointments
+        ], batch_size=500)
+        if deliver:
+            NotificationService.deliver_bulk(notifications)
+        return notifications
+    
+    @staticmethod
+    def notify_drive_registrations_bulk(registrations, reminder=False, deliver=True):
+        """
+        Drive registration confirmations (or, with reminder=True, reminders) in one
+        INSERT. Registrations should come with select_related('drive', 'donor__profile').
+        """
+        if reminder:
+            notification_type, icon, priority = NotificationType.APPOINTMENT_REMINDER, '📅', 'high'
+            channels = [NotificationChannel.IN_APP, NotificationChannel.SMS, NotificationChannel.EMAIL]
+        else:
+            notification_type, icon, priority = NotificationType.APPOINTMENT_CONFIRMED, '✅', 'normal'
+            channels = [NotificationChannel.IN_APP, NotificationChannel.EMAIL]
+        content_type = ContentType.objects.get_for_model(registrations[0]) if registrations else None
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient=registration.donor,
+                notification_type=notification_type,
+                title=(f"📅 Drive Reminder: {registration.drive.title}" if reminder
+                       else f"Registration Confirmed: {registration.drive.title}"),
+                message=(
+                    f"Reminder: {registration.drive.title} at {registration.drive.venue_name} starts "
+                    f"{registration.drive.start_date} at {registration.drive.start_time}"
+                    if reminder else
+                    f"You have successfully registered for {registration.drive.title} on {registration.drive.start_date}"
+                ),
+                channels=channels,
+                priority=priority,
+                action_url=f'/drives/{registration.drive_id}/',
+                icon=icon,
+                content_type=content_type,
+                object_id=registration.id,
+            )
+            for registration in registrations
+        ], batch_size=500)
+        if deliver:
+            NotificationService.deliver_bulk(notifications)
+        return notifications
+    
+    @staticmethod
+    def deliver_bulk(notifications):
+        """
+        Send already-saved notifications over their external channels (in-app needs
+        nothing), reusing one SMTP connection and one HTTP session for the whole batch.
+        """
+        import requests
+        from django.core.mail import get_connection
+        
+        if not notifications:
+            return
+        email_connection = get_connection(fail_silently=True)
+        email_connection.open()
+        try:
+            with requests.Session() as sms_session:
+                for notification in notifications:
+                    NotificationService._send_via_channels(
+                        notification, notification.channels, email_connection=email_connection, sms_session=sms_session
+                    )
+        finally:
+            email_connection.close()
+    
     @staticmethod
     def notify_appointment_confirmed(appointment):
         """Notify donor when appointment is confirmed"""
@@ -206,6 +301,41 @@ class NotificationService:
             icon='🎖️',
         )
     
+    @staticmethod
+    def notify_new_badges_bulk(awards):
+        """
+        Notify many donors about new badges in one INSERT.
+        `awards` is an iterable of (donor_id, badge_name); in-app only, like notify_new_badge.
+        """
+        notifications = [
+            Notification(
+                recipient_id=donor_id,
+                notification_type=NotificationType.NEW_BADGE,
+                title="🎖️ Achievement Unlocked",
+                message=f"Congratulations! You've earned the '{badge_name}' badge",
+                channels=[NotificationChannel.IN_APP],
+                priority='normal',
+                action_url='/leaderboard/',
+                icon='🎖️',
+            )
+            for donor_id, badge_name in awards
+        ]
+        return Notification.objects.bulk_create(notifications, batch_size=500)
+    
+    @staticmethod
+    def notify_custom(recipient, title, message, notification_type=NotificationType.SYSTEM, priority='normal', action_url='', content_object=None):
+        """In-app notification with free-form title/message"""
+        return NotificationService.create_notification(
+            recipient=recipient,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            channels=[NotificationChannel.IN_APP],
+            priority=priority,
+            action_url=action_url,
+            content_object=content_object,
+        )
+    
     @staticmethod
     def notify_thank_you_message(donor, patient_name, message):
         """Notify donor about thank you message from patient"""
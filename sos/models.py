@@ -144,6 +144,7 @@ class DonationTracker(models.Model):
         """Update status and set appropriate timestamp"""
         from django.utils import timezone
         self.current_status = new_status
+        completed_now = False
         
         if new_status == DonationStatus.TRAVELING and not self.traveling_at:
             self.traveling_at = timezone.now()
@@ -153,8 +154,14 @@ class DonationTracker(models.Model):
             self.donating_at = timezone.now()
         elif new_status == DonationStatus.COMPLETED and not self.completed_at:
             self.completed_at = timezone.now()
+            completed_now = True
         
         self.save()
+        
+        if completed_now:
+            from donations import stats as donor_stats
+            donor_id = SOSResponse.objects.filter(pk=self.sos_response_id).values_list("donor_id", flat=True).first()
+            donor_stats.donation_completed(donor_id, self.completed_at, sos=True)
 
 
 class Message(models.Model):
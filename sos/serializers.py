@@ -2,6 +2,7 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from accounts.models import Profile
+from donations import stats as donor_stats
 from donations.models import DonorDetails
 from .models import SOSRequest, SOSResponse
 
@@ -110,10 +111,17 @@ class RespondSerializer(serializers.Serializer):
     consent_to_share_contact = serializers.BooleanField(default=False)
 
     def save(self, *, sos_response: SOSResponse):
+        previous = sos_response.response
         sos_response.response = self.validated_data["response"]
         sos_response.donor_consented_to_share_contact = bool(self.validated_data["consent_to_share_contact"])
         sos_response.responded_at = timezone.now()
         sos_response.save(update_fields=["response", "donor_consented_to_share_contact", "responded_at"])
+        donor_stats.sos_reply(
+            sos_response.donor_id,
+            previous,
+            sos_response.response,
+            (sos_response.responded_at - sos_response.created_at).total_seconds() / 3600,
+        )
         return sos_response
 
 
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from django.conf import settings
 from django.db.models import Q
+from django.utils import timezone
 
 from core.models import BloodGroupCompatibility
 from donations.models import DonorDetails
+from drives.availability import resolve_availability
 
 
 DEFAULT_COMPATIBILITY = {
@@ -35,7 +37,7 @@ def match_donors_for_request(sos_request, limit: int = 50):
     Rule-based matching:
     - Compatible blood group
     - Same city (strict by default; configurable)
-    - Availability status
+    - Availability status, and no "unavailable"/"vacation" calendar slot for today
     """
 
     groups = compatible_donor_groups(sos_request.blood_group_needed)
@@ -53,7 +55,12 @@ def match_donors_for_request(sos_request, limit: int = 50):
         # Non-strict: allow same city OR blank donor city for rural/offline data.
         q &= Q(city__iexact=sos_request.city) | Q(city="")
 
-    qs = DonorDetails.objects.filter(q).select_related("user").order_by("-updated_at")
-    return qs[:limit]
+    qs = DonorDetails.objects.filter(q)
+    today = timezone.localdate()
+    # One query over the candidates' calendar slots (the candidate ids are a subquery).
+    away = resolve_availability(qs.values("user_id"), today, today).unavailable_on(today)
+    if away:
+        qs = qs.exclude(user_id__in=away)
+    return qs.select_related("user").order_by("-updated_at")[:limit]
 
 
@@ -13,6 +13,7 @@ from rest_framework.response import Response
 from accounts.permissions import IsDonor, IsPatient
 from core.services.emailing import send_fallback_email
 from core.services.sms import send_sms
+from donations import stats as donor_stats
 from donations.models import DonorDetails
 from .models import ResponseChannel, ResponseChoice, SOSRequest, SOSResponse
 from .serializers import (
@@ -270,6 +271,7 @@ class InboundSMSViewSet(viewsets.ViewSet):
             defaults={"response": ResponseChoice.PENDING, "channel": ResponseChannel.SMS},
         )
 
+        previous = sos_resp.response
         sos_resp.response = ResponseChoice.YES if decision == "YES" else ResponseChoice.NO
         sos_resp.channel = ResponseChannel.SMS
         sos_resp.responded_at = timezone.now()
@@ -278,6 +280,12 @@ class InboundSMSViewSet(viewsets.ViewSet):
         sos_resp.save(
             update_fields=["response", "channel", "responded_at", "donor_consented_to_share_contact"]
         )
+        donor_stats.sos_reply(
+            user.id,
+            previous,
+            sos_resp.response,
+            (sos_resp.responded_at - sos_resp.created_at).total_seconds() / 3600,
+        )
 
         return Response({"ok": True, "request_id": sos_req.id, "response_id": sos_resp.id, "response": sos_resp.response})
 
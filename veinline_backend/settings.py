@@ -114,6 +114,25 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem").lower()  # locmem | file | redis | memcached
+_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS.get(CACHE_BACKEND, _CACHE_BACKENDS["locmem"]),
+        "LOCATION": os.getenv("CACHE_LOCATION", "veinline"),
+        "KEY_PREFIX": "veinline",
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -191,6 +210,20 @@ VEINLINE_SMS_PROVIDER = os.getenv("SMS_PROVIDER", "fast2sms")  # fast2sms | text
 VEINLINE_SMS_API_KEY = os.getenv("SMS_API_KEY", "")
 VEINLINE_SMS_SENDER = os.getenv("SMS_SENDER", "VEINLN")
 VEINLINE_CITY_MATCH_STRICT = os.getenv("CITY_MATCH_STRICT", "1") == "1"
+VEINLINE_INVENTORY_HISTORY_BUCKET_MINUTES = int(os.getenv("INVENTORY_HISTORY_BUCKET_MINUTES", "60"))
+VEINLINE_FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "30"))
+VEINLINE_SHORTAGE_HORIZON_DAYS = int(os.getenv("SHORTAGE_HORIZON_DAYS", "7"))
+VEINLINE_DASHBOARD_CACHE_SECONDS = int(os.getenv("DASHBOARD_CACHE_SECONDS", "60"))
+VEINLINE_ANALYTICS_MIN_REFRESH_SECONDS = int(os.getenv("ANALYTICS_MIN_REFRESH_SECONDS", "60"))
+VEINLINE_PAGE_CACHE_SECONDS = int(os.getenv("PAGE_CACHE_SECONDS", "300"))
+VEINLINE_LEADERBOARD_CACHE_SECONDS = int(os.getenv("LEADERBOARD_CACHE_SECONDS", "300"))
+VEINLINE_RANK_INDEX_TTL_SECONDS = int(os.getenv("RANK_INDEX_TTL_SECONDS", "300"))
+VEINLINE_ETAG_VERSION_TTL_SECONDS = int(os.getenv("ETAG_VERSION_TTL_SECONDS", "300"))  # Bounds staleness under locmem
+VEINLINE_SCREENING_BATCH_LIMIT = int(os.getenv("SCREENING_BATCH_LIMIT", "5000"))
+VEINLINE_CERTIFICATE_WORKERS = int(os.getenv("CERTIFICATE_WORKERS", "0"))  # 0 = one per CPU
+VEINLINE_DEFAULT_BANK_TIMEZONE = os.getenv("DEFAULT_BANK_TIMEZONE", "Asia/Kolkata")  # For banks created without one
+VEINLINE_SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")  # Used in certificate QR codes
+VEINLINE_REVOCATION_FILTER_TTL_SECONDS = int(os.getenv("REVOCATION_FILTER_TTL_SECONDS", "300"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WebuiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'webui'
+
+    def ready(self):
+        import webui.signals  # noqa
@@ -0,0 +1,143 @@
+"""
+Caching helpers for the server-rendered pages.
+
+- Per-user contexts for the donor dashboards (`cached_user_context`).
+- Public pages (`CachedPageMixin`): full-page cache for guests, plus role-aware
+  context/fragment keys for signed-in users.
+- Targeted invalidation by scope (`invalidate_pages("leaderboard")`), fired from
+  model signals in `webui.signals`.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+
+DONOR_DASHBOARDS = ("donor-dashboard", "donor-sos-dashboard")
+
+
+def _user_key(name: str, user_id: int) -> str:
+    return f"webui:{name}:{user_id}"
+
+
+def cached_user_context(name: str, user_id: int, build) -> dict:
+    """
+    Return the cached context `name` for this user, building (and caching) it on a miss.
+    `build` must return picklable data (lists/dicts/model instances, not querysets).
+    """
+
+    key = _user_key(name, user_id)
+    ctx = cache.get(key)
+    if ctx is None:
+        ctx = build()
+        cache.set(key, ctx, getattr(settings, "VEINLINE_DASHBOARD_CACHE_SECONDS", 60))
+    return ctx
+
+
+def invalidate_donor_dashboards(user_id: int) -> None:
+    cache.delete_many([_user_key(name, user_id) for name in DONOR_DASHBOARDS])
+
+
+def viewer_role(request) -> str:
+    """Cache partition for a request: guest, staff, or the profile role (donor/patient/admin)."""
+    user = request.user
+    if not user.is_authenticated:
+        return "guest"
+    if user.is_staff:
+        return "staff"
+    return getattr(getattr(user, "profile", None), "role", "") or "user"
+
+
+def _scope_key(scope: str) -> str:
+    return f"webui:scope:{scope}"
+
+
+def scope_version(scopes) -> str:
+    """
+    Combined version token for the given scopes. Versions are timestamps rather than
+    counters so an evicted version can never collide with an older cached page.
+    """
+
+    if not scopes:
+        return "0"
+    keys = [_scope_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def invalidate_pages(*scopes: str) -> None:
+    """Drop every cached page, context and fragment that depends on any of `scopes`."""
+    cache.set_many({_scope_key(scope): time.time_ns() for scope in scopes}, None)
+
+
+def page_cache_timeout() -> int:
+    return getattr(settings, "VEINLINE_PAGE_CACHE_SECONDS", 300)
+
+
+class CachedPageMixin:
+    """
+    For public TemplateViews.
+
+    - Guests get the whole rendered page, with its headers, from cache (no DB access
+      on a hit), per language.
+    - Signed-in users get a per-role cached context via `cached_context()`, and
+      templates can use `{% cache page_cache_timeout "name" viewer_role page_cache_version %}`.
+    - `cache_scopes` lists the invalidation scopes whose data the page shows.
+    """
+
+    cache_scopes: tuple[str, ...] = ()
+
+    def _cache_name(self) -> str:
+        return type(self).__name__
+
+    def get_cache_timeout(self) -> int:
+        return page_cache_timeout()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = (
+            f"webui:guest-page:{self._cache_name()}:{translation.get_language()}:"
+            f"{scope_version(self.cache_scopes)}:{path_hash}"
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            return HttpResponse(content, headers=headers)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(response, "add_post_render_callback"):
+            def store(rendered):
+                # A page that issued a CSRF token is bound to this visitor's cookie.
+                if not request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+                    # Content-Type, Vary, Content-Language, ... are replayed with the body.
+                    headers = {name: value for name, value in rendered.items() if name.lower() != "set-cookie"}
+                    cache.set(key, (rendered.content, headers), self.get_cache_timeout())
+            response.add_post_render_callback(store)
+        return response
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["viewer_role"] = viewer_role(self.request)
+        ctx["page_cache_version"] = scope_version(self.cache_scopes)
+        ctx["page_cache_timeout"] = self.get_cache_timeout()
+        return ctx
+
+    def cached_context(self, build) -> dict:
+        """Cache the data part of the context per (page, role, scope versions)."""
+        key = f"webui:ctx:{self._cache_name()}:{viewer_role(self.request)}:{scope_version(self.cache_scopes)}"
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, self.get_cache_timeout())
+        return data
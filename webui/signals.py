@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from donations.models import BloodBankInventory, DonorDetails, DonorStatistics, InventoryForecast
+from donations.signals import leaderboard_ranked
+from drives.models import DonationDrive
+from sos.models import DonationTracker, SOSRequest, SOSResponse
+
+from .caching import invalidate_donor_dashboards, invalidate_pages
+
+
+@receiver([post_save, post_delete], sender=SOSResponse)
+def sos_response_changed(sender, instance, **kwargs):
+    invalidate_donor_dashboards(instance.donor_id)
+
+
+@receiver([post_save, post_delete], sender=DonationTracker)
+def donation_tracker_changed(sender, instance, **kwargs):
+    donor_id = (
+        SOSResponse.objects.filter(pk=instance.sos_response_id).values_list("donor_id", flat=True).first()
+    )
+    if donor_id:
+        invalidate_donor_dashboards(donor_id)
+
+
+@receiver(post_save, sender=DonorDetails)
+def donor_details_changed(sender, instance, **kwargs):
+    invalidate_donor_dashboards(instance.user_id)
+
+
+# Public pages (CachedPageMixin): bump the scope so cached pages/fragments are rebuilt.
+
+@receiver([post_save, post_delete], sender=DonorStatistics)
+def donor_statistics_changed(sender, instance, **kwargs):
+    invalidate_pages("leaderboard")
+
+
+@receiver(leaderboard_ranked)
+def leaderboard_reranked(sender, **kwargs):
+    invalidate_pages("leaderboard")
+
+
+@receiver([post_save, post_delete], sender=DonorDetails)
+def donor_details_page_data_changed(sender, instance, **kwargs):
+    invalidate_pages("leaderboard", "analytics")
+
+
+@receiver([post_save, post_delete], sender=SOSRequest)
+@receiver([post_save, post_delete], sender=SOSResponse)
+@receiver([post_save, post_delete], sender=BloodBankInventory)
+@receiver([post_save, post_delete], sender=InventoryForecast)
+def analytics_data_changed(sender, instance, **kwargs):
+    invalidate_pages("analytics")
+
+
+@receiver([post_save, post_delete], sender=DonationDrive)
+def drive_changed(sender, instance, **kwargs):
+    invalidate_pages("drives")
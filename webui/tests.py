@@ -1,3 +1,147 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, TestCase
+from django.utils.cache import patch_vary_headers
+from django.views import View
 
-# Create your tests here.
+from accounts.models import UserRole
+from donations import stats as donor_stats
+from donations.models import DonorDetails, DonorStatistics
+from donations.services import LEADERBOARD_CACHE_KEY, get_top_donors
+from sos.models import DonationTracker, SOSRequest, SOSResponse
+
+from .caching import CachedPageMixin, scope_version
+from .views import DonorDashboardView, DonorSOSDashboardView, PatientSOSDashboardView
+
+
+class PatientSOSDashboardQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create_user(username="patient", password="x")
+        cls.patient.profile.role = UserRole.PATIENT
+        cls.patient.profile.save()
+
+        donors = []
+        for i in range(6):
+            donor = User.objects.create_user(username=f"donor{i}", password="x")
+            DonorDetails.objects.create(user=donor, full_name=f"Donor {i}", age=30, blood_group="O+", city="Pune")
+            DonorStatistics.objects.create(donor=donor)
+            donors.append(donor)
+
+        for r in range(4):
+            sos = SOSRequest.objects.create(
+                requester=cls.patient, blood_group_needed="O+", city="Pune",
+                status="open" if r % 2 == 0 else "fulfilled",
+            )
+            for i, donor in enumerate(donors):
+                resp = SOSResponse.objects.create(
+                    request=sos, donor=donor, response="yes" if i < 2 else "pending"
+                )
+                if i < 2:
+                    DonationTracker.objects.create(sos_response=resp)
+
+    def _context(self):
+        request = RequestFactory().get("/dashboard/patient/sos/")
+        request.user = self.patient
+        view = PatientSOSDashboardView()
+        view.setup(request)
+        return view.get_context_data()
+
+    def test_query_count_is_constant(self):
+        # 1 annotated SOSRequest query + 1 prefetch of responses with everything joined.
+        with self.assertNumQueries(2):
+            ctx = self._context()
+            for entry in ctx["requests_with_responses"]:
+                for item in entry["responses"]:
+                    item["tracker"], item["donor_details"], item["donor_stats"]
+                    item["response"].donor.profile
+
+    def test_counts_are_aggregated_per_request(self):
+        ctx = self._context()
+        self.assertEqual(ctx["total_sos"], 4)
+        self.assertEqual(ctx["open_sos"], 2)
+        for entry in ctx["requests_with_responses"]:
+            self.assertEqual(entry["total_count"], 6)
+            self.assertEqual(entry["yes_count"], 2)
+            self.assertEqual(entry["pending_count"], 4)
+            self.assertEqual(sum(1 for item in entry["responses"] if item["tracker"]), 2)
+
+
+class DonorDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.donor = User.objects.create_user(username="donor", password="x")
+        self.donor.profile.role = UserRole.DONOR
+        self.donor.profile.save()
+        DonorDetails.objects.create(user=self.donor, full_name="Donor", age=30, blood_group="O+", city="Pune")
+        self.patient = User.objects.create_user(username="patient", password="x")
+
+    def _context(self, view_class):
+        request = RequestFactory().get("/dashboard/donor/")
+        request.user = self.donor
+        view = view_class()
+        view.setup(request)
+        return view.get_context_data()
+
+    def test_new_sos_shows_up_while_the_user_context_stays_cached(self):
+        self.assertEqual(self._context(DonorDashboardView)["open_sos_nearby"], [])
+        self.assertEqual(self._context(DonorSOSDashboardView)["active_sos"], [])
+
+        sos = SOSRequest.objects.create(requester=self.patient, blood_group_needed="O+", city="pune")
+        SOSRequest.objects.create(requester=self.patient, blood_group_needed="O+", city="Mumbai")
+
+        # Donor details come from the cache (1 query: the open requests).
+        with self.assertNumQueries(1):
+            self.assertEqual(self._context(DonorDashboardView)["open_sos_nearby"], [sos])
+        with self.assertNumQueries(1):
+            self.assertEqual(self._context(DonorSOSDashboardView)["active_sos"], [sos])
+
+        sos.status = "fulfilled"
+        sos.save()
+        self.assertEqual(self._context(DonorDashboardView)["open_sos_nearby"], [])
+
+
+class _LocalizedPage(CachedPageMixin, View):
+    renders = 0
+
+    def get(self, request):
+        type(self).renders += 1
+        response = TemplateResponse(request, engines["django"].from_string("Namaste"))
+        response["Content-Language"] = "hi"
+        patch_vary_headers(response, ["Accept-Language"])
+        return response
+
+
+class GuestPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _get(self):
+        request = RequestFactory().get("/page/")
+        request.user = AnonymousUser()
+        response = _LocalizedPage.as_view()(request)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_cached_page_is_replayed_with_its_headers(self):
+        first = self._get()
+        cached = self._get()
+        self.assertEqual(_LocalizedPage.renders, 1)
+        self.assertEqual(cached.content, first.content)
+        for header in ("Content-Type", "Content-Language", "Vary"):
+            self.assertEqual(cached[header], first[header])
+
+    def test_statistics_updates_invalidate_the_leaderboard(self):
+        donor = User.objects.create_user(username="donor", password="x")
+        DonorStatistics.objects.create(donor=donor, points=10)
+        get_top_donors()
+        before = scope_version(["leaderboard"])
+        self.assertIsNotNone(cache.get(LEADERBOARD_CACHE_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            donor_stats.donation_completed(donor.id)  # An F() update, no post_save.
+        self.assertNotEqual(scope_version(["leaderboard"]), before)
+        self.assertIsNone(cache.get(LEADERBOARD_CACHE_KEY))
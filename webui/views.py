@@ -1,7 +1,8 @@
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.db.models import Count, Prefetch, Q
 from django.shortcuts import redirect, render
 from django.views.generic import TemplateView
 from django.views import View
@@ -10,20 +11,23 @@ from django.db import transaction
 import logging
 
 from accounts.models import Profile
-from donations.models import BloodBankInventory, DonorDetails
+from analyticsapp.services import get_analytics_snapshot
+from appointments.eligibility import RULESET
+from donations.models import BloodBankInventory, DonorDetails, InventoryForecast
 from sos.models import SOSRequest, SOSResponse, SOSStatus, SOSPriority
 from sos.services import match_donors_for_request
 from core.services.sms import send_sms
 from core.services.emailing import send_fallback_email
+from .caching import CachedPageMixin, cached_user_context
 
 logger = logging.getLogger(__name__)
 
 
-class HomeView(TemplateView):
+class HomeView(CachedPageMixin, TemplateView):
     template_name = "home.html"
 
 
-class AboutView(TemplateView):
+class AboutView(CachedPageMixin, TemplateView):
     template_name = "about.html"
 
 
@@ -155,15 +159,35 @@ class DonorDashboardView(RoleRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        details = getattr(self.request.user, "donor_details", None)
-        ctx["donor_details"] = details
-        ctx["pending_responses"] = SOSResponse.objects.filter(donor=self.request.user, response="pending").count()
-        ctx["open_sos_nearby"] = (
+        user = self.request.user
+        ctx.update(cached_user_context("donor-dashboard", user.id, lambda: self._build_context(user)))
+        # Open requests change with every SOS in the city, so they are not part of the cached context.
+        details = ctx["donor_details"]
+        ctx["open_sos_nearby"] = list(
             SOSRequest.objects.filter(status="open", city__iexact=(details.city if details else ""))
             .order_by("-created_at")[:10]
         )
         return ctx
 
+    @staticmethod
+    def _build_context(user):
+        details = DonorDetails.objects.filter(user=user).first()
+        counts = _donor_response_counts(user)
+        return {
+            "donor_details": details,
+            "pending_responses": counts["pending"],
+        }
+
+
+def _donor_response_counts(user) -> dict:
+    """All of a donor's response counters in one conditional-aggregate query."""
+    return SOSResponse.objects.filter(donor=user).aggregate(
+        total=Count("id"),
+        pending=Count("id", filter=Q(response="pending")),
+        accepted=Count("id", filter=Q(response="yes")),
+        declined=Count("id", filter=Q(response="no")),
+    )
+
 
 class PatientDashboardView(RoleRequiredMixin, TemplateView):
     template_name = "dashboards/patient.html"
@@ -178,6 +202,21 @@ class PatientDashboardView(RoleRequiredMixin, TemplateView):
         return ctx
 
 
+def _analytics_context() -> dict:
+    """Dashboard aggregates, served from the materialized analytics snapshot."""
+    snapshot = get_analytics_snapshot()
+    return {
+        "donors_by_group": snapshot.donors_by_group,
+        "donors_active": snapshot.donors_active,
+        "donors_inactive": snapshot.donors_inactive,
+        "sos_by_status": snapshot.sos_by_status,
+        "responses_by_choice": snapshot.responses_by_choice,
+        "total_sos_requests": snapshot.total_sos_requests,
+        "response_rate": snapshot.response_rate,
+        "analytics_refreshed_at": snapshot.refreshed_at,
+    }
+
+
 class AdminDashboardView(LoginRequiredMixin, TemplateView):
     template_name = "dashboards/admin.html"
 
@@ -188,17 +227,7 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["donors_by_group"] = list(
-            DonorDetails.objects.values("blood_group").annotate(count=Count("id")).order_by("blood_group")
-        )
-        ctx["donors_active"] = DonorDetails.objects.filter(is_available=True).count()
-        ctx["donors_inactive"] = DonorDetails.objects.filter(is_available=False).count()
-        ctx["sos_by_status"] = list(
-            SOSRequest.objects.values("status").annotate(count=Count("id")).order_by("status")
-        )
-        ctx["responses_by_choice"] = list(
-            SOSResponse.objects.values("response").annotate(count=Count("id")).order_by("response")
-        )
+        ctx.update(_analytics_context())
         ctx["inventory"] = BloodBankInventory.objects.all().order_by("city", "blood_group")[:50]
         return ctx
 
@@ -351,26 +380,25 @@ class CreateSOSView(RoleRequiredMixin, TemplateView):
             return render(request, self.template_name)
 
 
-class LeaderboardView(TemplateView):
+class LeaderboardView(CachedPageMixin, TemplateView):
     """Public leaderboard view for donors"""
     template_name = "leaderboard.html"
+    cache_scopes = ("leaderboard",)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        ctx.update(self.cached_context(self._build_context))
+        return ctx
+
+    @staticmethod
+    def _build_context():
+        ctx = {}
         try:
-            from donations.models import DonorStatistics, Badge
-            from donations.serializers import LeaderboardSerializer
-            
-            # Get top 100 donors
-            stats = DonorStatistics.objects.filter(points__gt=0).order_by('-points')[:100]
-            
-            # Update ranks
-            for idx, stat in enumerate(stats, 1):
-                stat.rank = idx
+            from donations.models import Badge
+            from donations.services import get_top_donors
             
-            # Serialize data
-            serializer = LeaderboardSerializer(stats, many=True)
-            ctx['top_donors'] = serializer.data
+            # Top 100 donors with materialized ranks (shared cache with the API)
+            ctx['top_donors'] = get_top_donors()
             
             # Get badges from the same models module
             ctx['available_badges'] = [
@@ -400,14 +428,20 @@ class AppointmentsView(TemplateView):
     template_name = "appointments.html"
 
 
-class BloodBanksView(TemplateView):
+class BloodBanksView(CachedPageMixin, TemplateView):
     """Blood bank finder view"""
     template_name = "blood_banks.html"
 
 
-class EligibilityCheckerView(TemplateView):
+class EligibilityCheckerView(CachedPageMixin, TemplateView):
     """Medical eligibility checker view"""
     template_name = "eligibility_checker.html"
+    
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # Questions and the result both come from the shared rules table.
+        ctx["eligibility_questions"] = RULESET.questions()
+        return ctx
 
 
 class ActivityTimelineView(LoginRequiredMixin, TemplateView):
@@ -415,12 +449,12 @@ class ActivityTimelineView(LoginRequiredMixin, TemplateView):
     template_name = "activity_timeline.html"
 
 
-class PrivacyPolicyView(TemplateView):
+class PrivacyPolicyView(CachedPageMixin, TemplateView):
     """Privacy policy view"""
     template_name = "privacy.html"
 
 
-class TermsOfServiceView(TemplateView):
+class TermsOfServiceView(CachedPageMixin, TemplateView):
     """Terms of service view"""
     template_name = "terms.html"
 
@@ -452,38 +486,32 @@ class ContactView(View):
             return render(request, self.template_name)
 
 
-class SupportView(TemplateView):
+class SupportView(CachedPageMixin, TemplateView):
     """Support center view"""
     template_name = "support.html"
 
 
-class AnalyticsView(TemplateView):
+class AnalyticsView(CachedPageMixin, TemplateView):
     """Public analytics dashboard view"""
     template_name = "analytics.html"
+    cache_scopes = ("analytics",)
+
+    def get_cache_timeout(self) -> int:
+        # Bulk inventory/forecast writes bypass signals; don't outlive the snapshot refresh interval.
+        return min(super().get_cache_timeout(), getattr(settings, "VEINLINE_ANALYTICS_MIN_REFRESH_SECONDS", 60))
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["donors_by_group"] = list(
-            DonorDetails.objects.values("blood_group").annotate(count=Count("id")).order_by("blood_group")
-        )
-        ctx["donors_active"] = DonorDetails.objects.filter(is_available=True).count()
-        ctx["donors_inactive"] = DonorDetails.objects.filter(is_available=False).count()
-        ctx["sos_by_status"] = list(
-            SOSRequest.objects.values("status").annotate(count=Count("id")).order_by("status")
-        )
-        ctx["responses_by_choice"] = list(
-            SOSResponse.objects.values("response").annotate(count=Count("id")).order_by("response")
+        ctx.update(self.cached_context(self._build_context))
+        return ctx
+
+    @staticmethod
+    def _build_context():
+        ctx = _analytics_context()
+        ctx["inventory"] = list(BloodBankInventory.objects.all().order_by("-updated_at")[:20])
+        ctx["shortage_forecast"] = list(
+            InventoryForecast.objects.filter(shortage_expected=True).order_by("days_of_cover")[:10]
         )
-        ctx["inventory"] = BloodBankInventory.objects.all().order_by("-updated_at")[:20]
-        
-        # Calculate total SOS requests
-        ctx["total_sos_requests"] = SOSRequest.objects.count()
-        
-        # Calculate response rate
-        total_responses = SOSResponse.objects.count()
-        accepted_responses = SOSResponse.objects.filter(response="accepted").count()
-        ctx["response_rate"] = round((accepted_responses / total_responses * 100) if total_responses > 0 else 0, 1)
-        
         return ctx
 
 
@@ -496,23 +524,29 @@ class PatientSOSDashboardView(RoleRequiredMixin, TemplateView):
         ctx = super().get_context_data(**kwargs)
         user = self.request.user
         
-        # Get all SOS requests by this patient
-        sos_requests = SOSRequest.objects.filter(requester=user).order_by('-created_at')
+        # One annotated query for the requests, one prefetch for every response
+        # (with tracker, donor details, stats and profile joined in).
+        responses_qs = SOSResponse.objects.select_related(
+            'donor', 'donor__donor_details', 'donor__donor_stats', 'donor__profile', 'donation_tracker'
+        ).order_by('-responded_at')
+        sos_requests = list(
+            SOSRequest.objects.filter(requester=user)
+            .annotate(
+                yes_count=Count('responses', filter=Q(responses__response='yes')),
+                pending_count=Count('responses', filter=Q(responses__response='pending')),
+                total_count=Count('responses'),
+            )
+            .prefetch_related(Prefetch('responses', queryset=responses_qs))
+            .order_by('-created_at')
+        )
         
-        # For each SOS, get responses with tracking info
         requests_with_responses = []
         for sos in sos_requests:
-            responses = SOSResponse.objects.filter(request=sos).select_related(
-                'donor', 'donor__donor_details', 'donor__profile'
-            ).order_by('-responded_at')
-            
-            # Get tracking info for each response
             responses_data = []
-            for resp in responses:
-                tracker = getattr(resp, 'donation_tracker', None)
+            for resp in sos.responses.all():
                 responses_data.append({
                     'response': resp,
-                    'tracker': tracker,
+                    'tracker': getattr(resp, 'donation_tracker', None),
                     'donor_details': getattr(resp.donor, 'donor_details', None),
                     'donor_stats': getattr(resp.donor, 'donor_stats', None),
                 })
@@ -520,14 +554,14 @@ class PatientSOSDashboardView(RoleRequiredMixin, TemplateView):
             requests_with_responses.append({
                 'sos': sos,
                 'responses': responses_data,
-                'yes_count': responses.filter(response='yes').count(),
-                'pending_count': responses.filter(response='pending').count(),
-                'total_count': responses.count(),
+                'yes_count': sos.yes_count,
+                'pending_count': sos.pending_count,
+                'total_count': sos.total_count,
             })
         
         ctx['requests_with_responses'] = requests_with_responses
-        ctx['total_sos'] = sos_requests.count()
-        ctx['open_sos'] = sos_requests.filter(status='open').count()
+        ctx['total_sos'] = len(sos_requests)
+        ctx['open_sos'] = sum(1 for sos in sos_requests if sos.status == SOSStatus.OPEN)
         
         return ctx
 
@@ -540,53 +574,56 @@ class DonorSOSDashboardView(RoleRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         user = self.request.user
-        donor_details = getattr(user, 'donor_details', None)
+        ctx.update(cached_user_context("donor-sos-dashboard", user.id, lambda: self._build_context(user)))
         
-        # Get active SOS requests in donor's city
-        if donor_details:
-            active_sos = SOSRequest.objects.filter(
-                status='open',
-                city__iexact=donor_details.city
-            ).order_by('-priority', '-created_at')[:20]
-        else:
-            active_sos = SOSRequest.objects.filter(status='open').order_by('-priority', '-created_at')[:20]
+        # Get active SOS requests in donor's city (not cached: they change with every SOS in the city)
+        active_sos = SOSRequest.objects.filter(status='open')
+        if ctx['donor_details']:
+            active_sos = active_sos.filter(city__iexact=ctx['donor_details'].city)
+        ctx['active_sos'] = list(active_sos.order_by('-priority', '-created_at')[:20])
+        return ctx
+
+    @staticmethod
+    def _build_context(user):
+        donor_details = DonorDetails.objects.filter(user=user).first()
         
-        # Get donor's own responses
+        # Donor's latest responses with request and tracker joined in
         my_responses = SOSResponse.objects.filter(
             donor=user
-        ).select_related('request').order_by('-created_at')[:20]
-        
-        # Get responses with tracking
-        responses_with_tracking = []
-        for resp in my_responses:
-            tracker = getattr(resp, 'donation_tracker', None)
-            responses_with_tracking.append({
-                'response': resp,
-                'tracker': tracker,
-            })
+        ).select_related('request', 'donation_tracker').order_by('-created_at')[:20]
+        responses_with_tracking = [
+            {'response': resp, 'tracker': getattr(resp, 'donation_tracker', None)}
+            for resp in my_responses
+        ]
         
-        ctx['active_sos'] = active_sos
-        ctx['my_responses'] = responses_with_tracking
-        ctx['pending_responses'] = my_responses.filter(response='pending').count()
-        ctx['donor_details'] = donor_details
-        
-        return ctx
+        counts = _donor_response_counts(user)
+        return {
+            'my_responses': responses_with_tracking,
+            'pending_responses': counts['pending'],
+            'response_counts': counts,
+            'donor_details': donor_details,
+        }
 
 
-class DrivesView(TemplateView):
+class DrivesView(CachedPageMixin, TemplateView):
     """Blood donation drives listing"""
     template_name = "drives.html"
+    cache_scopes = ("drives",)
     
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        ctx.update(self.cached_context(self._build_context))
+        return ctx
+
+    @staticmethod
+    def _build_context():
         from drives.models import DonationDrive
         from django.utils import timezone
         
         # Get upcoming published drives
         today = timezone.now().date()
-        ctx['upcoming_drives'] = DonationDrive.objects.filter(
-            start_date__gte=today,
-            status='published'
-        ).order_by('start_date')[:20]
-        
-        return ctx
+        return {
+            'upcoming_drives': list(
+                DonationDrive.objects.filter(start_date__gte=today, status='published').order_by('start_date')[:20]
+            ),
+        }